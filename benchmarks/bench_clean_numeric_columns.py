@@ -0,0 +1,83 @@
+# benchmarks/bench_clean_numeric_columns.py
+# Usage: python -m benchmarks.bench_clean_numeric_columns
+import random
+import time
+import logging
+import pandas as pd
+from decimal import Decimal, InvalidOperation
+from utils.clean_numeric_columns import clean_numeric_columns
+
+ROW_COUNTS = [10_000, 100_000]
+NUM_COLS = 30
+REPEATS = 3
+
+logging.disable(logging.WARNING)  # Invalid-value warnings are expected noise here
+
+
+def legacy_clean_numeric_columns(df, numeric_cols):
+    """Previous per-cell implementation, kept here as the reference."""
+    for col in numeric_cols:
+        if col in df.columns:
+            def convert_value(x):
+                try:
+                    if pd.isna(x) or str(x).strip() in [' ', "", '', 'None', 'nan']:
+                        return None
+                    return Decimal(str(x))
+                except (InvalidOperation, TypeError, ValueError):
+                    return None
+            df[col] = df[col].apply(convert_value)
+    return df
+
+
+def make_frame(rows, seed=42):
+    """Columns shaped like the flattened gmgn payload: numeric strings, floats and counts."""
+    rng = random.Random(seed)
+
+    def string_value():
+        r = rng.random()
+        if r < 0.05:
+            return None
+        if r < 0.07:
+            return ''
+        if r < 0.08:
+            return 'n/a'
+        return f"{rng.uniform(0, 1e6):.18f}"
+
+    def float_value():
+        return None if rng.random() < 0.05 else rng.uniform(0, 1e-6)
+
+    def int_value():
+        return rng.randint(0, 10**9)
+
+    kinds = [string_value, float_value, int_value]
+    return pd.DataFrame({
+        f"col_{i}": [kinds[i % len(kinds)]() for _ in range(rows)]
+        for i in range(NUM_COLS)
+    })
+
+
+def timed(func, df, cols, **kwargs):
+    best = float('inf')
+    for _ in range(REPEATS):
+        frame = df.copy()
+        start = time.perf_counter()
+        func(frame, cols, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'rows':>8} {'legacy':>10} {'decimal':>10} {'string':>10} {'float':>10}  speedup(decimal/float)")
+    for rows in ROW_COUNTS:
+        df = make_frame(rows)
+        cols = list(df.columns)
+        legacy = timed(legacy_clean_numeric_columns, df, cols)
+        decimal = timed(clean_numeric_columns, df, cols, mode='decimal')
+        string = timed(clean_numeric_columns, df, cols, mode='string')
+        floats = timed(clean_numeric_columns, df, cols, mode='float')
+        print(f"{rows:>8} {legacy:>9.3f}s {decimal:>9.3f}s {string:>9.3f}s {floats:>9.3f}s  "
+              f"{legacy / decimal:.1f}x / {legacy / floats:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# benchmarks/bench_extract_updates.py
+# Usage: python -m benchmarks.bench_extract_updates [tokens] [--skip-threads]   (default: 10000)
+# Runs an update sweep against the local stub server with both HTTP engines.
+# The thread pool pays the per-request jitter sleep on its 5 workers, so it is
+# slow on large sweeps; pass --skip-threads to time only the async engine.
+import os
+import sys
+import time
+import asyncio
+import logging
+from benchmarks.stub_gmgn import StubServer, DEFAULT_PORT
+
+LATENCY = 0.1  # Seconds per stub response
+PAGE_SIZE = 1000
+
+os.environ['GMGN_BASE_URL'] = f"http://127.0.0.1:{DEFAULT_PORT}"
+logging.disable(logging.WARNING)
+
+# Imported after GMGN_BASE_URL is set so the extractor targets the stub
+from extract import extract_updates  # noqa: E402
+
+
+def address_pages(tokens):
+    addresses = [f"addr{i:012d}" for i in range(tokens)]
+    return [addresses[i:i + PAGE_SIZE] for i in range(0, tokens, PAGE_SIZE)]
+
+
+def main(tokens, skip_threads):
+    print(f"{'engine':>8} {'tokens':>8} {'updates':>8} {'time':>9}")
+    with StubServer(latency=LATENCY):
+        engines = [('async', lambda: asyncio.run(extract_updates.fetch_updates_async(address_pages(tokens))))]
+        if not skip_threads:
+            engines.append(('threads', lambda: extract_updates.fetch_updates_threaded(address_pages(tokens))))
+        for name, run in engines:
+            start = time.perf_counter()
+            results = run()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>8} {tokens:>8} {len(results):>8} {elapsed:>8.2f}s")
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    main(int(args[0]) if args else 10_000, '--skip-threads' in sys.argv)
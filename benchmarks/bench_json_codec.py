@@ -0,0 +1,54 @@
+# benchmarks/bench_json_codec.py
+# Usage: python -m benchmarks.bench_json_codec
+# Decode/encode time of the two response shapes the extractors handle
+# (a 100-pair new_pairs page, a 1,000-token info sweep) per JSON codec.
+import json
+import time
+from benchmarks.synthetic import make_new_pairs_payload, make_token_infos
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+ROUNDS = 200
+
+
+def codecs():
+    yield 'stdlib', json.loads, lambda obj: json.dumps(obj, separators=(',', ':')).encode()
+    if orjson is not None:
+        yield 'orjson', orjson.loads, orjson.dumps
+    if msgspec is not None:
+        yield 'msgspec', msgspec.json.decode, msgspec.json.encode
+
+
+def best_of(fn, arg, rounds=ROUNDS):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    payloads = {
+        'new_pairs x100': make_new_pairs_payload(100),
+        'token_info x1000': {'code': 0, 'msg': 'success', 'data': make_token_infos(1000)},
+    }
+    print(f"{'payload':<18} {'codec':<8} {'KB':>7} {'decode ms':>10} {'encode ms':>10}")
+    for name, payload in payloads.items():
+        body = json.dumps(payload).encode()
+        for codec, decode, encode in codecs():
+            assert decode(body) == payload
+            print(f"{name:<18} {codec:<8} {len(body) / 1024:>7.0f} "
+                  f"{best_of(decode, body) * 1000:>10.3f} {best_of(encode, payload) * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
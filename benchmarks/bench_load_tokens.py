@@ -0,0 +1,55 @@
+# benchmarks/bench_load_tokens.py
+# Usage: python -m benchmarks.bench_load_tokens
+# Needs a local Postgres with queries.sql applied and DB_* set in .env.
+# Rows are written with synthetic addresses and deleted again afterwards.
+import time
+import logging
+import numpy as np
+from sqlalchemy import text
+from utils.database import get_db_engine
+from load.load_new_tokens import batch_upsert, copy_upsert
+from transform.transform_new_tokens import transform_new_tokens
+from benchmarks.synthetic import make_new_pairs_payload
+
+ROW_COUNTS = [1_000, 10_000, 100_000]
+
+logging.disable(logging.WARNING)
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def cleanup(engine, addresses):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM tokens WHERE address = ANY(:addresses)"), {'addresses': addresses})
+
+
+def main():
+    engine = get_db_engine()
+    print(f"{'rows':>8} {'insert':>10} {'copy(df)':>10} {'copy(arrow)':>12}")
+    for rows in ROW_COUNTS:
+        payload = make_new_pairs_payload(rows)
+        df = transform_new_tokens(payload)
+        table = transform_new_tokens(payload, columnar=True)
+        records = df.replace({np.nan: None}).to_dict('records')
+        addresses = df['address'].tolist()
+
+        try:
+            # Every method starts from the same empty slate
+            cleanup(engine, addresses)
+            insert_time = timed(lambda: batch_upsert(engine, records))
+            cleanup(engine, addresses)
+            copy_df_time = timed(lambda: copy_upsert(engine, df))
+            cleanup(engine, addresses)
+            copy_arrow_time = timed(lambda: copy_upsert(engine, table))
+        finally:
+            cleanup(engine, addresses)
+
+        print(f"{rows:>8} {insert_time:>9.3f}s {copy_df_time:>9.3f}s {copy_arrow_time:>11.3f}s")
+
+
+if __name__ == "__main__":
+    main()
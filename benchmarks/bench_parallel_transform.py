@@ -0,0 +1,57 @@
+# benchmarks/bench_parallel_transform.py
+# Usage: python -m benchmarks.bench_parallel_transform [rows]   (default: 100000)
+# Columnar transform of a new-pairs batch and of an updates batch in-process
+# and on the process pool with 1, 2, 4, ... workers up to the CPU count.
+# Checks that every pooled result equals the in-process table (rows, order and
+# schema) and reports the speedup. Pool start-up is excluded (one warm-up run).
+import os
+import sys
+import time
+import logging
+from transform.token_schema import TOKEN_FIELDS, UPDATE_FIELDS
+from utils.columnar import build_arrow_table
+from utils.parallel_transform import build_arrow_table_parallel, shutdown_pool
+from benchmarks.synthetic import make_new_pairs_payload, make_token_infos
+
+logging.disable(logging.WARNING)
+
+
+def worker_counts():
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(rows):
+    cases = [
+        ('new_pairs', make_new_pairs_payload(rows)['data']['pairs'], TOKEN_FIELDS, {'status': 'alive'}),
+        ('updates', make_token_infos(rows), UPDATE_FIELDS, None),
+    ]
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'case':>10} {'workers':>8} {'time':>8} {'rows/s':>10} {'speedup':>8}")
+    for name, records, fields, constants in cases:
+        expected, serial = timed(lambda: build_arrow_table(records, fields, required='address', constants=constants))
+        print(f"{name:>10} {'-':>8} {serial:>7.2f}s {rows / serial:>10,.0f} {1:>7.2f}x")
+        for workers in worker_counts():
+            def run():
+                return build_arrow_table_parallel(records, fields, required='address', constants=constants,
+                                                  workers=workers, min_rows=0)
+            run()  # Start the pool
+            table, elapsed = timed(run)
+            assert table.equals(expected), f"{name} with {workers} workers differs from the in-process table"
+            print(f"{name:>10} {workers:>8} {elapsed:>7.2f}s {rows / elapsed:>10,.0f} {serial / elapsed:>7.2f}x")
+            shutdown_pool()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
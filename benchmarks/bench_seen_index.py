@@ -0,0 +1,60 @@
+# benchmarks/bench_seen_index.py
+# Usage: python -m benchmarks.bench_seen_index [sizes...]   (default: 1000000 10000000)
+# Builds a SqliteSeenIndex of the given size in a temp dir and measures the
+# per-cycle lookup latency TokenFilter sees (100 addresses, ~10% already seen).
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+import numpy as np
+from utils.seen_index import SqliteSeenIndex
+
+DEFAULT_SIZES = [1_000_000, 10_000_000]
+INSERT_CHUNK = 100_000
+CYCLES = 1_000
+BATCH = 100
+HIT_RATIO = 0.1
+
+logging.disable(logging.INFO)
+
+
+def address(i):
+    return f"addr{i:012d}"
+
+
+def main(sizes):
+    rng = random.Random(42)
+    print(f"{'size':>10} {'build':>9} {'p50 us':>9} {'p99 us':>9} {'bloom fp':>9} {'disk MB':>8}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, 'seen.sqlite3')
+            index = SqliteSeenIndex(db_file, capacity=size)
+
+            start = time.perf_counter()
+            for i in range(0, size, INSERT_CHUNK):
+                index.add_many([address(j) for j in range(i, min(i + INSERT_CHUNK, size))])
+            build = time.perf_counter() - start
+
+            latencies = []
+            fresh = size
+            for _ in range(CYCLES):
+                hits = [address(rng.randrange(size)) for _ in range(int(BATCH * HIT_RATIO))]
+                misses = [address(fresh + j) for j in range(BATCH - len(hits))]
+                fresh += len(misses)
+                start = time.perf_counter()
+                found = index.contains_many(hits + misses)
+                latencies.append(time.perf_counter() - start)
+                assert len(found) == len(set(hits))
+
+            probes = [address(fresh + j) for j in range(100_000)]
+            false_positives = index.bloom.might_contain_many(probes).mean()
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+            index.close()
+            db_size = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp)) / 1e6
+            print(f"{size:>10} {build:>8.1f}s {p50:>9.0f} {p99:>9.0f} {false_positives:>9.4f} {db_size:>8.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,37 @@
+# benchmarks/bench_transform_columnar.py
+# Usage: python -m benchmarks.bench_transform_columnar
+import time
+import logging
+import numpy as np
+from transform.transform_new_tokens import transform_new_tokens
+from benchmarks.synthetic import make_new_pairs_payload
+
+ROW_COUNTS = [1_000, 10_000, 100_000]
+
+logging.disable(logging.WARNING)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    print(f"{'rows':>8} {'mode':>9} {'transform':>10} {'to rows':>9} {'bytes/row':>10}")
+    for rows in ROW_COUNTS:
+        payload = make_new_pairs_payload(rows)
+
+        df, transform_time = timed(lambda: transform_new_tokens(payload))
+        _, prep_time = timed(lambda: df.replace({np.nan: None}).to_dict('records'))
+        per_row = df.memory_usage(deep=True).sum() / max(len(df), 1)
+        print(f"{rows:>8} {'pandas':>9} {transform_time:>9.3f}s {prep_time:>8.3f}s {per_row:>10.0f}")
+
+        table, transform_time = timed(lambda: transform_new_tokens(payload, columnar=True))
+        _, prep_time = timed(lambda: table.to_pylist())
+        per_row = table.nbytes / max(table.num_rows, 1)
+        print(f"{rows:>8} {'columnar':>9} {transform_time:>9.3f}s {prep_time:>8.3f}s {per_row:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_update_chunks.py
+# Usage: python -m benchmarks.bench_update_chunks [tokens]   (default: 20000)
+# Fetches and transforms an update sweep from the local stub server, once
+# whole (extract_updates.main, then one transform) and then chunk by chunk
+# (iter_update_chunks), and reports peak traced Python memory and the time
+# until the first batch is ready to load. The load itself is left out so no
+# database is needed.
+import os
+import sys
+import time
+import logging
+import tracemalloc
+from benchmarks.stub_gmgn import StubServer, DEFAULT_PORT
+
+LATENCY = 0.05  # Seconds per stub response
+PAGE_SIZE = 1000
+CHUNK_SIZES = [500, 2000, 5000]
+
+os.environ['GMGN_BASE_URL'] = f"http://127.0.0.1:{DEFAULT_PORT}"
+os.environ.setdefault('HTTP_ENGINE', 'async')  # The chunk producer under test
+logging.disable(logging.WARNING)
+
+# Imported after GMGN_BASE_URL is set so the extractor targets the stub
+from extract import extract_updates  # noqa: E402
+from transform.transform_updates import transform_updates  # noqa: E402
+
+
+def address_pages(tokens):
+    for start in range(0, tokens, PAGE_SIZE):
+        yield [f"addr{i:012d}" for i in range(start, min(start + PAGE_SIZE, tokens))]
+
+
+def run_whole(tokens):
+    df = transform_updates(extract_updates.main(address_pages(tokens)))
+    return len(df), None
+
+
+def run_chunked(tokens, chunk_size):
+    rows, first = 0, None
+    for _, results in extract_updates.iter_update_chunks(address_pages(tokens), chunk_size):
+        df = transform_updates(results)
+        rows += len(df)
+        first = first or time.perf_counter()
+        del results, df
+    return rows, first
+
+
+def measure(run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows, first = run()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    first_batch = (first or start + elapsed) - start
+    return rows, elapsed, first_batch, peak
+
+
+def main(tokens):
+    print(f"{'mode':>14} {'rows':>7} {'total':>8} {'first batch':>12} {'peak MB':>8}")
+    with StubServer(latency=LATENCY):
+        modes = [('whole', lambda: run_whole(tokens))]
+        modes += [(f"chunk {size}", lambda size=size: run_chunked(tokens, size)) for size in CHUNK_SIZES]
+        for name, run in modes:
+            rows, elapsed, first_batch, peak = measure(run)
+            print(f"{name:>14} {rows:>7} {elapsed:>7.2f}s {first_batch:>11.2f}s {peak / 1024 / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,164 @@
+# benchmarks/stub_gmgn.py
+# Local stand-in for the two gmgn endpoints the extractors call. Responses are
+# synthetic payloads, or responses recorded by the raw archive
+# (RAW_ARCHIVE_ENABLED=true) when a replay directory is given, served after a
+# configurable latency and with an optional rate of injected 403/429/5xx errors.
+# Usage: python -m benchmarks.stub_gmgn [--port 8765] [--latency 0.05] [--jitter 0]
+#            [--error 429=0.05 ...] [--replay raw_archive]
+# then run either pipeline with GMGN_STUB_URL=http://127.0.0.1:<port>
+import time
+import random
+import asyncio
+import argparse
+import threading
+from aiohttp import web
+from benchmarks.synthetic import make_new_pairs_payload, make_token_infos
+from utils.raw_archive import iter_responses
+
+DEFAULT_PORT = 8765
+
+
+class ReplaySource:
+    """
+    Recorded responses from a raw archive directory. new_pairs pages are
+    served in recorded order (wrapping around) with their timestamps moved
+    forward so the newest pair looks just opened; token_info answers with the
+    latest recorded entry per address.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.pages = [data for _, data in iter_responses('new_pairs', root=root)]
+        self.infos = {}
+        for _, data in iter_responses('token_info', root=root):
+            for info in (data or {}).get('data') or []:
+                if 'address' in info:
+                    self.infos[info['address']] = info
+        self._next_page = 0
+
+    def new_pairs_payload(self):
+        if not self.pages:
+            return None
+        payload = self.pages[self._next_page % len(self.pages)]
+        self._next_page += 1
+        pairs = [dict(pair) for pair in (payload.get('data') or {}).get('pairs') or []]
+        stamps = [pair['open_timestamp'] for pair in pairs if isinstance(pair.get('open_timestamp'), (int, float))]
+        shift = int(time.time()) - max(stamps) if stamps else 0
+        for pair in pairs:
+            for key in ('open_timestamp', 'creation_timestamp'):
+                if isinstance(pair.get(key), (int, float)):
+                    pair[key] += shift
+        return {**payload, 'data': {**payload['data'], 'pairs': pairs}}
+
+    def token_infos(self, addresses):
+        return [self.infos[address] for address in addresses if address in self.infos]
+
+
+def make_app(latency=0.05, pairs_per_page=100, jitter=0.0, error_rates=None, replay=None, seed=None):
+    """
+    latency + uniform(0, jitter) seconds per response. error_rates maps an
+    HTTP status to the fraction of requests answered with it, e.g.
+    {403: 0.01, 429: 0.05, 503: 0.01}. replay is a raw archive directory;
+    addresses it has no recording for get synthetic token info.
+    """
+    rng = random.Random(seed)
+    error_rates = dict(error_rates or {})
+    source = ReplaySource(replay) if replay else None
+
+    async def respond_later():
+        await asyncio.sleep(latency + (rng.uniform(0, jitter) if jitter else 0))
+        roll = rng.random()
+        for status, rate in error_rates.items():
+            if roll < rate:
+                headers = {'Retry-After': '1'} if status == 429 else None
+                return web.Response(status=status, text=f"stub error {status}", headers=headers)
+            roll -= rate
+        return None
+
+    async def new_pairs(request):
+        error = await respond_later()
+        if error is not None:
+            return error
+        payload = source.new_pairs_payload() if source else None
+        if payload is None:
+            payload = make_new_pairs_payload(pairs_per_page, seed=rng.randrange(10**9))
+        # Same order the extractor asks for: orderby=open_timestamp, direction=desc
+        payload['data']['pairs'].sort(key=lambda pair: pair['open_timestamp'], reverse=True)
+        return web.json_response(payload)
+
+    async def token_info(request):
+        body = await request.json()
+        addresses = body.get('addresses') or []
+        error = await respond_later()
+        if error is not None:
+            return error
+        infos = source.token_infos(addresses) if source else []
+        known = {info['address'] for info in infos}
+        missing = [address for address in addresses if address not in known]
+        if missing:
+            infos += make_token_infos(len(missing), seed=rng.randrange(10**9), addresses=missing)
+        return web.json_response({'code': 0, 'msg': 'success', 'data': infos})
+
+    app = web.Application()
+    app.router.add_get('/defi/quotation/v1/pairs/sol/new_pairs/5m', new_pairs)
+    app.router.add_post('/api/v1/mutil_window_token_info', token_info)
+    return app
+
+
+class StubServer:
+    """Runs the stub app on its own event loop in a daemon thread."""
+
+    def __init__(self, port=DEFAULT_PORT, **app_options):
+        self.port = port
+        self.app_options = app_options
+        self.url = f"http://127.0.0.1:{port}"
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+
+    def start(self):
+        ready = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(make_app(**self.app_options), access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            self._loop.run_until_complete(web.TCPSite(self._runner, '127.0.0.1', self.port).start())
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_error_rate(value):
+    status, rate = value.split('=')
+    return int(status), float(rate)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the gmgn API")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds per response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra uniform(0, jitter) seconds")
+    parser.add_argument('--pairs-per-page', type=int, default=100)
+    parser.add_argument('--error', type=parse_error_rate, action='append', default=[],
+                        metavar='STATUS=RATE', help="e.g. 429=0.05; repeatable")
+    parser.add_argument('--replay', metavar='DIR', help="raw archive directory to serve recorded responses from")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    web.run_app(
+        make_app(latency=args.latency, pairs_per_page=args.pairs_per_page, jitter=args.jitter,
+                 error_rates=dict(args.error), replay=args.replay, seed=args.seed),
+        host='127.0.0.1', port=args.port
+    )
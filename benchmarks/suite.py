@@ -0,0 +1,213 @@
+# benchmarks/suite.py
+# Usage: python -m benchmarks.suite [--sizes 100 1000 10000 100000] [--repeats 3] [--no-db]
+#            [--output benchmarks/results/latest.json] [--baseline benchmarks/baseline.json]
+#            [--save-baseline] [--tolerance 0.2]
+# Times the new-pairs hot paths on synthetic payloads at each size, writes the
+# results as JSON and compares them with a stored baseline. Exits with status 1
+# if any case got slower than baseline * (1 + tolerance), so it can gate a deploy.
+# Record a baseline on the reference machine first with --save-baseline.
+# The database cases need a local Postgres with queries.sql applied (DB_* in
+# .env); their rows use synthetic addresses and are deleted again afterwards.
+import os
+import sys
+import time
+import json
+import socket
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import itertools
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from benchmarks.synthetic import make_new_pairs_payload
+from transform.token_schema import TOKEN_FIELDS
+from transform.transform_new_tokens import transform_new_tokens
+from utils.flatten_json import flatten_json
+from utils.clean_numeric_columns import clean_numeric_columns
+from utils.convert_boolean_columns import convert_boolean_columns
+from utils.record_normalizer import BOOL_MAP
+from utils.seen_index import RecentSeenIndex
+from utils.token_filter import TokenFilter
+from utils.columnar import pa
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000]
+DEFAULT_REPEATS = 3
+DEFAULT_OUTPUT = os.path.join('benchmarks', 'results', 'latest.json')
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+DEFAULT_TOLERANCE = 0.2  # Fraction slower than baseline that counts as a regression
+NOISE_FLOOR = 0.002  # Seconds; smaller absolute differences are never regressions
+
+# Flattened column names (flatten_json joins keys with '_') of the typed fields
+NUMERIC_COLUMNS = [field.paths[0].replace('.', '_') for field in TOKEN_FIELDS if field.type in ('numeric', 'integer')]
+BOOL_COLUMNS = [field.paths[0].replace('.', '_') for field in TOKEN_FIELDS if field.type == 'bool']
+
+logging.disable(logging.WARNING)
+
+
+def measure(run, setup=None, repeats=DEFAULT_REPEATS):
+    """Seconds per call of run(setup()), timing only run: best and median of repeats."""
+    times = []
+    for _ in range(repeats):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        run(arg)
+        times.append(time.perf_counter() - start)
+    return {'best': min(times), 'median': statistics.median(times)}
+
+
+def transform_cases(payload, workdir):
+    """(name, run, setup) for every case that needs no database."""
+    pairs = payload['data']['pairs']
+    flat = pd.DataFrame([flatten_json(pair) for pair in pairs])
+    runs = itertools.count()
+
+    def filter_setup():
+        # A fresh, empty index per run so every pair is new
+        prefix = os.path.join(workdir, f"seen-{next(runs)}")
+        return TokenFilter(seen_index=RecentSeenIndex(f"{prefix}.json", f"{prefix}.log"))
+
+    cases = [
+        ('flatten_json', lambda _: [flatten_json(pair) for pair in pairs], None),
+        ('transform_new_tokens', lambda _: transform_new_tokens(payload), None),
+        ('clean_numeric_columns', lambda df: clean_numeric_columns(df, NUMERIC_COLUMNS), flat.copy),
+        ('convert_boolean_columns', lambda df: convert_boolean_columns(df, BOOL_COLUMNS, BOOL_MAP), flat.copy),
+        ('filter_new_tokens', lambda token_filter: token_filter.filter_new_tokens(pairs), filter_setup),
+    ]
+    if pa is not None:
+        cases.insert(2, ('transform_new_tokens_columnar', lambda _: transform_new_tokens(payload, columnar=True), None))
+    return cases
+
+
+def database_cases(payload, engine):
+    """Upserts into an empty slate: every row is an insert."""
+    from load.load_new_tokens import batch_upsert, copy_upsert
+
+    df = transform_new_tokens(payload)
+    records = df.replace({np.nan: None}).to_dict('records')
+    addresses = df['address'].tolist()
+
+    def cleanup():
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM tokens WHERE address = ANY(:addresses)"), {'addresses': addresses})
+
+    return cleanup, [
+        ('batch_upsert', lambda _: batch_upsert(engine, records), cleanup),
+        ('copy_upsert', lambda _: copy_upsert(engine, df), cleanup),
+    ]
+
+
+def connect_database():
+    try:
+        from utils.database import get_db_engine
+        engine = get_db_engine()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1 FROM tokens LIMIT 1"))
+        return engine
+    except Exception as e:
+        print(f"Skipping database cases: {str(e).splitlines()[0]}", file=sys.stderr)
+        return None
+
+
+def run_suite(sizes, repeats, use_db=True):
+    engine = connect_database() if use_db else None
+    results = {}
+    workdir = tempfile.TemporaryDirectory()
+    print(f"{'case':<30} {'size':>7} {'best':>10} {'median':>10} {'rows/s':>11}")
+    for size in sizes:
+        payload = make_new_pairs_payload(size)
+        cases = transform_cases(payload, workdir.name)
+        cleanup = None
+        if engine is not None:
+            cleanup, db_cases = database_cases(payload, engine)
+            cases += db_cases
+        try:
+            for name, run, setup in cases:
+                timing = measure(run, setup, repeats)
+                results[f"{name}@{size}"] = {'case': name, 'size': size, **timing}
+                print(f"{name:<30} {size:>7} {timing['best']:>9.4f}s {timing['median']:>9.4f}s "
+                      f"{size / timing['best']:>11,.0f}")
+        finally:
+            if cleanup:
+                cleanup()
+    workdir.cleanup()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(results, path, repeats):
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'revision': git_revision(),
+        'host': socket.gethostname(),
+        'python': platform.python_version(),
+        'repeats': repeats,
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {path}")
+
+
+def compare(results, baseline_path, tolerance):
+    """Prints current vs baseline best times; returns the regressed case keys."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nAgainst {baseline_path} (revision {baseline.get('revision')}, host {baseline.get('host')}):")
+    print(f"{'case':<30} {'size':>7} {'baseline':>10} {'current':>10} {'change':>8}")
+    regressions = []
+    for key, current in results.items():
+        previous = baseline['results'].get(key)
+        if previous is None:
+            continue
+        change = current['best'] / previous['best'] - 1 if previous['best'] else 0.0
+        regressed = change > tolerance and current['best'] - previous['best'] > NOISE_FLOOR
+        if regressed:
+            regressions.append(key)
+        print(f"{current['case']:<30} {current['size']:>7} {previous['best']:>9.4f}s "
+              f"{current['best']:>9.4f}s {change:>+7.0%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETL hot path benchmark suite")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    parser.add_argument('--no-db', action='store_true', help="skip the Postgres cases")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="also store these results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.repeats, use_db=not args.no_db)
+    write_report(results, args.output, args.repeats)
+    if args.save_baseline:
+        write_report(results, args.baseline, args.repeats)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --save-baseline")
+        return 0
+
+    regressions = compare(results, args.baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
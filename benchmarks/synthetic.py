@@ -0,0 +1,165 @@
+# benchmarks/synthetic.py
+# Synthetic gmgn payloads shaped like the real new_pairs / mutil_window_token_info responses.
+import random
+import string
+import time
+
+BASE58 = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+def random_address(rng, length=44):
+    return ''.join(rng.choices(BASE58, k=length))
+
+
+def numeric_text(rng, low, high, digits=6):
+    return f"{rng.uniform(low, high):.{digits}f}"
+
+
+def make_pair(rng, now=None):
+    """One entry of data.pairs from /defi/quotation/v1/pairs/sol/new_pairs."""
+    now = int(now or time.time())
+    pool_id = random_address(rng)
+    base_address = random_address(rng)
+    created = now - rng.randint(0, 600)
+    symbol = ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 6)))
+    return {
+        'id': rng.randint(1, 10**9),
+        'address': pool_id,
+        'base_address': base_address,
+        'quote_address': 'So11111111111111111111111111111111111111112',
+        'quote_symbol': 'SOL',
+        'quote_reserve': numeric_text(rng, 0, 500),
+        'initial_liquidity': numeric_text(rng, 0, 10000),
+        'initial_quote_reserve': numeric_text(rng, 0, 100),
+        'quote_reserve_usd': numeric_text(rng, 0, 75000),
+        'creation_timestamp': created,
+        'open_timestamp': created + rng.randint(0, 60),
+        'pool_type': rng.randint(1, 4),
+        'pool_type_str': rng.choice(['pump', 'raydium', 'moonshot', None]),
+        'launchpad': rng.choice(['pump', 'raydium']),
+        'creator': random_address(rng),
+        'bot_degen_count': str(rng.randint(0, 50)),
+        'base_token_info': {
+            'address': base_address,
+            'pool_id': pool_id,
+            'symbol': symbol,
+            'name': f"{symbol.title()} Coin",
+            'logo': rng.choice([None, f"https://example.com/{symbol}.png"]),
+            'total_supply': rng.choice([10**9, 10**12, 999999999999999]),
+            'price': numeric_text(rng, 0, 0.001, 18),
+            'holder_count': rng.randint(0, 5000),
+            'price_change_percent1m': numeric_text(rng, -100, 500),
+            'price_change_percent5m': numeric_text(rng, -100, 500),
+            'price_change_percent1h': rng.choice([None, numeric_text(rng, -100, 500)]),
+            'is_show_alert': rng.choice([True, False]),
+            'hot_level': rng.randint(0, 3),
+            'liquidity': numeric_text(rng, 0, 100000),
+            'top_10_holder_rate': numeric_text(rng, 0, 1),
+            'renounced_mint': rng.choice([0, 1]),
+            'renounced_freeze_account': rng.choice([0, 1]),
+            'renounced': rng.choice([0, 1]),
+            'buy_tax': None,
+            'sell_tax': None,
+            'is_honeypot': None,
+            'social_links': {
+                'twitter_username': rng.choice([None, symbol.lower()]),
+                'website': rng.choice([None, f"https://{symbol.lower()}.io"]),
+                'telegram': rng.choice([None, f"https://t.me/{symbol.lower()}"]),
+            },
+            'rug_ratio': rng.choice([None, numeric_text(rng, 0, 1)]),
+            'is_wash_trading': rng.choice([True, False]),
+            'creator_balance_rate': numeric_text(rng, 0, 1),
+            'creator_close': rng.choice([True, False]),
+            'creator_token_status': rng.choice(['creator_hold', 'creator_close', 'creator_sell']),
+            'rat_trader_amount_rate': numeric_text(rng, 0, 1),
+            'bluechip_owner_percentage': numeric_text(rng, 0, 1),
+            'smart_degen_count': rng.randint(0, 20),
+            'renowned_count': rng.randint(0, 20),
+            'sniper_count': rng.randint(0, 20),
+            'volume': numeric_text(rng, 0, 10**6),
+            'swaps': rng.randint(0, 10**4),
+            'buys': rng.randint(0, 10**4),
+            'sells': rng.randint(0, 10**4),
+            'burn_status': rng.choice(['burn', 'none', '']),
+            'burn_ratio': numeric_text(rng, 0, 1),
+            'dev_token_burn_amount': rng.choice([None, numeric_text(rng, 0, 10**6)]),
+            'dev_token_burn_ratio': rng.choice([None, numeric_text(rng, 0, 1)]),
+            'cto_flag': rng.choice([0, 1]),
+            'twitter_change_flag': rng.choice([0, 1]),
+            'market_cap': numeric_text(rng, 0, 10**7),
+            'biggest_pool_address': pool_id,
+            'launchpad_status': rng.choice([0, 1]),
+            'dexscr_ad': 0,
+            'dexscr_update_link': 0,
+            'is_open_source': None,
+            'lockInfo': None,
+            'progress': numeric_text(rng, 0, 1),
+            'creation_timestamp': created,
+        },
+    }
+
+
+def make_pairs(count, seed=42):
+    rng = random.Random(seed)
+    now = time.time()
+    return [make_pair(rng, now) for _ in range(count)]
+
+
+def make_new_pairs_payload(count, seed=42):
+    """Full response body as returned by make_http_request()['data']."""
+    return {'code': 0, 'msg': 'success', 'data': {'pairs': make_pairs(count, seed)}}
+
+
+def make_token_info(rng, address=None):
+    """One entry of data from /api/v1/mutil_window_token_info."""
+    address = address or random_address(rng)
+    return {
+        'address': address,
+        'symbol': ''.join(rng.choices(string.ascii_uppercase, k=4)),
+        'name': 'Synthetic',
+        'decimals': 6,
+        'logo': None,
+        'biggest_pool_address': random_address(rng),
+        'open_timestamp': int(time.time()) - rng.randint(0, 86400),
+        'holder_count': rng.randint(0, 5000),
+        'circulating_supply': str(10**9),
+        'total_supply': str(10**9),
+        'max_supply': str(10**9),
+        'liquidity': numeric_text(rng, 0, 100000),
+        'creation_timestamp': int(time.time()) - rng.randint(0, 86400),
+        'price': {
+            'address': address,
+            'price': numeric_text(rng, 0, 0.001, 18),
+            'price_1m': numeric_text(rng, 0, 0.001, 18),
+            'price_5m': numeric_text(rng, 0, 0.001, 18),
+            'price_1h': numeric_text(rng, 0, 0.001, 18),
+            'price_6h': numeric_text(rng, 0, 0.001, 18),
+            'price_24h': numeric_text(rng, 0, 0.001, 18),
+            'buys_5m': rng.randint(0, 500),
+            'sells_5m': rng.randint(0, 500),
+            'volume_5m': numeric_text(rng, 0, 10**5),
+            'buys_1h': rng.randint(0, 5000),
+            'sells_1h': rng.randint(0, 5000),
+            'volume_1h': numeric_text(rng, 0, 10**6),
+            'buys_24h': rng.randint(0, 50000),
+            'sells_24h': rng.randint(0, 50000),
+            'volume_24h': numeric_text(rng, 0, 10**7),
+            'swaps_24h': rng.randint(0, 100000),
+        },
+        'dev': {
+            'address': address,
+            'creator_address': random_address(rng),
+            'creator_token_balance': numeric_text(rng, 0, 10**6),
+            'creator_token_status': rng.choice(['creator_hold', 'creator_close', 'creator_sell']),
+            'top_10_holder_rate': numeric_text(rng, 0, 1),
+            'cto_flag': rng.choice([0, 1]),
+            'twitter_change_flag': rng.choice([0, 1]),
+        },
+        'volume': rng.choice([0, rng.uniform(0, 10**6)]),
+    }
+
+
+def make_token_infos(count, seed=42, addresses=None):
+    rng = random.Random(seed)
+    addresses = addresses or [None] * count
+    return [make_token_info(rng, address) for address in addresses[:count]]
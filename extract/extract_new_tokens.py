@@ -2,12 +2,19 @@ import random
 from datetime import datetime
 import logging
 from utils.token_filter import token_filter
+from utils.high_water_mark import HighWaterMark
+from utils.json_codec import loads
+from utils.raw_archive import archive_response
+from utils.metrics import HTTP_REQUEST_SECONDS, TOKENS_FETCHED, endpoint
 from utils.scraper_utils import create_scraper
 from utils.logging_utils import setup_logger
 from utils.retry_utils import retry_request
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from utils.tor_utils import TorController
+from utils.tor_utils import TorController, USE_TOR
+from utils.async_http import AsyncFetcher, FetchRequest, GMGN_BASE_URL, HTTP_ENGINE
+import asyncio
 import time
+import os
 
 
 # Configuration
@@ -18,6 +25,10 @@ TOR_PROXY = {
     "https": "socks5://127.0.0.1:9050"
 }
 
+# Proxy for the async engine; set NEW_PAIRS_PROXY="" to connect directly (e.g. to a stub server)
+NEW_PAIRS_PROXY = os.getenv("NEW_PAIRS_PROXY", TOR_PROXY["https"] if USE_TOR else "") or None
+NEW_PAIRS_URL = f"{GMGN_BASE_URL}/defi/quotation/v1/pairs/sol/new_pairs/5m"
+
 LOG_FILE = "scraper.log"
 #TOR_PASSWORD = "tor_poor"  # Change this to your Tor password
 
@@ -43,15 +54,15 @@ ua = type('obj', (object,), {
 # set up scraper
 scraper = create_scraper()
 
+# open_timestamp high-water mark: pairs below it were handled in earlier cycles
+high_water_mark = HighWaterMark()
+
 #set up tor
 tor_controller = TorController()
 
 
-def make_http_request():
-    """Make the actual HTTP request."""
-    tor_controller.renew_connection()  # Rotate Tor IP
-    #logging.info(f"Using Tor IP: {tor_controller.current_ip}")
-
+def build_request_args():
+    """Headers and query params for one new_pairs request (fresh ids each call)."""
     headers = {
         "Accept": "application/json, text/plain, */*",
         "Content-Type": "application/json",
@@ -80,16 +91,27 @@ def make_http_request():
         "direction": "desc",
         "period": "5m"
     }
+    return headers, params
+
+def make_http_request():
+    """Make the actual HTTP request."""
+    tor_controller.renew_connection()  # Rotate Tor IP
+    #logging.info(f"Using Tor IP: {tor_controller.current_ip}")
+
+    headers, params = build_request_args()
 
+    start = time.perf_counter()
+    status = "error"
     try:
         response = scraper.get(
-            "https://gmgn.ai/defi/quotation/v1/pairs/sol/new_pairs/5m",
+            NEW_PAIRS_URL,
             params=params,
             headers=headers,
-            proxies=TOR_PROXY,
+            proxies=TOR_PROXY if USE_TOR else None,
             timeout=30
         )
         
+        status = str(response.status_code)
         logging.info(f"HTTP Status Code: {response.status_code}")
         
         if response.status_code == 403:
@@ -105,25 +127,60 @@ def make_http_request():
         make_http_request.last_success = True
         return {
             "success": True,
-            "data": response.json()
+            "data": loads(response.content)
         }
         
     except Exception as e:
         logging.error(f"Request failed: {str(e)}")
         make_http_request.last_success = False
         return {"success": False, "should_retry": True}
+    finally:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint(NEW_PAIRS_URL), status=status)
+
+async def fetch_new_pairs_async(num_requests=5):
+    """Issue num_requests new_pairs requests concurrently over one pooled session."""
+    requests = []
+    for _ in range(num_requests):
+        headers, params = build_request_args()
+        requests.append(FetchRequest("GET", NEW_PAIRS_URL, params=params, headers=headers))
+
+    async with AsyncFetcher(max_concurrency=num_requests, timeout=30, proxy=NEW_PAIRS_PROXY) as fetcher:
+        results = await fetcher.fetch_all(requests)
+
+    for result in results:
+        if result["success"]:
+            logging.info(f"HTTP Status Code: {result['status']}")
+        else:
+            logging.warning(f"Request failed: {result.get('error')}")
+    make_http_request.last_success = any(result["success"] for result in results)
+    return results
 
 def make_parallel_requests(num_requests=5):
-    """Fetch raw data in parallel (NO FILTERING YET)"""
+    """
+    Fetch raw data in parallel. Only the part of each (newest-first) response
+    above the high-water mark cutoff is kept; no other filtering yet.
+    """
     raw_results = []
-    with ThreadPoolExecutor(max_workers=num_requests) as executor:
-        futures = [executor.submit(make_http_request) for _ in range(num_requests)]
-        for future in as_completed(futures):
-            result = future.result()
-            if result and result.get("success"):
-                json_data = result["data"]
-                if isinstance(json_data, dict) and 'data' in json_data:
-                    raw_results.extend(json_data['data']['pairs'])  # Combine raw data
+    if HTTP_ENGINE == "async":
+        # One Tor circuit per cycle; Tor rate-limits NEWNYM anyway
+        tor_controller.renew_connection()
+        results = asyncio.run(fetch_new_pairs_async(num_requests))
+    else:
+        with ThreadPoolExecutor(max_workers=num_requests) as executor:
+            futures = [executor.submit(make_http_request) for _ in range(num_requests)]
+            results = [future.result() for future in as_completed(futures)]
+
+    received = 0
+    for result in results:
+        if result and result.get("success"):
+            json_data = result["data"]
+            archive_response('new_pairs', json_data)
+            if isinstance(json_data, dict) and 'data' in json_data:
+                pairs = json_data['data']['pairs']
+                received += len(pairs)
+                raw_results.extend(high_water_mark.take_new(pairs))  # Combine raw data
+    TOKENS_FETCHED.inc(received, source='new_pairs')
+    logging.info(f"Kept {len(raw_results)} of {received} pairs at or above the high-water mark cutoff")
     return raw_results
 
 def make_request():
@@ -140,6 +197,7 @@ def make_request():
 
         # Step 2: Filter COMBINED results in one atomic operation
         filtered_tokens = token_filter.filter_new_tokens(all_raw_tokens)  # Thread-safe filtering
+        high_water_mark.advance(all_raw_tokens)
 
         logging.info(f"filtered tokens: {len(filtered_tokens)}")
         
@@ -1,14 +1,22 @@
 #extract_updates.py
-import json
+import os
 import time
+import queue
+import asyncio
+import threading
 import random
 from datetime import datetime
 import cloudscraper
-from fake_useragent import UserAgent
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from utils.query_alive_tokens import get_alive_tokens
+from utils.query_alive_tokens import iter_alive_token_batches
+from utils.async_http import AsyncFetcher, FetchRequest, GMGN_BASE_URL, HTTP_ENGINE, MAX_CONCURRENCY
+from utils.useragent import get_random
+from utils.json_codec import loads, dumps
+from utils.raw_archive import archive_response
+from utils.profiling import profiled
+from utils.metrics import HTTP_REQUEST_SECONDS, HTTP_RETRIES, TOKENS_FETCHED, endpoint
 
 # Configuration
 MAX_REQUESTS_PER_MINUTE = 30  # Conservative rate
@@ -16,7 +24,12 @@ BATCH_SIZE = 10  # Small batches
 RETRY_DELAY = 10  # Base delay between retries
 MAX_RETRIES = 3  # Max retries per batch
 LOG_FILE = "updates_scraper.log"
-PARALLEL_THREADS = 5  # Number of parallel threads
+PARALLEL_THREADS = 5  # Number of parallel threads (HTTP_ENGINE=threads)
+TOKEN_INFO_URL = f"{GMGN_BASE_URL}/api/v1/mutil_window_token_info"
+# Addresses fetched (and, in updates_pipeline, transformed and loaded) together;
+# caps how many token payloads are held in memory at once
+UPDATE_CHUNK_SIZE = int(os.getenv("UPDATE_CHUNK_SIZE", "2000"))
+_END_OF_SWEEP = object()
 
 # Set up logging
 logging.basicConfig(
@@ -45,37 +58,43 @@ def create_scraper():
         }
     )
 
-def make_batch_request(scraper, addresses: List[str], attempt: int = 1) -> Dict[str, Any]:
-    """Make API request with proper headers and payload"""
-    headers = {
+def build_headers(user_agent: str) -> Dict[str, str]:
+    return {
         "Accept": "application/json, text/plain, */*",
         "Content-Type": "application/json",
         "Origin": "https://gmgn.ai",
         "Referer": "https://gmgn.ai/sol/tokens",
-        "User-Agent": UserAgent().random,
+        "User-Agent": user_agent,
         "X-Requested-With": "XMLHttpRequest"
     }
 
+def make_batch_request(scraper, addresses: List[str], attempt: int = 1) -> Dict[str, Any]:
+    """Make API request with proper headers and payload"""
+    headers = build_headers(get_random())
+
     payload = {
         "chain": "sol",
         "addresses": addresses
     }
 
-    try:
-        # Random delay to mimic human behavior
-        time.sleep(random.uniform(0.5, 1.5))
+    # Random delay to mimic human behavior
+    time.sleep(random.uniform(0.5, 1.5))
 
+    start = time.perf_counter()
+    status = "error"
+    try:
         response = scraper.post(
-            "https://gmgn.ai/api/v1/mutil_window_token_info",
+            TOKEN_INFO_URL,
             json=payload,
             headers=headers,
             timeout=45
         )
+        status = str(response.status_code)
 
         if response.status_code == 200:
             return {
                 "success": True,
-                "data": response.json(),
+                "data": loads(response.content),
                 "status": response.status_code
             }
         else:
@@ -92,6 +111,8 @@ def make_batch_request(scraper, addresses: List[str], attempt: int = 1) -> Dict[
             "error": str(e),
             "status": None
         }
+    finally:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint(TOKEN_INFO_URL), status=status)
 
 def process_batch(scraper, addresses: List[str]) -> List[Dict[str, Any]]:
     """Process a single batch with retries"""
@@ -99,6 +120,7 @@ def process_batch(scraper, addresses: List[str]) -> List[Dict[str, Any]]:
         result = make_batch_request(scraper, addresses, attempt)
 
         if result["success"]:
+            archive_response('token_info', result["data"])
             return result["data"]["data"]  # Return the actual token data
 
         logging.warning(f"Attempt {attempt} failed: {result.get('error')}")
@@ -108,43 +130,46 @@ def process_batch(scraper, addresses: List[str]) -> List[Dict[str, Any]]:
             break
 
         if attempt < MAX_RETRIES:
+            HTTP_RETRIES.inc(endpoint=endpoint(TOKEN_INFO_URL))
             sleep_time = RETRY_DELAY * attempt + random.uniform(0, 3)
             logging.info(f"Waiting {sleep_time:.1f}s before retry...")
             time.sleep(sleep_time)
 
     return []  # Return empty list if all attempts failed
 
-def main() -> List[Dict[str, Any]]:
-    """Main processing loop"""
-    # Initialize
-    scraper = create_scraper()
-    addresses = get_alive_tokens()
-
-    if not addresses:
-        logging.error("No token addresses found")
-        return []
+def to_results(batch_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{"address": item["address"], "data": item} for item in batch_data if "address" in item]
 
+def fetch_updates_threaded(address_pages: Iterable[List[str]]) -> List[Dict[str, Any]]:
+    """Blocking cloudscraper requests on PARALLEL_THREADS worker threads."""
+    scraper = create_scraper()
     results = []
-    total_batches = (len(addresses) + BATCH_SIZE - 1) // BATCH_SIZE
 
     def process_single_batch(batch_num: int, batch: List[str]) -> List[Dict[str, Any]]:
         """Helper function to process a single batch"""
-        logging.info(f"Processing batch {batch_num + 1}/{total_batches} ({len(batch)} tokens)")
+        logging.info(f"Processing batch {batch_num + 1} ({len(batch)} tokens)")
         batch_data = process_batch(scraper, batch)
         if batch_data:
             logging.info(f"Added {len(batch_data)} items from batch")
-            return [{"address": item["address"], "data": item} for item in batch_data if "address" in item]
+            return to_results(batch_data)
         else:
             logging.warning(f"Batch {batch_num + 1} failed completely")
             return []
 
-    # Parallel processing with ThreadPoolExecutor
+    # Parallel processing with ThreadPoolExecutor; batches are submitted as
+    # each page of addresses arrives from the database
+    total_addresses = 0
     with ThreadPoolExecutor(max_workers=PARALLEL_THREADS) as executor:
         futures = []
-        for batch_num in range(total_batches):
-            start_idx = batch_num * BATCH_SIZE
-            batch = addresses[start_idx:start_idx + BATCH_SIZE]
-            futures.append(executor.submit(process_single_batch, batch_num, batch))
+        for page in address_pages:
+            for start_idx in range(0, len(page), BATCH_SIZE):
+                batch = page[start_idx:start_idx + BATCH_SIZE]
+                futures.append(executor.submit(process_single_batch, len(futures), batch))
+            total_addresses += len(page)
+
+        if not total_addresses:
+            logging.error("No token addresses found")
+            return []
 
         # Collect results as they complete
         for future in as_completed(futures):
@@ -153,54 +178,209 @@ def main() -> List[Dict[str, Any]]:
             except Exception as e:
                 logging.error(f"Error processing batch: {e}")
 
-    logging.info(f"Completed with {len(results)} successful updates")
+    logging.info(f"Completed with {len(results)} successful updates from {total_addresses} tokens in {len(futures)} batches")
     return results
 
-def save_results_to_file(results: List[Dict[str, Any]], filename: str = "scraped_results.json"):
-    """Save the scraped results to a JSON file"""
-    try:
-        with open(filename, "w") as f:
-            json.dump(results, f, indent=4)
-        logging.info(f"Saved {len(results)} results to {filename}")
-    except Exception as e:
-        logging.error(f"Failed to save results to file: {e}")
+async def fetch_updates_async(address_pages: Iterable[List[str]],
+                              max_concurrency: int = MAX_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Same sweep on the asyncio engine: up to max_concurrency requests in flight
+    over one keep-alive session. Pages are read from the (blocking) iterator in
+    a worker thread so requests for earlier pages keep running meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    pages = iter(address_pages)
+    results = []
+    total_addresses = 0
 
-def filter_irrelevant_tokens(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Filter out irrelevant tokens based on specific criteria"""
-    filtered_results = [
-        result for result in results
-        if result.get("data", {}).get("volume") > 0  # Example: Keep only tokens with non-zero volume
-    ]
-    logging.info(f"Filtered {len(filtered_results)} relevant tokens from {len(results)} total tokens")
-    return filtered_results
+    async with AsyncFetcher(max_concurrency=max_concurrency, max_retries=MAX_RETRIES,
+                            retry_delay=RETRY_DELAY, jitter=(0.5, 1.5)) as fetcher:
+        tasks = []
+        while True:
+            page = await loop.run_in_executor(None, next, pages, None)
+            if page is None:
+                break
+            for start_idx in range(0, len(page), BATCH_SIZE):
+                batch = page[start_idx:start_idx + BATCH_SIZE]
+                tasks.append(fetcher.submit(FetchRequest(
+                    "POST", TOKEN_INFO_URL, json={"chain": "sol", "addresses": batch},
+                    headers=build_headers(get_random())
+                )))
+            total_addresses += len(page)
 
-def send_updates_to_api(filtered_results: List[Dict[str, Any]]):
-    """Send filtered updates to an external API or database"""
-    # Example: Send each token update to an API endpoint
-    scraper = create_scraper()
-    for token in filtered_results:
-        try:
-            response = scraper.post(
-                "https://example.com/api/update_token",
-                json=token["data"],
-                timeout=30
-            )
-            if response.status_code == 200:
-                logging.info(f"Successfully updated token: {token['address']}")
+        if not total_addresses:
+            logging.error("No token addresses found")
+            return []
+
+        for batch_num, result in enumerate(await asyncio.gather(*tasks)):
+            if result["success"]:
+                archive_response('token_info', result["data"])
+                results.extend(to_results(result["data"]["data"]))
             else:
-                logging.warning(f"Failed to update token {token['address']}: HTTP {response.status_code}")
-        except Exception as e:
-            logging.error(f"Error updating token {token['address']}: {e}")
+                logging.warning(f"Batch {batch_num + 1} failed completely: {result.get('error')}")
 
-if __name__ == "__main__":
-    # Step 1: Scrape data
-    scraped_data = main()
+    logging.info(f"Completed with {len(results)} successful updates from {total_addresses} tokens in {len(tasks)} batches")
+    return results
 
-    # Step 2: Save results to file
-    save_results_to_file(scraped_data)
+def fetch_updates(address_pages: Iterable[List[str]]) -> List[Dict[str, Any]]:
+    """Fetch token info for every address, using the engine selected by HTTP_ENGINE."""
+    if HTTP_ENGINE == "async":
+        results = asyncio.run(fetch_updates_async(address_pages))
+    else:
+        results = fetch_updates_threaded(address_pages)
+    TOKENS_FETCHED.inc(len(results), source='token_info')
+    return results
+
+def main(address_pages: Iterable[List[str]] = None) -> List[Dict[str, Any]]:
+    """Main processing loop; sweeps every alive token unless address_pages is given"""
+    if address_pages is None:
+        address_pages = iter_alive_token_batches()
+    with profiled('extract_updates'):
+        return fetch_updates(address_pages)
+
+def chunk_addresses(address_pages: Iterable[List[str]], chunk_size: int) -> Iterator[List[str]]:
+    """Regroups address pages into lists of at most chunk_size addresses."""
+    chunk = []
+    for page in address_pages:
+        for address in page:
+            chunk.append(address)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+async def stream_updates_async(address_pages: Iterable[List[str]], chunk_size: int, emit, stop: threading.Event,
+                               max_concurrency: int = MAX_CONCURRENCY):
+    """
+    Sliding-window sweep behind iter_update_chunks: keeps about one chunk of
+    batches submitted (at least 2 * max_concurrency, so the jitter sleeps of
+    waiting batches overlap the requests in flight; a submitted batch holds no
+    payload until it completes), collects them as they finish and
+    hands emit() an (addresses, results) chunk every time chunk_size addresses
+    have completed. emit() blocks while the consumer is behind; requests
+    already in flight keep running meanwhile, so no chunk waits on the
+    slowest batch of the one before it.
+    """
+    loop = asyncio.get_running_loop()
+    pages = iter(address_pages)
+    pending = {}
+    buffer = []
+    exhausted = False
+    chunk, chunk_results = [], []
+    window = max(2 * max_concurrency, chunk_size // BATCH_SIZE)
+
+    async with AsyncFetcher(max_concurrency=max_concurrency, max_retries=MAX_RETRIES,
+                            retry_delay=RETRY_DELAY, jitter=(0.5, 1.5)) as fetcher:
+        while not stop.is_set():
+            while len(pending) < window:
+                if len(buffer) < BATCH_SIZE and not exhausted:
+                    page = await loop.run_in_executor(None, next, pages, None)
+                    if page is None:
+                        exhausted = True
+                    else:
+                        buffer.extend(page)
+                    continue
+                if not buffer:
+                    break
+                batch, buffer = buffer[:BATCH_SIZE], buffer[BATCH_SIZE:]
+                pending[fetcher.submit(FetchRequest(
+                    "POST", TOKEN_INFO_URL, json={"chain": "sol", "addresses": batch},
+                    headers=build_headers(get_random())
+                ))] = batch
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                chunk.extend(pending.pop(task))
+                result = task.result()
+                if result["success"]:
+                    archive_response('token_info', result["data"])
+                    chunk_results.extend(to_results(result["data"]["data"]))
+                else:
+                    logging.warning(f"Batch failed completely: {result.get('error')}")
+            if len(chunk) >= chunk_size:
+                await loop.run_in_executor(None, emit, (chunk, chunk_results))
+                chunk, chunk_results = [], []
+
+        if chunk and not stop.is_set():
+            await loop.run_in_executor(None, emit, (chunk, chunk_results))
+
+def iter_update_chunks(address_pages: Iterable[List[str]] = None,
+                       chunk_size: int = UPDATE_CHUNK_SIZE) -> Iterator[Tuple[List[str], List[Dict[str, Any]]]]:
+    """
+    Same sweep as main(), but yields (addresses, results) one chunk of about
+    chunk_size addresses at a time, in completion order. On the async engine
+    the fetch runs ahead in a background thread by at most one finished chunk
+    (plus the requests in flight), so a caller that is done with each chunk
+    before asking for the next holds roughly three chunks of payloads at once.
+    """
+    if address_pages is None:
+        address_pages = iter_alive_token_batches()
+
+    if HTTP_ENGINE != "async":
+        for addresses in chunk_addresses(address_pages, chunk_size):
+            with profiled('extract_updates'):
+                results = fetch_updates([addresses])
+            yield addresses, results
+        return
+
+    chunks = queue.Queue(maxsize=1)
+    stop = threading.Event()
+
+    def emit(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def produce():
+        try:
+            asyncio.run(stream_updates_async(address_pages, chunk_size, emit, stop))
+        except BaseException as e:
+            emit(e)
+        finally:
+            emit(_END_OF_SWEEP)
 
-    # Step 3: Filter irrelevant tokens
-    filtered_data = filter_irrelevant_tokens(scraped_data)
+    producer = threading.Thread(target=produce, name="updates-extract", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _END_OF_SWEEP:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            TOKENS_FETCHED.inc(len(item[1]), source='token_info')
+            yield item
+    finally:
+        # Also reached when the caller stops early: the producer drops what
+        # is in flight instead of fetching the rest of the sweep
+        stop.set()
+        producer.join()
+
+def save_results_to_file(results: Iterable[Dict[str, Any]], filename: str = "scraped_results.json"):
+    """Save the scraped results to a JSON array file, writing them one at a time"""
+    try:
+        count = 0
+        with open(filename, "wb") as f:
+            f.write(b"[")
+            for result in results:
+                f.write(b",\n" if count else b"\n")
+                f.write(dumps(result, indent=True))
+                count += 1
+            f.write(b"\n]\n")
+        logging.info(f"Saved {count} results to {filename}")
+    except Exception as e:
+        logging.error(f"Failed to save results to file: {e}")
+
+if __name__ == "__main__":
+    # Scrape chunk by chunk and stream the results to file
+    save_results_to_file(
+        result for _, results in iter_update_chunks() for result in results
+    )
 
-    # Step 4: Send updates to an external API
-    send_updates_to_api(filtered_data)
\ No newline at end of file
+    # Writing to the database is done by updates_pipeline.py
\ No newline at end of file
@@ -1,19 +1,30 @@
 from utils.database import get_db_engine
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy import Table, MetaData, inspect
+from utils.table_cache import get_table_schema, invalidate_table_schema
 import pandas as pd
 import logging
+import os
+import time
 import numpy as np
+from utils.columnar import pa
+from utils.pg_copy import copy_source, data_columns
+from utils.snapshot_store import record_snapshots
+from utils.update_scheduler import schedule_new_tokens
+from utils.load_stats import record_load
+from utils.metrics import LOAD_SECONDS
+from utils.token_index import token_index
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 'copy' stages rows with COPY and merges them in one statement; 'insert' uses
+# batched INSERT ... ON CONFLICT. 'copy' falls back to 'insert' if it fails.
+LOAD_METHOD = os.getenv('LOAD_METHOD', 'copy')
+STAGING_TABLE = 'tokens_stage'
+
 def validate_columns(engine):
-    """Check which columns exist in the database table"""
-    insp = inspect(engine)
-    db_columns = insp.get_columns('tokens')
-    return [col['name'] for col in db_columns]
+    """Check which columns exist in the database table (cached, see utils/table_cache.py)"""
+    return get_table_schema(engine, 'tokens').columns
 
 def validate_numeric_columns(df, numeric_cols):
     """
@@ -29,62 +40,146 @@ def validate_numeric_columns(df, numeric_cols):
                 raise ValueError(f"Column '{col}' contains invalid values.")
 
 def batch_upsert(engine, data: list, batch_size: int = 50):
-    """Safe batch upsert with column validation"""
-    valid_columns = validate_columns(engine)
-    filtered_data = [
-        {k: v for k, v in record.items() if k in valid_columns}
-        for record in data
-    ]
-
-    metadata = MetaData()
-    tokens_table = Table('tokens', metadata, autoload_with=engine)
-
-    stmt = insert(tokens_table).values(filtered_data)
-    update_cols = {c.name: stmt.excluded[c.name] for c in tokens_table.columns if c.name != 'address'}
-
-    upsert = stmt.on_conflict_do_update(
-        index_elements=['address'],
-        set_=update_cols
-    )
+    """Safe batch upsert with column validation; unchanged rows are skipped"""
+    schema = get_table_schema(engine, 'tokens')
+    filtered_data = schema.project(data)
 
+    written = 0
     with engine.begin() as conn:
         for i in range(0, len(filtered_data), batch_size):
             batch = filtered_data[i:i + batch_size]
             try:
-                conn.execute(upsert, batch)
+                # Rows left alone by the unchanged-row guard are not counted
+                written += conn.execute(schema.upsert, batch).rowcount
                 logger.info(f"Inserted batch {i//batch_size + 1}")
             except Exception as e:
                 logger.error(f"Batch {i//batch_size + 1} failed: {str(e)}")
                 raise
 
-def load_data(df):
-    """Main load function with proper error handling"""
+    skipped = len(filtered_data) - written
+    record_load('tokens', updated=written, skipped=skipped)
+    logger.info(f"Upserted {written} rows, skipped {skipped} unchanged")
+
+def copy_upsert(engine, data):
+    """
+    Bulk upsert through a temporary staging table: COPY the rows in, then merge
+    them into tokens with a single INSERT ... SELECT ... ON CONFLICT (address).
+
+    Same semantics as batch_upsert: every column except address is taken from
+    the incoming row (columns it lacks get their default), and when an address
+    appears more than once the last row wins. Existing rows whose values are
+    all unchanged are not rewritten.
+    """
+    valid_columns = validate_columns(engine)
+    present = set(data_columns(data))
+    columns = [col for col in valid_columns if col in present]
+    if not columns or not len(data):
+        return
+
+    quoted = ', '.join(f'"{col}"' for col in valid_columns)
+    copy_columns = ', '.join(f'"{col}"' for col in columns)
+    value_columns = [col for col in valid_columns if col != 'address']
+    updates = ', '.join(f'"{col}" = EXCLUDED."{col}"' for col in value_columns)
+    changed = ' OR '.join(f'tokens."{col}" IS DISTINCT FROM EXCLUDED."{col}"' for col in value_columns)
+
+    with engine.begin() as conn:
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(f"CREATE TEMP TABLE {STAGING_TABLE} (LIKE tokens INCLUDING DEFAULTS) ON COMMIT DROP")
+            cursor.execute(f"ALTER TABLE {STAGING_TABLE} ADD COLUMN stage_ord BIGSERIAL")
+            cursor.copy_expert(
+                f"COPY {STAGING_TABLE} ({copy_columns}) FROM STDIN WITH (FORMAT csv)",
+                copy_source(data, columns)
+            )
+            cursor.execute(f"""
+                WITH merged AS (
+                    INSERT INTO tokens ({quoted})
+                    SELECT DISTINCT ON (address) {quoted}
+                    FROM {STAGING_TABLE}
+                    ORDER BY address, stage_ord DESC
+                    ON CONFLICT (address) DO UPDATE SET {updates}
+                    WHERE {changed}
+                    RETURNING xmax = 0 AS inserted
+                )
+                SELECT
+                    count(*) FILTER (WHERE inserted),
+                    count(*) FILTER (WHERE NOT inserted),
+                    (SELECT count(DISTINCT address) FROM {STAGING_TABLE}) - count(*)
+                FROM merged
+            """)
+            inserted, updated, skipped = cursor.fetchone()
+            record_load('tokens', inserted, updated, skipped)
+            logger.info(f"Upserted via COPY: {inserted} inserted, {updated} updated, {skipped} unchanged skipped")
+        finally:
+            cursor.close()
+
+def load_data(df, method=None, engine=None):
+    """
+    Main load function with proper error handling.
+    Accepts the DataFrame from transform_new_tokens, or the pyarrow Table it
+    returns in columnar mode. method is 'copy' or 'insert' (default LOAD_METHOD);
+    engine defaults to the shared get_db_engine().
+    """
+    method = method or LOAD_METHOD
     # Log the transformed DataFrame for debugging
     logging.info("╔════════════════════════════════════════════╗")
     logging.info("║             LOADING PHASE                  ║")
     logging.info("╚════════════════════════════════════════════╝\n")
-    logger.debug(df.head().to_dict(orient='records'))
-    
-    # List of numeric columns to validate
-    numeric_cols = [
-        'price', 'liquidity', 'market_cap', 'volume', 'total_supply', 'holder_count',
-        'burn_ratio', 'top_10_holder_rate', 'rug_ratio', 'creator_balance_rate',
-        'rat_trader_amount_rate', 'bluechip_owner_percentage', 'swaps', 'buys', 'sells',
-        'dev_token_burn_amount', 'dev_token_burn_ratio', 'price_change_1m', 'price_change_5m', 'price_change_1h'
-    ]
-    
-    # Validate numeric columns
-    validate_numeric_columns(df, numeric_cols)
-    
-    # Replace NaN with None
-    data = df.replace({np.nan: None}).to_dict('records')
+
+    is_table = pa is not None and isinstance(df, pa.Table)
+    if is_table:
+        logger.debug(df.slice(0, 5).to_pylist())
+    else:
+        logger.debug(df.head().to_dict(orient='records'))
+        
+        # List of numeric columns to validate
+        numeric_cols = [
+            'price', 'liquidity', 'market_cap', 'volume', 'total_supply', 'holder_count',
+            'burn_ratio', 'top_10_holder_rate', 'rug_ratio', 'creator_balance_rate',
+            'rat_trader_amount_rate', 'bluechip_owner_percentage', 'swaps', 'buys', 'sells',
+            'dev_token_burn_amount', 'dev_token_burn_ratio', 'price_change_1m', 'price_change_5m', 'price_change_1h'
+        ]
+        
+        # Validate numeric columns
+        validate_numeric_columns(df, numeric_cols)
+
+    def as_records():
+        if is_table:
+            # Arrow columns are already typed and use real nulls, no cleanup needed
+            return df.to_pylist()
+        # Replace NaN with None
+        return df.replace({np.nan: None}).to_dict('records')
     
     # Get database engine
-    engine = get_db_engine()
+    engine = engine or get_db_engine()
     
+    start = time.perf_counter()
     try:
-        batch_upsert(engine, data)
-        logger.info(f"Successfully loaded {len(data)} records")
+        if method == 'copy':
+            try:
+                copy_upsert(engine, df)
+            except Exception as e:
+                logger.warning(f"COPY upsert failed, falling back to batch insert: {str(e)}")
+                invalidate_table_schema('tokens')
+                batch_upsert(engine, as_records())
+        else:
+            batch_upsert(engine, as_records())
+        LOAD_SECONDS.observe(time.perf_counter() - start, table='tokens', method=method)
+        logger.info(f"Successfully loaded {len(df)} records")
     except Exception as e:
         logger.error(f"Load failed: {str(e)}")
-        raise
\ No newline at end of file
+        # The table may have changed under us; reflect it again next time
+        invalidate_table_schema('tokens')
+        raise
+
+    token_index.record_loaded(df, upsert=True)
+
+    # Append the same batch to the metric history
+    record_snapshots(engine, df, 'new_pairs')
+
+    # Queue the new tokens for their first refresh
+    try:
+        addresses = df.column('address').to_pylist() if is_table else df['address'].tolist()
+        schedule_new_tokens(engine, addresses)
+    except Exception as e:
+        logger.warning(f"Failed to schedule new tokens for updates: {str(e)}")
\ No newline at end of file
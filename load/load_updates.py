@@ -0,0 +1,150 @@
+from utils.database import get_db_engine
+from utils.table_cache import get_table_schema, invalidate_table_schema
+from load.load_new_tokens import LOAD_METHOD, validate_columns
+from utils.pg_copy import copy_source, data_columns
+from utils.snapshot_store import record_snapshots
+from utils.load_stats import record_load
+from utils.metrics import LOAD_SECONDS
+from utils.token_index import token_index
+from sqlalchemy import bindparam, func, and_, or_
+import time
+import logging
+import numpy as np
+from utils.columnar import pa
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+UPDATES_STAGING_TABLE = 'tokens_update_stage'
+
+def _update_columns(engine, data):
+    """Columns of data that exist in tokens, address first."""
+    valid_columns = validate_columns(engine)
+    present = set(data_columns(data))
+    if 'address' not in present:
+        raise ValueError("Update batch has no 'address' column")
+    return ['address'] + [col for col in valid_columns if col in present and col != 'address']
+
+def copy_update(engine, data):
+    """
+    Applies a batch of token updates with two statements: COPY the rows into a
+    temporary staging table, then one UPDATE tokens ... FROM the staged rows.
+
+    Only existing tokens are touched (updates never create rows). A NULL in the
+    batch keeps the stored value, so a partial API response cannot wipe a
+    column. When an address appears more than once the last row wins. Tokens
+    whose values would not change are skipped instead of rewritten.
+    """
+    columns = _update_columns(engine, data)
+    if len(columns) < 2 or not len(data):
+        return 0
+
+    copy_columns = ', '.join(f'"{col}"' for col in columns)
+    assignments = ', '.join(f'"{col}" = COALESCE(s."{col}", t."{col}")' for col in columns[1:])
+    # A NULL keeps the stored value, so it never counts as a change
+    changed = ' OR '.join(f'(s."{col}" IS NOT NULL AND s."{col}" IS DISTINCT FROM t."{col}")' for col in columns[1:])
+
+    with engine.begin() as conn:
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(f"CREATE TEMP TABLE {UPDATES_STAGING_TABLE} (LIKE tokens) ON COMMIT DROP")
+            cursor.execute(f"ALTER TABLE {UPDATES_STAGING_TABLE} ADD COLUMN stage_ord BIGSERIAL")
+            cursor.copy_expert(
+                f"COPY {UPDATES_STAGING_TABLE} ({copy_columns}) FROM STDIN WITH (FORMAT csv)",
+                copy_source(data, columns)
+            )
+            cursor.execute(f"""
+                WITH s AS (
+                    SELECT DISTINCT ON (address) {copy_columns}
+                    FROM {UPDATES_STAGING_TABLE}
+                    ORDER BY address, stage_ord DESC
+                ), updated AS (
+                    UPDATE tokens t SET {assignments}
+                    FROM s
+                    WHERE t.address = s.address AND ({changed})
+                    RETURNING 1
+                )
+                SELECT (SELECT count(*) FROM updated),
+                       (SELECT count(*) FROM s JOIN tokens t ON t.address = s.address)
+            """)
+            updated, matched = cursor.fetchone()
+        finally:
+            cursor.close()
+
+    record_load('tokens', updated=updated, skipped=matched - updated)
+    logger.info(f"Updated {updated} tokens via COPY, skipped {matched - updated} unchanged")
+    return updated
+
+def batch_update(engine, records: list, batch_size: int = 500):
+    """
+    Fallback: executemany of one UPDATE statement, with the same NULL-keeps-value
+    rule and unchanged-row guard. Skipped counts include unknown addresses.
+    """
+    schema = get_table_schema(engine, 'tokens')
+    records = schema.project(records)
+    if not records:
+        return 0
+    columns = [col for col in records[0] if col != 'address']
+
+    table = schema.table
+    params = {col: bindparam(f'b_{col}', type_=table.c[col].type) for col in columns}
+    stmt = table.update().where(and_(
+        table.c.address == bindparam('b_address'),
+        or_(*[and_(params[col].isnot(None), params[col].is_distinct_from(table.c[col])) for col in columns])
+    )).values({col: func.coalesce(params[col], table.c[col]) for col in columns})
+
+    updated = 0
+    with engine.begin() as conn:
+        for i in range(0, len(records), batch_size):
+            batch = [{f'b_{k}': v for k, v in record.items()} for record in records[i:i + batch_size]]
+            updated += conn.execute(stmt, batch).rowcount
+    record_load('tokens', updated=updated, skipped=len(records) - updated)
+    logger.info(f"Updated {updated} tokens via batched UPDATE, skipped {len(records) - updated}")
+    return updated
+
+def load_updates(df, method=None):
+    """
+    Writes the output of transform_updates (DataFrame or pyarrow Table) to
+    tokens. method is 'copy' or 'insert' (default LOAD_METHOD); 'copy' falls
+    back to batched UPDATEs if it fails.
+    """
+    method = method or LOAD_METHOD
+    logging.info("╔════════════════════════════════════════════╗")
+    logging.info("║           UPDATES LOADING PHASE            ║")
+    logging.info("╚════════════════════════════════════════════╝\n")
+
+    if not len(df):
+        logger.info("No token updates to load")
+        return 0
+
+    is_table = pa is not None and isinstance(df, pa.Table)
+
+    def as_records():
+        if is_table:
+            return df.to_pylist()
+        return df.replace({np.nan: None}).to_dict('records')
+
+    engine = get_db_engine()
+    start = time.perf_counter()
+    try:
+        if method == 'copy':
+            try:
+                updated = copy_update(engine, df)
+            except Exception as e:
+                logger.warning(f"COPY update failed, falling back to batched UPDATE: {str(e)}")
+                invalidate_table_schema('tokens')
+                updated = batch_update(engine, as_records())
+        else:
+            updated = batch_update(engine, as_records())
+        LOAD_SECONDS.observe(time.perf_counter() - start, table='tokens', method=method)
+    except Exception as e:
+        logger.error(f"Updates load failed: {str(e)}")
+        invalidate_table_schema('tokens')
+        raise
+
+    token_index.record_loaded(df, upsert=False)
+
+    # Append the same batch to the metric history
+    record_snapshots(engine, df, 'updates')
+    return updated
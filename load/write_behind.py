@@ -0,0 +1,199 @@
+# load/write_behind.py
+# Write-behind loading for the new-pairs pipeline: transformed batches are
+# handed to a bounded queue and written by a loader thread with its own
+# database connection, so extraction no longer waits for Postgres to commit.
+# Batches that arrive close together (up to WRITE_BEHIND_MAX_ROWS rows or
+# WRITE_BEHIND_MAX_DELAY seconds after the first) are merged and written in
+# one group commit. Transient database errors (lost connection, deadlock,
+# serialization failure) are retried with exponential backoff; a group that
+# still fails is retried batch by batch, so one bad batch cannot take the
+# others with it. close() (also run at exit) writes everything queued first.
+import time
+import queue
+import atexit
+import random
+import logging
+import os
+import threading
+from collections import namedtuple
+import pandas as pd
+from sqlalchemy import exc
+from load.load_new_tokens import load_data
+from utils.columnar import pa
+from utils.database import create_db_engine
+from utils.metrics import (STAGE_ERRORS, WRITE_BEHIND_DROPPED, WRITE_BEHIND_GROUP_SIZE, WRITE_BEHIND_QUEUE_DEPTH,
+                           WRITE_BEHIND_RETRIES)
+
+WRITE_BEHIND_QUEUE_SIZE = int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", "8"))  # Batches buffered before submit() blocks
+WRITE_BEHIND_MAX_ROWS = int(os.getenv("WRITE_BEHIND_MAX_ROWS", "5000"))  # Rows per group commit
+WRITE_BEHIND_MAX_DELAY = float(os.getenv("WRITE_BEHIND_MAX_DELAY", "2"))  # Seconds a batch waits for others
+WRITE_BEHIND_ATTEMPTS = int(os.getenv("WRITE_BEHIND_ATTEMPTS", "5"))  # Tries per commit on transient errors
+WRITE_BEHIND_RETRY_DELAY = 1.0  # Seconds before the first retry, doubled after each one
+WRITE_BEHIND_RETRY_MAX_DELAY = 30.0
+SUBMIT_WARN_INTERVAL = 5  # Seconds between "loader is behind" warnings while submit() blocks
+
+_Batch = namedtuple('_Batch', ['data', 'on_loaded'])
+_STOP = object()  # Queue sentinel: write what is queued, then exit
+
+
+def is_transient(error):
+    """Errors worth retrying: the connection or the transaction failed, not the data."""
+    if isinstance(error, (exc.OperationalError, exc.InterfaceError)):
+        return True
+    if isinstance(error, exc.DBAPIError) and error.connection_invalidated:
+        return True
+    # copy_upsert talks to the raw psycopg2 cursor, whose errors SQLAlchemy does not wrap
+    return type(error).__name__ in ('OperationalError', 'InterfaceError') and \
+        type(error).__module__.startswith('psycopg2')
+
+
+def concat_batches(batches):
+    """One DataFrame / Arrow table from several of the same kind, in order."""
+    if len(batches) == 1:
+        return batches[0]
+    if pa is not None and isinstance(batches[0], pa.Table):
+        return pa.concat_tables(batches)
+    return pd.concat(batches, ignore_index=True)
+
+
+class WriteBehindLoader:
+    """
+    Loads batches on a background thread. submit() returns once the batch is
+    queued; on_loaded, if given, is called from the loader thread after the
+    batch is committed.
+    """
+
+    def __init__(self, name, load=load_data, queue_size=WRITE_BEHIND_QUEUE_SIZE,
+                 max_rows=WRITE_BEHIND_MAX_ROWS, max_delay=WRITE_BEHIND_MAX_DELAY, attempts=WRITE_BEHIND_ATTEMPTS):
+        self.name = name
+        self.load = load
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.attempts = attempts
+        self.engine = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._close_lock = threading.Lock()
+        # Daemon so interpreter shutdown reaches the atexit close(), which flushes it
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{name}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, data, on_loaded=None):
+        """Queue one batch, blocking while the queue is full."""
+        if self._closed:
+            raise RuntimeError(f"Write-behind loader {self.name} is closed")
+        if not len(data):
+            return
+        batch = _Batch(data, on_loaded)
+        while True:
+            try:
+                self._queue.put(batch, timeout=SUBMIT_WARN_INTERVAL)
+                break
+            except queue.Full:
+                logging.warning(f"Write-behind loader {self.name} is behind "
+                                f"({self._queue.qsize()} batches queued), waiting...")
+        WRITE_BEHIND_QUEUE_DEPTH.set(self._queue.qsize(), loader=self.name)
+
+    def flush(self):
+        """Block until every batch submitted so far has been written or given up on."""
+        self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the loader thread."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        atexit.unregister(self.close)
+        pending = self._queue.qsize()
+        if pending:
+            logging.info(f"Write-behind loader {self.name}: writing {pending} queued batches before exit...")
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self.engine is not None:
+            self.engine.dispose()
+
+    def _run(self):
+        while True:
+            group, stop = self._next_group()
+            if group:
+                try:
+                    self._commit(group)
+                finally:
+                    for _ in group:
+                        self._queue.task_done()
+                    WRITE_BEHIND_QUEUE_DEPTH.set(self._queue.qsize(), loader=self.name)
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _next_group(self):
+        """([batches], stop): the next batch plus whatever joins it within the window."""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        group = [first]
+        rows = len(first.data)
+        deadline = time.monotonic() + self.max_delay
+        while rows < self.max_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if batch is _STOP:
+                return group, True
+            group.append(batch)
+            rows += len(batch.data)
+        return group, False
+
+    def _commit(self, group):
+        WRITE_BEHIND_GROUP_SIZE.observe(len(group), loader=self.name)
+        try:
+            self._load_with_retry(concat_batches([batch.data for batch in group]))
+            loaded = group
+        except Exception as e:
+            if len(group) == 1:
+                self._drop(group[0], e)
+                return
+            logging.warning(f"Group commit of {len(group)} batches failed, writing them one by one: {str(e)}")
+            loaded = []
+            for batch in group:
+                try:
+                    self._load_with_retry(batch.data)
+                    loaded.append(batch)
+                except Exception as e:
+                    self._drop(batch, e)
+
+        for batch in loaded:
+            if batch.on_loaded is not None:
+                try:
+                    batch.on_loaded()
+                except Exception as e:
+                    logging.error(f"Write-behind callback failed: {str(e)}", exc_info=True)
+
+    def _load_with_retry(self, data):
+        if self.engine is None:
+            # One connection of its own, checked before use so a restarted
+            # server costs a reconnect instead of a failed commit
+            self.engine = create_db_engine(pool_size=1, max_overflow=0, pool_pre_ping=True)
+        for attempt in range(1, self.attempts + 1):
+            try:
+                self.load(data, engine=self.engine)
+                return
+            except Exception as e:
+                if not is_transient(e) or attempt == self.attempts:
+                    raise
+                WRITE_BEHIND_RETRIES.inc(loader=self.name)
+                delay = min(WRITE_BEHIND_RETRY_MAX_DELAY, WRITE_BEHIND_RETRY_DELAY * 2 ** (attempt - 1))
+                delay += random.uniform(0, delay / 2)
+                logging.warning(f"Write-behind commit attempt {attempt} failed, retrying in {delay:.1f}s: {str(e)}")
+                time.sleep(delay)
+
+    def _drop(self, batch, error):
+        logging.error(f"Write-behind loader {self.name} dropped a batch of {len(batch.data)} rows: {str(error)}")
+        WRITE_BEHIND_DROPPED.inc(loader=self.name)
+        STAGE_ERRORS.inc(pipeline=self.name, stage='load')
@@ -1,12 +1,17 @@
 import time
+import queue
 import random
 import logging
 import os
+import threading
 from dotenv import load_dotenv
 from utils.tor_utils import TorController
 from extract.extract_new_tokens import make_request
 from transform.transform_new_tokens import transform_new_tokens
 from load.load_new_tokens import load_data
+from load.write_behind import WriteBehindLoader
+from utils.profiling import profiled
+from utils.metrics import CYCLE_SECONDS, STAGE_ERRORS, observe_transform, start_metrics_server, write_textfile
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -15,6 +20,24 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Build Arrow tables instead of object DataFrames in the transform stage
+COLUMNAR_TRANSFORM = os.getenv("COLUMNAR_TRANSFORM", "false").lower() in ("1", "true", "yes")
+
+# 'serial' runs extract -> transform -> load -> sleep; 'staged' runs the three
+# stages in their own threads joined by bounded queues
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "serial")
+STAGE_QUEUE_SIZE = int(os.getenv("STAGE_QUEUE_SIZE", "2"))  # Batches buffered between stages
+STAGE_PUT_TIMEOUT = 5  # Seconds between "stage is behind" warnings while blocked
+_STOP = object()  # Queue sentinel: no more batches
+# Random pause between extraction cycles, in seconds; lower it (e.g. to 0)
+# to run against the stub server faster than real time
+CYCLE_DELAY_MIN = float(os.getenv("CYCLE_DELAY_MIN", "5"))
+CYCLE_DELAY_MAX = float(os.getenv("CYCLE_DELAY_MAX", "15"))
+# Hand transformed batches to a loader thread that group-commits them
+# (load/write_behind.py) instead of writing them inside the cycle
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+write_behind = None  # WriteBehindLoader while a pipeline runs with WRITE_BEHIND
+
 # Initialize TorController
 #TOR_PASSWORD = os.getenv("TOR_PASSWORD")  # Ensure this is set in your .env file
 tor_controller = TorController()
@@ -34,17 +57,61 @@ def extract_new_tokens():
         logger.warning("No new tokens found.")
     return raw_data
 
-def transform_and_load_new_tokens(raw_data):
+def log_detection_latency(raw_data):
+    """Seconds from each pair's open_timestamp until its row was written."""
+    now = time.time()
+    latencies = sorted(
+        now - pair["open_timestamp"] for pair in raw_data["data"]["pairs"]
+        if isinstance(pair.get("open_timestamp"), (int, float))
+    )
+    if latencies:
+        logger.info(f"Detection latency: p50 {latencies[len(latencies) // 2]:.1f}s, "
+                    f"max {latencies[-1]:.1f}s over {len(latencies)} tokens")
+
+def batch_loaded(cycle_start, raw_data):
+    log_detection_latency(raw_data)
+    # From the start of the extract to the end of the load of this batch
+    CYCLE_SECONDS.observe(time.time() - cycle_start, pipeline='new_pairs')
+
+def load(cycle_start, raw_data, df):
+    """Writes one batch, or queues it for the write-behind loader."""
+    if write_behind is not None:
+        write_behind.submit(df, on_loaded=lambda: batch_loaded(cycle_start, raw_data))
+    else:
+        load_data(df)
+        batch_loaded(cycle_start, raw_data)
+
+def start_write_behind():
+    global write_behind
+    if WRITE_BEHIND and write_behind is None:
+        write_behind = WriteBehindLoader('new_pairs')
+
+def stop_write_behind():
+    """Writes the batches still queued for the loader, then stops it."""
+    global write_behind
+    if write_behind is not None:
+        write_behind.close()
+        write_behind = None
+
+def transform(raw_data):
+    start = time.perf_counter()
+    df = transform_new_tokens(raw_data, columnar=COLUMNAR_TRANSFORM)
+    observe_transform('new_pairs', len(df), time.perf_counter() - start)
+    return df
+
+def transform_and_load_new_tokens(raw_data, cycle_start):
     """Transform and load new tokens."""
     if raw_data:
         logger.info("Transforming new tokens...")
-        df = transform_new_tokens(raw_data)
+        df = transform(raw_data)
         logger.info("Loading new tokens...")
-        load_data(df)
+        load(cycle_start, raw_data, df)
 
 def run_pipeline():
     """Orchestrates the ETL pipeline for new tokens."""
     verify_tor_connection()
+    start_metrics_server()
+    start_write_behind()
     
     while True:
 
@@ -55,15 +122,17 @@ def run_pipeline():
             logging.info("  ✧･ﾟ: *✧･ﾟ:*  STARTING NEW LOOP  *:･ﾟ✧*:･ﾟ✧")
             logging.info("  ☆.。.:*・°☆.。.:*・°☆.。.:*・°☆.。.:*")
             logging.info("\n")
-            # Extract new tokens
-            raw_data = extract_new_tokens()
-            
-            # Transform and load new tokens
-            transform_and_load_new_tokens(raw_data)
+            with profiled('new_pairs_cycle'):
+                # Extract new tokens
+                raw_data = extract_new_tokens()
+
+                # Transform and load new tokens
+                transform_and_load_new_tokens(raw_data, loop_start_time)
+            write_textfile()
             
             # Random delay between cycles
             logger.info("Sleeping for next cycle...")
-            time.sleep(random.uniform(5, 15))
+            time.sleep(random.uniform(CYCLE_DELAY_MIN, CYCLE_DELAY_MAX))
 
             loop_duration = time.time() - loop_start_time
 
@@ -78,9 +147,107 @@ def run_pipeline():
             break
         except Exception as e:
             logger.error(f"Error in pipeline: {str(e)}", exc_info=True)
+            STAGE_ERRORS.inc(pipeline='new_pairs', stage='cycle')
+            write_textfile()
             # Attempt to renew Tor connection on error
             tor_controller.renew_connection()
             time.sleep(10)
 
+    stop_write_behind()
+    write_textfile()
+
+def put_with_backpressure(stage_queue, item, stage_name):
+    """Block until the next stage has room, warning while it is behind."""
+    while True:
+        try:
+            stage_queue.put(item, timeout=STAGE_PUT_TIMEOUT)
+            return
+        except queue.Full:
+            logger.warning(f"{stage_name} stage is behind ({stage_queue.qsize()} batches queued), waiting...")
+
+def transform_worker(raw_queue, load_queue):
+    """Transform stage: raw API payloads in, DataFrames / Arrow tables out."""
+    while True:
+        item = raw_queue.get()
+        if item is _STOP:
+            put_with_backpressure(load_queue, _STOP, "Load")
+            return
+        cycle_start, raw_data = item
+        try:
+            logger.info("Transforming new tokens...")
+            with profiled('transform'):
+                df = transform(raw_data)
+            put_with_backpressure(load_queue, (cycle_start, raw_data, df), "Load")
+        except Exception as e:
+            logger.error(f"Error in transform stage: {str(e)}", exc_info=True)
+            STAGE_ERRORS.inc(pipeline='new_pairs', stage='transform')
+
+def load_worker(load_queue):
+    """Load stage: writes each transformed batch in arrival order."""
+    while True:
+        item = load_queue.get()
+        if item is _STOP:
+            return
+        cycle_start, raw_data, df = item
+        try:
+            logger.info(f"Loading new tokens ({load_queue.qsize()} batches waiting)...")
+            with profiled('load'):
+                load(cycle_start, raw_data, df)
+        except Exception as e:
+            logger.error(f"Error in load stage: {str(e)}", exc_info=True)
+            STAGE_ERRORS.inc(pipeline='new_pairs', stage='load')
+        write_textfile()
+
+def run_staged_pipeline():
+    """
+    Extract in the main thread while transform and load run in worker threads.
+    The queues are bounded, so a slow loader eventually blocks extraction
+    instead of buffering without limit. On KeyboardInterrupt, batches already
+    extracted are still loaded before exiting: the token filter has marked
+    them seen, so dropping them would lose those tokens for good.
+    """
+    verify_tor_connection()
+    start_metrics_server()
+    start_write_behind()
+
+    raw_queue = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+    load_queue = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+    workers = [
+        threading.Thread(target=transform_worker, args=(raw_queue, load_queue), name="transform", daemon=True),
+        threading.Thread(target=load_worker, args=(load_queue,), name="load", daemon=True),
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        while True:
+            try:
+                cycle_start = time.time()
+                with profiled('extract'):
+                    raw_data = extract_new_tokens()
+                if raw_data:
+                    put_with_backpressure(raw_queue, (cycle_start, raw_data), "Transform")
+            except Exception as e:
+                logger.error(f"Error in extract stage: {str(e)}", exc_info=True)
+                STAGE_ERRORS.inc(pipeline='new_pairs', stage='extract')
+                tor_controller.renew_connection()
+                time.sleep(10)
+                continue
+
+            logger.info("Sleeping for next cycle...")
+            time.sleep(random.uniform(CYCLE_DELAY_MIN, CYCLE_DELAY_MAX))
+    except KeyboardInterrupt:
+        logger.info("Pipeline stopped by user, finishing queued batches...")
+    finally:
+        put_with_backpressure(raw_queue, _STOP, "Transform")
+        for worker in workers:
+            worker.join()
+        stop_write_behind()
+        write_textfile()
+        logger.info("Pipeline stopped")
+
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    if PIPELINE_MODE == "staged":
+        run_staged_pipeline()
+    else:
+        run_pipeline()
\ No newline at end of file
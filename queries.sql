@@ -69,5 +69,65 @@ CREATE INDEX idx_status ON tokens(status);
 CREATE INDEX idx_platform ON tokens(platform);
 CREATE INDEX idx_status_platform ON tokens(status, platform);
 CREATE INDEX idx_creation_timestamp ON tokens(creation_timestamp);
+-- Keyset pagination in utils/query_alive_tokens.py
+CREATE INDEX idx_status_creation_address ON tokens(status, creation_timestamp DESC, address DESC);
 CREATE INDEX idx_price ON tokens(price);
-CREATE INDEX idx_liquidity ON tokens(liquidity);
\ No newline at end of file
+CREATE INDEX idx_liquidity ON tokens(liquidity);
+
+-- Append-only metric history, one row per token per load (utils/snapshot_store.py).
+-- Partitions (token_snapshots_pYYYYMMDD, or _pYYYYMMDDHH when hourly) are
+-- created ahead of the writes and retired by DROP/DETACH, never DELETE.
+CREATE TABLE token_snapshots (
+    address VARCHAR(64) NOT NULL,
+    captured_at TIMESTAMP NOT NULL,
+    source VARCHAR(20),                 -- 'new_pairs' or 'updates'
+
+    price NUMERIC(30, 18),
+    market_cap NUMERIC(30, 6),
+    liquidity NUMERIC(30, 6),
+    quote_reserve NUMERIC(30, 6),
+    volume NUMERIC(30, 6),
+    swaps INTEGER,
+    buys INTEGER,
+    sells INTEGER,
+    holder_count INTEGER,
+    top_10_holder_rate NUMERIC(15, 6),
+    smart_degen_count INTEGER,
+    sniper_count INTEGER
+) PARTITION BY RANGE (captured_at);
+-- Created on every partition: BRIN for time-window scans, btree for per-token history
+CREATE INDEX idx_snapshots_captured_at ON token_snapshots USING BRIN (captured_at);
+CREATE INDEX idx_snapshots_address_captured_at ON token_snapshots(address, captured_at);
+
+-- Refresh schedule for the updates pipeline (utils/update_scheduler.py).
+-- Kept apart from tokens so new-token upserts never reset it.
+CREATE TABLE token_update_schedule (
+    address VARCHAR(64) PRIMARY KEY,
+    next_due_at TIMESTAMP NOT NULL,
+    interval_seconds INTEGER,
+    last_price NUMERIC(30, 18),        -- Price at the previous update, for volatility
+    last_updated_at TIMESTAMP
+);
+CREATE INDEX idx_schedule_next_due ON token_update_schedule(next_due_at);
+
+-- Change feed for the in-process token index (utils/token_index.py): rows
+-- inserted, deleted or given another status are announced on token_changes,
+-- so a pipeline holding the index sees writes made by other processes.
+-- Attribute-only updates are not announced; the writer's own process keeps
+-- its index current and the others rebuild periodically.
+CREATE OR REPLACE FUNCTION notify_token_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('token_changes', json_build_object('op', TG_OP, 'address', OLD.address)::text);
+        RETURN OLD;
+    END IF;
+    PERFORM pg_notify('token_changes',
+                      json_build_object('op', TG_OP, 'address', NEW.address, 'status', NEW.status)::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tokens_notify_insert_delete AFTER INSERT OR DELETE ON tokens
+    FOR EACH ROW EXECUTE FUNCTION notify_token_change();
+CREATE TRIGGER tokens_notify_status AFTER UPDATE OF status ON tokens
+    FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status) EXECUTE FUNCTION notify_token_change();
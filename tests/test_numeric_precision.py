@@ -0,0 +1,107 @@
+# tests/test_numeric_precision.py
+# Values beyond float64 precision must reach COPY unchanged on both the
+# pandas (Decimal) and the columnar (Arrow decimal) transform paths.
+import csv
+import io
+from decimal import Decimal
+import pytest
+from benchmarks.synthetic import make_new_pairs_payload, make_token_infos
+from transform.transform_new_tokens import transform_new_tokens
+from transform.transform_updates import transform_updates
+from utils import json_codec
+from utils.columnar import pa
+from utils.pg_copy import copy_source
+
+pytestmark = pytest.mark.skipif(pa is None, reason="columnar mode requires pyarrow")
+CODECS = ['stdlib', pytest.param('orjson', marks=pytest.mark.skipif(json_codec.orjson is None,
+                                                                    reason="requires orjson"))]
+
+PRICE = '0.000000000123456789'  # 18 decimals, NUMERIC(30, 18)
+TOTAL_SUPPLY = '123456789012345678901234567890123'  # 33 digits, NUMERIC(40, 0)
+LIQUIDITY = '999999999999999.123456'  # 21 significant digits, NUMERIC(30, 6)
+HOLDER_COUNT = 2147483647  # INTEGER
+COLUMNS = ['price', 'total_supply', 'liquidity', 'holder_count']
+EXPECTED = {'price': Decimal(PRICE), 'total_supply': Decimal(TOTAL_SUPPLY),
+            'liquidity': Decimal(LIQUIDITY), 'holder_count': HOLDER_COUNT}
+
+
+def new_pairs_payload():
+    payload = make_new_pairs_payload(3)
+    info = payload['data']['pairs'][0]['base_token_info']
+    info.update(price=PRICE, total_supply=TOTAL_SUPPLY, liquidity=LIQUIDITY, holder_count=str(HOLDER_COUNT))
+    return payload
+
+
+def token_infos():
+    infos = make_token_infos(3)
+    infos[0].update(total_supply=TOTAL_SUPPLY, liquidity=LIQUIDITY, holder_count=HOLDER_COUNT)
+    infos[0]['price']['price'] = PRICE
+    return [{'address': info['address'], 'data': info} for info in infos]
+
+
+def copied_row(data):
+    """First row of the COPY payload the loaders would send, parsed back."""
+    payload = copy_source(data, COLUMNS).read()
+    if isinstance(payload, bytes):
+        payload = payload.decode()
+    row = next(csv.reader(io.StringIO(payload)))
+    return {col: Decimal(value) for col, value in zip(COLUMNS, row)}
+
+
+def first_row(data):
+    if isinstance(data, pa.Table):
+        return data.slice(0, 1).to_pylist()[0]
+    return data.iloc[0].to_dict()
+
+
+@pytest.mark.parametrize('columnar', [False, True], ids=['pandas', 'columnar'])
+@pytest.mark.parametrize('transform', [
+    lambda columnar: transform_new_tokens(new_pairs_payload(), columnar=columnar),
+    lambda columnar: transform_updates(token_infos(), columnar=columnar),
+], ids=['new_pairs', 'updates'])
+def test_high_precision_values_round_trip(transform, columnar):
+    data = transform(columnar)
+
+    row = first_row(data)
+    assert {col: row[col] for col in COLUMNS} == EXPECTED
+    assert copied_row(data) == EXPECTED
+
+
+def test_columnar_schema_matches_column_types():
+    table = transform_new_tokens(new_pairs_payload(), columnar=True)
+
+    assert table.schema.field('price').type == pa.decimal128(30, 18)
+    assert table.schema.field('total_supply').type == pa.decimal256(40, 0)
+    assert table.schema.field('holder_count').type == pa.int64()
+
+
+def test_columnar_rounds_to_column_scale_like_postgres():
+    payload = make_new_pairs_payload(2)
+    payload['data']['pairs'][0]['base_token_info']['price'] = '0.0000000000000000005'
+    payload['data']['pairs'][1]['base_token_info']['price'] = '-0.0000000000000000015'
+
+    table = transform_new_tokens(payload, columnar=True)
+
+    assert table.column('price').to_pylist() == [Decimal('1E-18'), Decimal('-2E-18')]
+
+
+@pytest.mark.parametrize('codec', CODECS)
+@pytest.mark.parametrize('columnar', [False, True], ids=['pandas', 'columnar'])
+def test_wide_integer_survives_json_decode(monkeypatch, codec, columnar):
+    monkeypatch.setattr(json_codec, 'JSON_CODEC', codec)
+    payload = make_new_pairs_payload(2)
+    payload['data']['pairs'][0]['base_token_info']['total_supply'] = 0  # Replaced by a bare JSON integer
+    body = json_codec.dumps(payload).replace(b'"total_supply":0', b'"total_supply":' + TOTAL_SUPPLY.encode(), 1)
+
+    data = transform_new_tokens(json_codec.loads(body), columnar=columnar)
+
+    assert first_row(data)['total_supply'] == Decimal(TOTAL_SUPPLY)
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_wide_integer_round_trips_through_codec(monkeypatch, codec):
+    monkeypatch.setattr(json_codec, 'JSON_CODEC', codec)
+    value = {'total_supply': int(TOTAL_SUPPLY)}
+
+    assert json_codec.loads(json_codec.dumps(value)) == value
+    assert json_codec.loads(memoryview(json_codec.dumps(value))) == value
@@ -0,0 +1,49 @@
+# tests/test_parallel_transform.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from benchmarks.synthetic import make_new_pairs_payload
+from transform.token_schema import TOKEN_FIELDS
+from utils.columnar import build_arrow_table, pa
+from utils import parallel_transform
+
+pytestmark = pytest.mark.skipif(pa is None, reason="columnar mode requires pyarrow")
+CONSTANTS = {'status': 'alive'}
+
+
+@pytest.fixture
+def py38_shutdown(monkeypatch):
+    """ProcessPoolExecutor.shutdown as on Python 3.8: no cancel_futures."""
+    shutdown = ProcessPoolExecutor.shutdown
+
+    def shutdown_38(self, wait=True):
+        shutdown(self, wait=wait)
+    monkeypatch.setattr(ProcessPoolExecutor, 'shutdown', shutdown_38)
+    yield
+    parallel_transform.shutdown_pool()
+
+
+@pytest.fixture
+def records():
+    return make_new_pairs_payload(40)['data']['pairs']
+
+
+def build(records):
+    return parallel_transform.build_arrow_table_parallel(records, TOKEN_FIELDS, required='address',
+                                                         constants=CONSTANTS, workers=2, min_rows=0)
+
+
+def test_pool_matches_in_process_table(records, py38_shutdown):
+    expected = build_arrow_table(records, TOKEN_FIELDS, required='address', constants=CONSTANTS)
+
+    assert build(records).equals(expected)
+
+
+def test_broken_pool_falls_back_to_in_process(records, py38_shutdown):
+    expected = build_arrow_table(records, TOKEN_FIELDS, required='address', constants=CONSTANTS)
+    pool = parallel_transform._get_pool(2)
+    with pytest.raises(Exception):
+        pool.submit(os._exit, 1).result()  # A worker dies: the pool is broken
+
+    assert build(records).equals(expected)
+    assert parallel_transform._pool is None
@@ -0,0 +1,30 @@
+# tests/test_profiling.py
+import glob
+import tracemalloc
+import pytest
+from utils import profiling
+from utils.profiling import CycleProfiler
+
+
+@pytest.fixture
+def without_reset_peak(monkeypatch):
+    """Python 3.8: tracemalloc has no reset_peak()."""
+    monkeypatch.delattr(tracemalloc, 'reset_peak', raising=False)
+    monkeypatch.setattr(profiling, '_RESET_PEAK', False, raising=False)
+    yield
+    tracemalloc.stop()
+
+
+def test_memory_profile_without_reset_peak(tmp_path, without_reset_peak):
+    profiler = CycleProfiler('test', every=2, directory=str(tmp_path), memory=True)
+
+    for size in (1, 4):
+        with profiler.cycle():
+            held = [bytes(1024) for _ in range(size * 1000)]
+            del held
+
+    [report] = glob.glob(str(tmp_path / 'test-*.txt'))
+    with open(report) as f:
+        text = f.read()
+    assert '2 cycles' in text
+    assert 'Peak traced memory in a cycle: ' in text
@@ -0,0 +1,53 @@
+# tests/test_seen_index.py
+import pytest
+from utils.seen_index import SqliteSeenIndex
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    return str(tmp_path / "seen.sqlite3")
+
+
+def fill(db_file, count, capacity):
+    index = SqliteSeenIndex(db_file, capacity=capacity)
+    index.add_many([f"address-{i}" for i in range(count)])
+    capacity = index.bloom.capacity
+    index.close()
+    return capacity
+
+
+def reopen_without_rebuild(db_file, capacity, monkeypatch):
+    def rebuild(self, capacity):
+        raise AssertionError(f"Bloom filter rebuilt (capacity {capacity})")
+    monkeypatch.setattr(SqliteSeenIndex, '_rebuild_bloom', rebuild)
+    return SqliteSeenIndex(db_file, capacity=capacity)
+
+
+def test_restart_past_half_capacity_reuses_saved_filter(db_file, monkeypatch):
+    saved_capacity = fill(db_file, 80, capacity=100)
+
+    index = reopen_without_rebuild(db_file, 100, monkeypatch)
+
+    assert index.bloom.capacity == saved_capacity == 100
+    assert index.contains_many(["address-0", "address-79", "unseen"]) == {"address-0", "address-79"}
+    index.close()
+
+
+def test_restart_after_growth_reuses_grown_filter(db_file, monkeypatch):
+    saved_capacity = fill(db_file, 150, capacity=100)
+
+    index = reopen_without_rebuild(db_file, 100, monkeypatch)
+
+    assert index.bloom.capacity == saved_capacity == 300
+    assert len(index) == 150
+    index.close()
+
+
+def test_larger_configured_capacity_rebuilds(db_file):
+    fill(db_file, 80, capacity=100)
+
+    index = SqliteSeenIndex(db_file, capacity=1000)
+
+    assert index.bloom.capacity == 1000
+    assert index.contains_many(["address-0", "unseen"]) == {"address-0"}
+    index.close()
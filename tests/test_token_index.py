@@ -0,0 +1,59 @@
+# tests/test_token_index.py
+# The loaders mirror every committed batch into the index; these feed it the
+# real transform outputs instead of hand-built frames.
+import pytest
+from benchmarks.synthetic import make_new_pairs_payload, make_token_infos
+from transform.transform_new_tokens import transform_new_tokens
+from transform.transform_updates import transform_updates
+from utils.columnar import pa
+from utils.token_index import TokenIndex
+
+COLUMNAR = [False, pytest.param(True, marks=pytest.mark.skipif(pa is None, reason="requires pyarrow"))]
+
+
+@pytest.fixture
+def index():
+    index = TokenIndex()
+    index.ready = True  # As after start(), without a database
+    return index
+
+
+def column(data, col):
+    if pa is not None and isinstance(data, pa.Table):
+        return data.column(col).to_pylist()
+    return data[col].tolist()
+
+
+@pytest.mark.parametrize('columnar', COLUMNAR, ids=['pandas', 'columnar'])
+def test_record_loaded_upsert_of_new_pairs(index, columnar):
+    data = transform_new_tokens(make_new_pairs_payload(50), columnar=columnar)
+
+    index.record_loaded(data, upsert=True)
+
+    addresses = column(data, 'address')
+    assert len(index) == len(set(addresses))
+    entry = index.get(addresses[0])
+    assert entry.status == 'alive'
+    assert entry.price == column(data, 'price')[0]
+    assert entry.creation_timestamp is not None
+    assert entry.updated_at is not None
+    assert index.is_alive(addresses[-1])
+
+
+@pytest.mark.parametrize('columnar', COLUMNAR, ids=['pandas', 'columnar'])
+def test_record_loaded_update_keeps_missing_values(index, columnar):
+    infos = make_token_infos(2)
+    pairs = make_new_pairs_payload(2)
+    for pair, info in zip(pairs['data']['pairs'], infos):
+        pair['base_address'] = info['address']
+    index.record_loaded(transform_new_tokens(pairs, columnar=columnar), upsert=True)
+    before = index.get(infos[0]['address'])
+    infos[0]['price']['price'] = None
+    results = [{'address': info['address'], 'data': info} for info in infos]
+
+    index.record_loaded(transform_updates(results, columnar=columnar), upsert=False)
+
+    after = index.get(infos[0]['address'])
+    assert after.price == before.price
+    assert after.volume != before.volume
+    assert after.status == 'alive'
@@ -0,0 +1,61 @@
+# tests/test_update_flags.py
+# A missing flag means "unknown": on the updates path it must stay null so
+# load_updates keeps the stored value; new tokens still default to False.
+import pytest
+from benchmarks.synthetic import make_new_pairs_payload, make_token_infos
+from transform.transform_new_tokens import transform_new_tokens
+from transform.transform_updates import transform_updates
+from utils.columnar import pa
+from utils.pg_copy import copy_source
+
+FLAGS = ['cto_flag', 'twitter_change_flag']
+COLUMNAR = [False, pytest.param(True, marks=pytest.mark.skipif(pa is None, reason="requires pyarrow"))]
+
+
+def column(data, col):
+    if pa is not None and isinstance(data, pa.Table):
+        return data.column(col).to_pylist()
+    return [None if value is None or value != value else value for value in data[col].tolist()]
+
+
+def token_infos():
+    infos = make_token_infos(4)
+    del infos[0]['dev']  # Entry without a dev block
+    infos[1]['dev'].update(cto_flag='maybe', twitter_change_flag='')  # Unrecognised values
+    infos[2]['dev'].update(cto_flag=True, twitter_change_flag='true')
+    infos[3]['dev'].update(cto_flag=0, twitter_change_flag='f')
+    return [{'address': info['address'], 'data': info} for info in infos]
+
+
+@pytest.mark.parametrize('columnar', COLUMNAR, ids=['pandas', 'columnar'])
+def test_update_flags_missing_stay_null(columnar):
+    data = transform_updates(token_infos(), columnar=columnar)
+
+    for col in FLAGS:
+        assert column(data, col)[:2] == [None, None]
+    assert [column(data, col)[2] for col in FLAGS] == [True, True]
+    assert [column(data, col)[3] for col in FLAGS] == [False, False]
+
+
+@pytest.mark.parametrize('columnar', COLUMNAR, ids=['pandas', 'columnar'])
+def test_update_flags_missing_are_copied_as_null(columnar):
+    data = transform_updates(token_infos(), columnar=columnar)
+
+    payload = copy_source(data, ['address'] + FLAGS).read()
+    if isinstance(payload, bytes):
+        payload = payload.decode()
+    # An unquoted empty field is NULL in COPY csv; copy_update keeps the stored value
+    assert [line.split(',')[1:] for line in payload.splitlines()[:2]] == [['', ''], ['', '']]
+
+
+@pytest.mark.parametrize('columnar', COLUMNAR, ids=['pandas', 'columnar'])
+def test_new_token_flags_default_to_false(columnar):
+    payload = make_new_pairs_payload(2)
+    for col in FLAGS:
+        payload['data']['pairs'][0]['base_token_info'].pop(col, None)
+        payload['data']['pairs'][1]['base_token_info'][col] = 'maybe'
+
+    data = transform_new_tokens(payload, columnar=columnar)
+
+    for col in FLAGS:
+        assert column(data, col) == [False, False]
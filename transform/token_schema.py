@@ -0,0 +1,106 @@
+# token_schema.py
+# Single source of truth for mapping raw gmgn records to `tokens` rows: new_pairs
+# entries (TOKEN_FIELDS) and mutil_window_token_info entries (UPDATE_FIELDS).
+# Paths are dotted keys into the record; later paths are fallbacks for earlier ones.
+from utils.record_normalizer import Field, compile_normalizer
+
+TOKEN_FIELDS = [
+    Field('address', ('base_address', 'base_token_info.address'), 'text'),
+    Field('pair_address', ('address', 'base_token_info.pool_id'), 'raw'),
+    Field('platform', ('pool_type_str', 'launchpad'), 'raw', ''),
+    Field('quote_symbol', ('quote_symbol',), 'raw'),
+    Field('symbol', ('base_token_info.symbol',), 'raw', ''),
+    Field('name', ('base_token_info.name',), 'raw'),
+    Field('logo', ('base_token_info.logo',), 'raw'),
+
+    Field('total_supply', ('base_token_info.total_supply',), 'numeric', precision=(40, 0)),
+    Field('price', ('base_token_info.price',), 'numeric', precision=(30, 18)),
+    Field('holder_count', ('base_token_info.holder_count',), 'integer'),
+
+    Field('price_change_1m', ('base_token_info.price_change_percent1m',), 'numeric', precision=(15, 6)),
+    Field('price_change_5m', ('base_token_info.price_change_percent5m',), 'numeric', precision=(15, 6)),
+    Field('price_change_1h', ('base_token_info.price_change_percent1h',), 'numeric', precision=(15, 6)),
+
+    Field('burn_ratio', ('base_token_info.burn_ratio', 'burn_ratio'), 'numeric', precision=(15, 6)),
+    Field('burn_status', ('base_token_info.burn_status', 'burn_status'), 'raw'),
+    Field('has_alert', ('base_token_info.is_show_alert',), 'bool', False),
+    Field('hot_level', ('base_token_info.hot_level',), 'integer'),
+
+    Field('quote_reserve', ('quote_reserve',), 'numeric', precision=(30, 6)),
+    Field('quote_reserve_usd', ('quote_reserve_usd',), 'numeric', precision=(30, 6)),
+    Field('initial_liquidity', ('initial_liquidity',), 'numeric', precision=(30, 6)),
+    Field('initial_quote_reserve', ('initial_quote_reserve',), 'numeric', precision=(30, 6)),
+    Field('liquidity', ('base_token_info.liquidity', 'liquidity'), 'numeric', precision=(30, 6)),
+
+    Field('top_10_holder_rate', ('base_token_info.top_10_holder_rate',), 'numeric', precision=(15, 6)),
+    Field('renounced_mint', ('base_token_info.renounced_mint',), 'bool', False),
+    Field('renounced_freeze_account', ('base_token_info.renounced_freeze_account',), 'bool', False),
+    Field('rug_ratio', ('base_token_info.rug_ratio',), 'numeric', precision=(15, 6)),
+
+    Field('sniper_count', ('base_token_info.sniper_count',), 'integer'),
+    Field('smart_degen_count', ('base_token_info.smart_degen_count',), 'integer'),
+    Field('renowned_count', ('base_token_info.renowned_count',), 'integer'),
+
+    Field('market_cap', ('base_token_info.market_cap',), 'numeric', precision=(30, 6)),
+    Field('is_wash_trading', ('base_token_info.is_wash_trading',), 'bool', False),
+    Field('creator_balance_rate', ('base_token_info.creator_balance_rate',), 'numeric', precision=(15, 6)),
+    Field('creator_token_status', ('base_token_info.creator_token_status',), 'raw'),
+    Field('creator_close', ('base_token_info.creator_close',), 'bool', False),
+    Field('rat_trader_amount_rate', ('base_token_info.rat_trader_amount_rate',), 'numeric', precision=(15, 6)),
+    Field('bluechip_owner_percentage', ('base_token_info.bluechip_owner_percentage',), 'numeric', precision=(15, 6)),
+
+    Field('volume', ('base_token_info.volume',), 'numeric', precision=(30, 6)),
+    Field('swaps', ('base_token_info.swaps',), 'integer'),
+    Field('buys', ('base_token_info.buys',), 'integer'),
+    Field('sells', ('base_token_info.sells',), 'integer'),
+
+    Field('dev_token_burn_amount', ('base_token_info.dev_token_burn_amount',), 'numeric', precision=(30, 6)),
+    Field('dev_token_burn_ratio', ('base_token_info.dev_token_burn_ratio',), 'numeric', precision=(15, 6)),
+
+    Field('cto_flag', ('base_token_info.cto_flag',), 'bool', False),
+    Field('twitter_change_flag', ('base_token_info.twitter_change_flag',), 'bool', False),
+
+    Field('open_timestamp', ('open_timestamp',), 'timestamp'),
+    Field('bot_degen_count', ('bot_degen_count',), 'integer'),
+
+    Field('twitter_username', ('base_token_info.social_links.twitter_username',), 'raw'),
+    Field('website', ('base_token_info.social_links.website',), 'raw'),
+    Field('telegram', ('base_token_info.social_links.telegram',), 'raw'),
+
+    Field('biggest_pool_address', ('base_token_info.biggest_pool_address',), 'raw'),
+    Field('creator', ('creator',), 'raw'),
+    Field('creation_timestamp', ('creation_timestamp', 'base_token_info.creation_timestamp'), 'timestamp'),
+]
+
+normalize_pair = compile_normalizer(TOKEN_FIELDS)
+
+# Mapping for one entry of data from /api/v1/mutil_window_token_info, used by the
+# updates sweep. Only columns that change over a token's life are listed; the
+# identity columns (pair, creator, timestamps) keep the values the new-pairs
+# feed wrote. Window metrics use the 24h figures. Flags have no default: an
+# entry without them (no `dev` block) leaves them null, and load_updates keeps
+# the stored value instead of writing False.
+UPDATE_FIELDS = [
+    Field('address', ('address', 'price.address'), 'text'),
+    Field('symbol', ('symbol',), 'raw'),
+    Field('name', ('name',), 'raw'),
+    Field('logo', ('logo',), 'raw'),
+
+    Field('total_supply', ('total_supply',), 'numeric', precision=(40, 0)),
+    Field('price', ('price.price',), 'numeric', precision=(30, 18)),
+    Field('holder_count', ('holder_count',), 'integer'),
+    Field('liquidity', ('liquidity',), 'numeric', precision=(30, 6)),
+
+    Field('top_10_holder_rate', ('dev.top_10_holder_rate',), 'numeric', precision=(15, 6)),
+    Field('creator_token_status', ('dev.creator_token_status',), 'raw'),
+
+    Field('volume', ('price.volume_24h', 'volume'), 'numeric', precision=(30, 6)),
+    Field('swaps', ('price.swaps_24h',), 'integer'),
+    Field('buys', ('price.buys_24h',), 'integer'),
+    Field('sells', ('price.sells_24h',), 'integer'),
+
+    Field('cto_flag', ('dev.cto_flag',), 'bool'),
+    Field('twitter_change_flag', ('dev.twitter_change_flag',), 'bool'),
+]
+
+normalize_token_info = compile_normalizer(UPDATE_FIELDS)
@@ -0,0 +1,38 @@
+import pandas as pd
+import logging
+from transform.token_schema import UPDATE_FIELDS, normalize_token_info
+from utils.columnar import arrow_schema
+from utils.parallel_transform import build_arrow_table_parallel
+
+
+def transform_updates(results: list, columnar: bool = False):
+    """
+    Maps the updates sweep output ([{"address", "data"}, ...] from
+    extract_updates.fetch_updates) to typed `tokens` columns.
+
+    Uses the same schema machinery as transform_new_tokens; with columnar=True
+    a pyarrow Table is returned instead of a DataFrame, built on the process
+    pool for large batches (see utils/parallel_transform.py).
+    """
+    logging.info("╔════════════════════════════════════════════╗")
+    logging.info("║       UPDATES TRANSFORMATION PHASE         ║")
+    logging.info("╚════════════════════════════════════════════╝\n")
+
+    records = [result["data"] for result in results or [] if isinstance(result.get("data"), dict)]
+    if not records:
+        logging.warning("No token updates to transform.")
+        if columnar:
+            return arrow_schema(UPDATE_FIELDS).empty_table()
+        return pd.DataFrame(columns=normalize_token_info.columns)
+
+    if columnar:
+        table = build_arrow_table_parallel(records, UPDATE_FIELDS, required='address')
+        logging.info(f"Transformed updates Arrow table shape: ({table.num_rows}, {table.num_columns})")
+        return table
+
+    rows = [normalize_token_info(record) for record in records]
+    rows = [row for row in rows if row['address'] is not None]
+    df = pd.DataFrame(rows, columns=normalize_token_info.columns)
+
+    logging.info(f"Transformed updates DataFrame shape: {df.shape}")
+    return df
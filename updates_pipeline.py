@@ -0,0 +1,89 @@
+import time
+import logging
+import os
+from dotenv import load_dotenv
+from extract.extract_updates import iter_update_chunks, UPDATE_CHUNK_SIZE
+from transform.transform_updates import transform_updates
+from load.load_updates import load_updates
+from utils.database import get_db_engine
+from utils.update_scheduler import seed_schedule, iter_due_token_batches, reschedule, defer
+from utils.profiling import profiled, rss_bytes
+from utils.token_index import token_index
+from utils.metrics import CYCLE_SECONDS, STAGE_ERRORS, SWEEP_PEAK_RSS_BYTES, observe_transform, start_metrics_server, write_textfile
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+# Build Arrow tables instead of object DataFrames in the transform stage
+COLUMNAR_TRANSFORM = os.getenv("COLUMNAR_TRANSFORM", "false").lower() in ("1", "true", "yes")
+UPDATE_INTERVAL = float(os.getenv("UPDATE_INTERVAL", "5"))  # Seconds between runs (polls for due tokens)
+
+def run_sweep():
+    """
+    One run: fetch fresh metrics for the due tokens, bulk-update them and
+    schedule their next refresh. Runs chunk by chunk (UPDATE_CHUNK_SIZE
+    addresses): each chunk is fetched, transformed, loaded and rescheduled
+    before the next is claimed, so memory stays bounded by the chunk size and
+    the first rows are written after one chunk instead of the whole sweep.
+    """
+    sweep_start = time.time()
+    engine = get_db_engine()
+    pages = iter_due_token_batches(engine, batch_size=min(UPDATE_CHUNK_SIZE, 1000))
+    claimed = updated = chunks = 0
+    peak_rss = rss_bytes()
+
+    for addresses, results in iter_update_chunks(pages):
+        transform_start = time.perf_counter()
+        with profiled('transform_updates'):
+            df = transform_updates(results, columnar=COLUMNAR_TRANSFORM)
+        observe_transform('updates', len(df), time.perf_counter() - transform_start)
+        with profiled('load_updates'):
+            updated += load_updates(df)
+
+        refreshed = set(df['address'].to_pylist() if COLUMNAR_TRANSFORM else df['address'])
+        reschedule(engine, refreshed)
+        defer(engine, [address for address in addresses if address not in refreshed])
+        claimed += len(addresses)
+        chunks += 1
+        # Sampled while the chunk is still held, i.e. near its peak
+        peak_rss = max(peak_rss, rss_bytes())
+        del results, df, refreshed
+
+    if not claimed:
+        logger.debug("No tokens due")
+        return
+    CYCLE_SECONDS.observe(time.time() - sweep_start, pipeline='updates')
+    SWEEP_PEAK_RSS_BYTES.set(peak_rss, pipeline='updates')
+    logger.info(f"Run updated {updated} of {claimed} due tokens in {chunks} chunks of up to "
+                f"{UPDATE_CHUNK_SIZE} in {time.time() - sweep_start:.2f}s, peak RSS {peak_rss / 1024 / 1024:.0f} MB")
+
+def run_pipeline():
+    """Polls for due tokens every UPDATE_INTERVAL seconds."""
+    seed_schedule(get_db_engine())
+    # With TOKEN_INDEX_ENABLED, scheduling reads token attributes from memory
+    token_index.start()
+    start_metrics_server()
+    while True:
+        sweep_start = time.time()
+        try:
+            run_sweep()
+        except KeyboardInterrupt:
+            logger.info("Updates pipeline stopped by user")
+            break
+        except Exception as e:
+            logger.error(f"Error in updates pipeline: {str(e)}", exc_info=True)
+            STAGE_ERRORS.inc(pipeline='updates', stage='sweep')
+        write_textfile()
+
+        try:
+            time.sleep(max(0, UPDATE_INTERVAL - (time.time() - sweep_start)))
+        except KeyboardInterrupt:
+            logger.info("Updates pipeline stopped by user")
+            break
+
+if __name__ == "__main__":
+    run_pipeline()
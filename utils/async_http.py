@@ -0,0 +1,143 @@
+# utils/async_http.py
+# Asyncio fetch engine shared by the extractors. One pooled keep-alive
+# session per sweep; a semaphore caps requests in flight, backoff and jitter
+# sleeps happen outside it, so a waiting request never holds a slot.
+import os
+import time
+import random
+import asyncio
+import logging
+from collections import namedtuple
+from typing import Any, Dict, List
+
+import aiohttp
+from utils.json_codec import loads
+from utils.metrics import HTTP_REQUEST_SECONDS, HTTP_RETRIES, endpoint
+
+try:
+    from aiohttp_socks import ProxyConnector
+except ImportError:  # Only needed for socks proxies (Tor)
+    ProxyConnector = None
+
+# GMGN_STUB_URL runs both pipelines offline against benchmarks/stub_gmgn:
+# the extractors call it instead of gmgn.ai and Tor is not used (see tor_utils)
+GMGN_STUB_URL = os.getenv("GMGN_STUB_URL", "")
+# Point both extractors at another host
+GMGN_BASE_URL = (GMGN_STUB_URL or os.getenv("GMGN_BASE_URL", "https://gmgn.ai")).rstrip("/")
+
+# 'threads' (default) keeps the cloudscraper thread pool, which handles the
+# Cloudflare challenge; 'async' opts into this engine. The async engine is only
+# verified against benchmarks/stub_gmgn, not against gmgn.ai through Tor.
+HTTP_ENGINE = os.getenv("HTTP_ENGINE", "threads")
+
+# Requests in flight; the default matches the thread pool (PARALLEL_THREADS)
+MAX_CONCURRENCY = int(os.getenv("HTTP_MAX_CONCURRENCY", "5"))
+REQUEST_TIMEOUT = float(os.getenv("HTTP_REQUEST_TIMEOUT", "45"))  # Seconds, per attempt
+KEEPALIVE_TIMEOUT = 30  # Seconds an idle pooled connection is kept open
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+FetchRequest = namedtuple('FetchRequest', ['method', 'url', 'params', 'json', 'headers'],
+                          defaults=(None, None, None))
+
+
+class AsyncFetcher:
+    """
+    Pooled HTTP client for one extraction sweep.
+
+    Use as `async with AsyncFetcher(...) as fetcher:`. Results have the same
+    shape the blocking extractors return: {"success", "data"} on HTTP 200,
+    {"success": False, "error", "status", "should_retry"} otherwise.
+    Tasks started with submit() are cancelled when the block exits early.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, timeout=REQUEST_TIMEOUT, proxy=None,
+                 max_retries=1, retry_delay=10, jitter=(0, 0), retry_statuses=RETRY_STATUSES):
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.proxy = proxy
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.jitter = jitter
+        self.retry_statuses = retry_statuses
+        self.session = None
+        self._semaphore = None
+        self._tasks = set()
+
+    def _connector(self):
+        options = dict(limit=self.max_concurrency, keepalive_timeout=KEEPALIVE_TIMEOUT)
+        if self.proxy and self.proxy.startswith("socks"):
+            if ProxyConnector is None:
+                raise RuntimeError("aiohttp-socks is required for socks proxies")
+            return ProxyConnector.from_url(self.proxy, **options)
+        return aiohttp.TCPConnector(**options)
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.session = aiohttp.ClientSession(connector=self._connector(), timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pending = [task for task in self._tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self.session.close()
+
+    async def _attempt(self, request: FetchRequest) -> Dict[str, Any]:
+        # Socks proxies are handled by the connector, http(s) ones per request
+        proxy = self.proxy if self.proxy and not self.proxy.startswith("socks") else None
+        async with self._semaphore:
+            start = time.perf_counter()
+            status = "error"
+            try:
+                async with self.session.request(
+                    request.method, request.url, params=request.params, json=request.json,
+                    headers=request.headers, proxy=proxy
+                ) as response:
+                    status = str(response.status)
+                    if response.status == 200:
+                        return {"success": True, "data": loads(await response.read()),
+                                "status": 200}
+                    return {
+                        "success": False,
+                        "error": f"HTTP {response.status}",
+                        "response": (await response.text())[:200],
+                        "status": response.status,
+                        "should_retry": response.status in self.retry_statuses
+                    }
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                return {"success": False, "error": str(e) or type(e).__name__,
+                        "status": None, "should_retry": True}
+            finally:
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start,
+                                             endpoint=endpoint(request.url), status=status)
+
+    async def fetch(self, request: FetchRequest) -> Dict[str, Any]:
+        """Run one request with jitter and retries (4xx other than 429 are not retried)."""
+        for attempt in range(1, self.max_retries + 1):
+            if self.jitter[1]:
+                await asyncio.sleep(random.uniform(*self.jitter))
+
+            result = await self._attempt(request)
+            if result["success"] or not result["should_retry"]:
+                return result
+
+            logging.warning(f"Attempt {attempt} failed: {result.get('error')}")
+            if attempt < self.max_retries:
+                HTTP_RETRIES.inc(endpoint=endpoint(request.url))
+                sleep_time = self.retry_delay * attempt + random.uniform(0, 3)
+                logging.info(f"Waiting {sleep_time:.1f}s before retry...")
+                await asyncio.sleep(sleep_time)
+        return result
+
+    def submit(self, request: FetchRequest) -> asyncio.Task:
+        """Start fetch(request) in the background; cancelled if the sweep is aborted."""
+        task = asyncio.ensure_future(self.fetch(request))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def fetch_all(self, requests: List[FetchRequest]) -> List[Dict[str, Any]]:
+        """Fetch every request concurrently; results keep the input order."""
+        return await asyncio.gather(*(self.submit(request) for request in requests))
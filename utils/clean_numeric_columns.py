@@ -1,21 +1,81 @@
+import numpy as np
 import pandas as pd
-from decimal import Decimal, InvalidOperation
+from pandas.api.types import infer_dtype, is_bool_dtype, is_numeric_dtype
+from decimal import Decimal
 import logging
 
-def clean_numeric_columns(df, numeric_cols):
-    """Converts numeric columns to Decimal for precision without worrying about trailing zeros."""
+# Values treated as missing rather than invalid
+MISSING_VALUES = ['', 'None', 'nan']
+
+# Supported output modes:
+#   'decimal' - Decimal objects, exact (default, matches NUMERIC columns in queries.sql)
+#   'string'  - exact decimal text, e.g. for COPY or NUMERIC(30,18) without Decimal objects
+#   'float'   - float64 with NaN for missing values, fastest but lossy
+NUMERIC_MODES = ('decimal', 'string', 'float')
+
+
+def _parse_column(series, col):
+    """Bulk-parses a column to float64 and returns (parsed, valid_mask)."""
+    if is_numeric_dtype(series) and not is_bool_dtype(series):
+        parsed = series.astype('float64')
+        return parsed, parsed.notna()
+
+    parsed = pd.to_numeric(series, errors='coerce').astype('float64')
+
+    # Booleans are not numbers here, even though to_numeric accepts them
+    inferred = infer_dtype(series, skipna=True)
+    if inferred == 'boolean' or inferred.startswith('mixed'):
+        parsed[series.map(lambda x: isinstance(x, bool))] = np.nan
+
+    # Only cells the parser rejected need a closer look: blank/'None'/'nan' are
+    # missing, everything else is invalid
+    rejected = parsed.isna() & series.notna()
+    if rejected.any():
+        rejected_text = series[rejected].astype(str).str.strip()
+        invalid = rejected_text[~rejected_text.isin(MISSING_VALUES)]
+        if not invalid.empty:
+            samples = series[invalid.index].unique()[:5].tolist()
+            logging.warning(f"Invalid values in column '{col}' ({len(invalid)} rows), e.g. {samples}")
+
+    # to_numeric's string parser is not correctly rounded; re-parse the valid
+    # cells with float() so float mode matches Decimal(text) to the last bit
+    valid = parsed.notna()
+    if valid.any():
+        parsed[valid] = series[valid].astype('float64')
+    return parsed, valid
+
+
+def clean_numeric_series(series, col, mode='decimal'):
+    """Converts a whole column at once and returns the converted Series."""
+    parsed, valid = _parse_column(series, col)
+
+    if mode == 'float':
+        return parsed
+
+    # Exact modes keep the original text, so precision beyond float64 survives
+    mask = valid.to_numpy()
+    values = series.to_numpy()[mask]
+    if values.dtype == object:
+        exact = pd.Series(values, dtype=object).astype(str).str.strip().to_numpy()
+    else:
+        exact = values.astype(str)
+
+    # Fill an object array directly; assigning lists of Decimals through pandas is slow
+    result = np.full(len(series), None, dtype=object)
+    if mode == 'decimal':
+        result[mask] = np.fromiter(map(Decimal, exact), dtype=object, count=len(exact))
+    else:
+        result[mask] = exact
+    return pd.Series(result, index=series.index, dtype=object)
+
+
+def clean_numeric_columns(df, numeric_cols, mode='decimal'):
+    """Converts numeric columns column-at-a-time, keeping exact values unless mode='float'."""
+    if mode not in NUMERIC_MODES:
+        raise ValueError(f"Unknown numeric mode '{mode}', expected one of {NUMERIC_MODES}")
+
     for col in numeric_cols:
         if col in df.columns:
-            # Convert to Decimal for high precision
-            def convert_value(x):
-                try:
-                    if pd.isna(x) or str(x).strip() in [ ' ', "",'', 'None', 'nan']:
-                        return None  # Use None for missing values
-                    return Decimal(str(x))  # Convert to Decimal
-                except (InvalidOperation, TypeError, ValueError) as e:
-                    logging.warning(f"Invalid value '{x}' in column '{col}': {str(e)}")
-                    return None  # Handle invalid inputs
-            
-            df[col] = df[col].apply(convert_value)
-    
-    return df
\ No newline at end of file
+            df[col] = clean_numeric_series(df[col], col, mode)
+
+    return df
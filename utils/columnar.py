@@ -0,0 +1,159 @@
+# utils/columnar.py
+# Arrow-backed output for schema-described records (see utils/record_normalizer.py).
+import logging
+from decimal import Context, Decimal, ROUND_HALF_UP
+import pandas as pd
+from utils.clean_numeric_columns import clean_numeric_series
+from utils.convert_boolean_columns import convert_boolean_series
+from utils.record_normalizer import BOOL_MAP, MISSING_VALUES, compile_extractor
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # Optional dependency, only needed for columnar mode
+    pa = None
+    pc = None
+
+
+# (precision, scale) of 'numeric' fields declared without one; wide enough
+# for any NUMERIC column in queries.sql
+DEFAULT_NUMERIC_PRECISION = (76, 36)
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("Columnar mode requires pyarrow (pip install pyarrow)")
+
+
+def arrow_type(field):
+    """Arrow type of a field's column: exact decimals for NUMERIC, int64 for INTEGER."""
+    require_pyarrow()
+    if field.type == 'numeric':
+        precision, scale = field.precision or DEFAULT_NUMERIC_PRECISION
+        decimal = pa.decimal128 if precision <= 38 else pa.decimal256
+        return decimal(precision, scale)
+    return {
+        'raw': pa.string(),
+        'text': pa.string(),
+        'integer': pa.int64(),
+        'bool': pa.bool_(),
+        'timestamp': pa.timestamp('us'),
+    }[field.type]
+
+
+def arrow_schema(fields, extra=()):
+    """Arrow schema for a field list, plus optional (name, type) pairs appended at the end."""
+    require_pyarrow()
+    return pa.schema(
+        [pa.field(field.target, arrow_type(field)) for field in fields] + list(extra)
+    )
+
+
+def _quantize(text, field, target_type):
+    """Per-value fallback of _to_decimal; values too large for the column become null."""
+    is_decimal = pa.types.is_decimal(target_type)
+    exponent = Decimal(1).scaleb(-target_type.scale) if is_decimal else Decimal(1)
+    limit = Decimal(10) ** (target_type.precision - target_type.scale) if is_decimal else Decimal(2) ** 63
+    context = Context(prec=DEFAULT_NUMERIC_PRECISION[0] + 1)
+    values, dropped = [], 0
+    for value in text:
+        if value is not None:
+            value = Decimal(value)
+            if abs(value) < limit:
+                value = value.quantize(exponent, rounding=ROUND_HALF_UP, context=context)
+            if abs(value) >= limit:  # Also when rounding carried it over
+                value, dropped = None, dropped + 1
+            elif not is_decimal:
+                value = int(value)
+        values.append(value)
+    if dropped:
+        logging.warning(f"Values out of range for {target_type} in column '{field.target}' ({dropped} rows)")
+    return pa.array(values, type=target_type)
+
+
+def _round_cast(text, target_type):
+    """Decimal text to target_type, rounded half away from zero to its scale as Postgres stores it."""
+    array = pc.cast(text, pa.decimal256(*DEFAULT_NUMERIC_PRECISION))
+    scale = target_type.scale if pa.types.is_decimal(target_type) else 0
+    array = pc.round(array, ndigits=scale, round_mode='half_towards_infinity')
+    return pc.cast(array, target_type)
+
+
+def _to_decimal(values, field):
+    """
+    Exact NUMERIC/INTEGER column. The raw text (or the repr of JSON numbers)
+    is parsed by Arrow, so no value passes through float64. Columns with
+    values Arrow rejects (invalid text, booleans, more digits than the wide
+    type holds, too large for the column) take the slower path through
+    clean_numeric_series, which logs invalid values, and a per-value
+    fallback that nulls those out of range.
+    """
+    target_type = arrow_type(field)
+    text = pa.array([value if value is None or isinstance(value, str) else str(value) for value in values],
+                    type=pa.string())
+    text = pc.utf8_trim_whitespace(text)
+    text = pc.if_else(pc.is_in(text, pa.array(MISSING_VALUES)), pa.scalar(None, pa.string()), text)
+    try:
+        return _round_cast(text, target_type)
+    except (pa.ArrowInvalid, OverflowError):
+        pass
+    series = pd.Series(values, dtype=object)
+    text = pa.array(clean_numeric_series(series, field.target, mode='string'), type=pa.string(), from_pandas=True)
+    try:
+        return _round_cast(text, target_type)
+    except (pa.ArrowInvalid, OverflowError):
+        return _quantize(text.to_pylist(), field, target_type)
+
+
+def _to_arrow(values, field):
+    """Converts one column of raw values to a typed Arrow array."""
+    series = pd.Series(values, dtype=object)
+    if field.type in ('numeric', 'integer'):
+        array = _to_decimal(values, field)
+    elif field.type == 'bool':
+        # Unrecognised values stay null; field.default (below) fills them where wanted
+        array = pa.array(convert_boolean_series(series, BOOL_MAP, missing=None), type=pa.bool_(), from_pandas=True)
+    elif field.type == 'timestamp':
+        seconds = pd.to_numeric(series, errors='coerce')
+        array = pa.array(pd.to_datetime(seconds, unit='s'), type=pa.timestamp('us'), from_pandas=True)
+    else:
+        array = pa.array(
+            [value if value is None or isinstance(value, str) else str(value) for value in values],
+            type=pa.string()
+        )
+        if field.type == 'text':
+            array = pc.utf8_trim_whitespace(array)
+
+    if field.default is not None:
+        array = array.fill_null(field.default)
+    return array
+
+
+def build_arrow_table(records, fields, required=None, constants=None):
+    """
+    Builds a typed Arrow table from raw records, converting one column at a time.
+
+    Args:
+        records: Raw (nested) records
+        fields: Field schema describing the output columns
+        required: Column whose null rows are dropped
+        constants: Extra string columns with one value for every row, e.g. {'status': 'alive'}
+    """
+    require_pyarrow()
+    constants = constants or {}
+    columns = compile_extractor(fields)(records)
+
+    arrays = [_to_arrow(columns[field.target], field) for field in fields]
+    arrays += [pa.array([value] * len(records), type=pa.string()) for value in constants.values()]
+    schema = arrow_schema(fields, [(col, pa.string()) for col in constants])
+    table = pa.Table.from_arrays(arrays, schema=schema)
+
+    if required:
+        table = table.filter(pc.is_valid(table.column(required)))
+    return table
+
+
+def arrow_to_pandas(table):
+    """Pandas view of an Arrow table that keeps nullable Arrow dtypes (no NaN/None mixing)."""
+    require_pyarrow()
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
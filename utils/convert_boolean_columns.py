@@ -1,13 +1,21 @@
+def convert_boolean_series(series, bool_map, missing=False):
+    """
+    Converts one column using a mapping; unmapped and missing values become
+    `missing`. With missing=None they are left as NaN (an object column).
+    """
+    mapped = (
+        series
+        .astype(str)  # Convert to string for consistency
+        .str.lower()  # Normalize case
+        .map(bool_map)  # Map values to boolean
+    )
+    if missing is None:
+        return mapped
+    return mapped.fillna(missing).astype(bool)  # Explicitly handle missing values
+
 def convert_boolean_columns(df, bool_cols, bool_map):
     """Converts boolean columns using a mapping."""
     for col in bool_cols:
         if col in df.columns:
-            df[col] = (
-                df[col]
-                .astype(str)  # Convert to string for consistency
-                .str.lower()  # Normalize case
-                .map(bool_map)  # Map values to boolean
-                .fillna(False)  # Explicitly handle missing values
-                .astype(bool)  # Convert to boolean type
-            )
+            df[col] = convert_boolean_series(df[col], bool_map)
     return df
\ No newline at end of file
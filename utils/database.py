@@ -8,6 +8,22 @@ load_dotenv()
 # Global variable to store the engine instance
 _ENGINE = None
 
+def create_db_engine(**pool_options):
+    """
+    Create a new SQLAlchemy engine from the DB_* environment variables.
+    Most callers want the shared get_db_engine(); this is for components that
+    keep their own connection (e.g. the write-behind loader).
+    """
+    # Validate required environment variables
+    required_vars = ['DB_USER', 'DB_PASSWORD', 'DB_HOST', 'DB_PORT', 'DB_NAME']
+    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    if missing_vars:
+        raise ValueError(f"Missing environment variables: {', '.join(missing_vars)}")
+
+    # Build the database URL
+    db_url = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+    return create_engine(db_url, **pool_options)
+
 def get_db_engine():
     """
     Create and return a SQLAlchemy database engine with connection pooling.
@@ -15,16 +31,7 @@ def get_db_engine():
     """
     global _ENGINE
     if _ENGINE is None:
-        # Validate required environment variables
-        required_vars = ['DB_USER', 'DB_PASSWORD', 'DB_HOST', 'DB_PORT', 'DB_NAME']
-        missing_vars = [var for var in required_vars if not os.getenv(var)]
-        if missing_vars:
-            raise ValueError(f"Missing environment variables: {', '.join(missing_vars)}")
-        
-        # Build the database URL
-        db_url = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-        
         # Create the engine with connection pooling
-        _ENGINE = create_engine(db_url, pool_size=5, max_overflow=10)
+        _ENGINE = create_db_engine(pool_size=5, max_overflow=10)
     
     return _ENGINE
\ No newline at end of file
@@ -0,0 +1,68 @@
+# utils/high_water_mark.py
+# Persisted open_timestamp high-water mark for the new_pairs feed. The feed is
+# requested newest first, so once a response reaches pairs older than the mark
+# (minus a grace window for late arrivals) the rest of it was already processed.
+import os
+import logging
+from typing import Dict, List
+from utils.json_codec import load_file, dump_file
+
+HIGH_WATER_MARK_FILE = "new_pairs_high_water_mark.json"
+# Pairs up to this many seconds below the mark are still passed on (to the
+# seen-token filter) in case they were published late
+HIGH_WATER_GRACE_SECONDS = float(os.getenv("HIGH_WATER_GRACE_SECONDS", "30"))
+
+
+class HighWaterMark:
+    def __init__(self, path=HIGH_WATER_MARK_FILE, grace=HIGH_WATER_GRACE_SECONDS):
+        self.path = path
+        self.grace = grace
+        self.value = self._load()
+
+    @property
+    def cutoff(self):
+        """Pairs with open_timestamp below this are skipped; None until a mark exists."""
+        return None if self.value is None else self.value - self.grace
+
+    def take_new(self, pairs: List[Dict]) -> List[Dict]:
+        """
+        Leading run of a newest-first response that is not older than the
+        cutoff. Pairs without an open_timestamp are kept.
+        """
+        cutoff = self.cutoff
+        if cutoff is None:
+            return list(pairs)
+        kept = []
+        for pair in pairs:
+            open_timestamp = pair.get('open_timestamp')
+            if isinstance(open_timestamp, (int, float)) and open_timestamp < cutoff:
+                break
+            kept.append(pair)
+        return kept
+
+    def advance(self, pairs: List[Dict]):
+        """Raises the mark to the newest open_timestamp in pairs and persists it."""
+        newest = max(
+            (pair['open_timestamp'] for pair in pairs
+             if isinstance(pair.get('open_timestamp'), (int, float))),
+            default=None
+        )
+        if newest is None or (self.value is not None and newest <= self.value):
+            return
+        self.value = newest
+        self._save()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            return load_file(self.path).get('open_timestamp')
+        except (OSError, ValueError, AttributeError) as e:
+            logging.warning(f"Failed to load high-water mark, starting without one: {str(e)}")
+            return None
+
+    def _save(self):
+        try:
+            dump_file({'open_timestamp': self.value}, self.path, atomic=True)
+        except OSError as e:
+            logging.error(f"Failed to save high-water mark: {str(e)}")
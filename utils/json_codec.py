@@ -0,0 +1,75 @@
+# utils/json_codec.py
+# One JSON codec for response bodies and persisted state. Uses the stdlib json
+# module unless JSON_CODEC=orjson (faster: decodes straight from bytes, encodes
+# to bytes). orjson only handles 64-bit integers and decodes wider ones
+# (e.g. a NUMERIC(40, 0) total_supply) as float, so documents with a run of 20+
+# digits are decoded by the stdlib instead, and values it cannot encode are
+# encoded by the stdlib too.
+import os
+import re
+import json
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+JSON_CODEC = os.getenv("JSON_CODEC", "stdlib")
+if JSON_CODEC == "orjson" and orjson is None:
+    raise ImportError("JSON_CODEC=orjson requires orjson (pip install orjson)")
+
+# Raised by loads() for malformed input, whichever codec is active
+# (orjson.JSONDecodeError subclasses it)
+JSONDecodeError = json.JSONDecodeError
+
+# Integers of 20+ digits may not fit 64 bits; also matches long decimals and
+# digit runs inside strings, which only cost a slower decode
+_WIDE_NUMBER = re.compile(rb'[0-9]{20}')
+_WIDE_NUMBER_TEXT = re.compile(r'[0-9]{20}')
+
+
+def _default(value):
+    """Types neither codec encodes natively."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def loads(data):
+    """Decodes bytes, bytearray, memoryview or str."""
+    if JSON_CODEC == "orjson":
+        wide = _WIDE_NUMBER_TEXT if isinstance(data, str) else _WIDE_NUMBER
+        if wide.search(data) is None:
+            return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps(obj, indent=False) -> bytes:
+    """Encodes to UTF-8 bytes; indent=True pretty-prints with two spaces."""
+    if JSON_CODEC == "orjson":
+        try:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_INDENT_2 if indent else 0)
+        except orjson.JSONEncodeError as e:
+            if "64-bit" not in str(e):
+                raise
+    return json.dumps(obj, default=_default, indent=2 if indent else None,
+                      separators=None if indent else (',', ':')).encode()
+
+
+def load_file(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_file(obj, path, indent=False, atomic=False):
+    """Writes obj to path; atomic=True writes a temp file and renames it into place."""
+    target = f"{path}.tmp" if atomic else path
+    with open(target, 'wb') as f:
+        f.write(dumps(obj, indent=indent))
+    if atomic:
+        os.replace(target, path)
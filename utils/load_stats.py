@@ -0,0 +1,22 @@
+# utils/load_stats.py
+# Process-wide counters of what the loaders actually wrote, per target table.
+# 'inserted' and 'updated' rows were written; 'skipped' rows matched what was
+# already stored and were left untouched.
+import threading
+from collections import Counter
+
+_COUNTERS = Counter()
+_LOCK = threading.Lock()
+
+
+def record_load(table, inserted=0, updated=0, skipped=0):
+    with _LOCK:
+        _COUNTERS[(table, 'inserted')] += inserted
+        _COUNTERS[(table, 'updated')] += updated
+        _COUNTERS[(table, 'skipped')] += skipped
+
+
+def load_counters():
+    """{(table, outcome): rows} since process start."""
+    with _LOCK:
+        return dict(_COUNTERS)
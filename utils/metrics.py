@@ -0,0 +1,220 @@
+# utils/metrics.py
+# Process-wide pipeline metrics in the Prometheus text exposition format.
+# Stages record into the module-level metrics below; each pipeline process
+# exposes them over HTTP (METRICS_PORT, scraped at /metrics) and/or rewrites a
+# node_exporter textfile (METRICS_TEXTFILE) after every cycle. Row counts
+# written by the loaders come from utils/load_stats.
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.load_stats import load_counters
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 disables the HTTP endpoint
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")  # Empty disables the textfile
+METRICS_PREFIX = "crypto_pipeline_"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = METRICS_PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """[(suffix, labels, value)] for the current values."""
+        with self._lock:
+            return [('', key, value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}"
+                  for suffix, labels, value in self.samples()]
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the with-block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    samples.append(('_bucket', key + (('le', _format_value(float(bound))),), count))
+                samples.append(('_sum', key, total))
+                samples.append(('_count', key, counts[-1]))
+        return samples
+
+
+# Extract
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', "gmgn request latency per attempt", ['endpoint', 'status'])
+HTTP_RETRIES = Counter('http_retries_total', "gmgn request attempts that were retried", ['endpoint'])
+TOKENS_FETCHED = Counter('tokens_fetched_total', "Token records received from gmgn", ['source'])
+# Filter
+TOKENS_NEW = Counter('tokens_new_total', "New-pairs tokens passed on as never seen before")
+TOKENS_DEDUPED = Counter('tokens_deduped_total', "New-pairs tokens dropped as already seen or duplicated")
+# Transform
+TRANSFORM_SECONDS = Histogram('transform_duration_seconds', "Transform time per batch", ['stage'])
+TRANSFORM_ROWS = Counter('transform_rows_total', "Rows produced by the transforms", ['stage'])
+TRANSFORM_ROWS_PER_SECOND = Gauge('transform_rows_per_second', "Throughput of the last transform batch", ['stage'])
+# Load
+LOAD_SECONDS = Histogram('load_duration_seconds', "Database write time per batch", ['table', 'method'])
+WRITE_BEHIND_QUEUE_DEPTH = Gauge('write_behind_queue_depth', "Batches waiting for the write-behind loader", ['loader'])
+WRITE_BEHIND_GROUP_SIZE = Histogram('write_behind_group_batches', "Batches coalesced into one group commit",
+                                    ['loader'], buckets=(1, 2, 4, 8, 16, 32, 64))
+WRITE_BEHIND_RETRIES = Counter('write_behind_retries_total', "Group commits retried after a transient database error",
+                               ['loader'])
+WRITE_BEHIND_DROPPED = Counter('write_behind_dropped_batches_total', "Batches the write-behind loader gave up on",
+                               ['loader'])
+# Pipeline
+CYCLE_SECONDS = Histogram('cycle_duration_seconds', "Extract-to-load time per cycle, without idle sleeps",
+                          ['pipeline'])
+SWEEP_PEAK_RSS_BYTES = Gauge('sweep_peak_rss_bytes', "Highest resident memory seen during the last sweep",
+                             ['pipeline'])
+TOKEN_INDEX_TOKENS = Gauge('token_index_tokens', "Tokens held by the in-process token index", ['status'])
+STAGE_ERRORS = Counter('stage_errors_total', "Exceptions caught by the pipeline loops", ['pipeline', 'stage'])
+
+
+def endpoint(url):
+    """Endpoint label for a request URL: its path, without host or query."""
+    return urlsplit(url).path
+
+
+def observe_transform(stage, rows, seconds):
+    TRANSFORM_SECONDS.observe(seconds, stage=stage)
+    TRANSFORM_ROWS.inc(rows, stage=stage)
+    if seconds > 0:
+        TRANSFORM_ROWS_PER_SECOND.set(rows / seconds, stage=stage)
+
+
+def render():
+    """All metrics, plus the loader row counters, in the text exposition format."""
+    lines = []
+    for metric in _REGISTRY:
+        lines += metric.render()
+    name = METRICS_PREFIX + 'rows_written_total'
+    lines += [f"# HELP {name} Rows the loaders inserted, updated or skipped as unchanged",
+              f"# TYPE {name} counter"]
+    lines += [f"{name}{_format_labels((('table', table), ('outcome', outcome)))} {rows}"
+              for (table, outcome), rows in sorted(load_counters().items())]
+    return '\n'.join(lines) + '\n'
+
+
+def write_textfile(path=None):
+    """Atomically rewrites the textfile, if one is configured."""
+    path = path or METRICS_TEXTFILE
+    if not path:
+        return
+    try:
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w') as f:
+            f.write(render())
+        os.replace(tmp_file, path)
+    except OSError as e:
+        logging.error(f"Failed to write metrics textfile: {str(e)}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # Keep scrapes out of the pipeline log
+        pass
+
+
+_SERVER = None
+
+
+def start_metrics_server(port=None):
+    """Serves /metrics from a daemon thread; no-op if METRICS_PORT is 0 or it already runs."""
+    global _SERVER
+    port = METRICS_PORT if port is None else port
+    if not port or _SERVER is not None:
+        return _SERVER
+    _SERVER = ThreadingHTTPServer(('0.0.0.0', port), _MetricsHandler)
+    threading.Thread(target=_SERVER.serve_forever, name="metrics", daemon=True).start()
+    logging.info(f"Serving metrics on :{port}/metrics")
+    return _SERVER
@@ -0,0 +1,146 @@
+# utils/parallel_transform.py
+# Multi-core columnar transforms for large batches. The per-column conversions
+# in utils/columnar.py are pure Python and hold the GIL, so big inputs (large
+# update chunks, backfills) are split into contiguous shards that a process
+# pool converts in parallel:
+#   - the parent encodes each shard of raw records as JSON into one shared
+#     memory block. The records arrive as parsed dicts, so they have to be
+#     re-encoded either way; JSON is about 3x cheaper to write and 2x cheaper
+#     to read back than pickling the dicts
+#   - each worker builds its Arrow table and sends it back as an Arrow IPC
+#     buffer, which the parent maps without copying
+#   - the tables are concatenated in shard order, so the result has the same
+#     rows, order and schema as utils/columnar.build_arrow_table
+# Batches below PARALLEL_TRANSFORM_MIN_ROWS, or with PARALLEL_TRANSFORM_WORKERS
+# at 0 (the default), are converted in-process. Only the columnar output is
+# sharded: the row path's Decimal/datetime objects cost more to send between
+# processes than to build.
+#
+# The encoding is not free, and scaling is not linear. Measured for 100k
+# records (benchmarks/bench_parallel_transform.py):
+#   - new pairs: 4.7s in-process. The parent's encode is a serial 0.6s and
+#     the workers' decode adds 1.6s of work, so one worker runs at 0.58x
+#   - updates: 1.1s in-process. Encode is 0.3s and decode 1.0s, so one
+#     worker runs at 0.50x
+# Only a single CPU was available for those runs, so more workers are
+# unmeasured. From the same figures the ceiling is about 2x at 4 workers and
+# 3.5x at 8 for new pairs, but only 1.3x and 1.8x for updates. Enable the
+# pool only with several free cores, and measure on the target machine first.
+import gc
+import os
+import time
+import atexit
+import signal
+import logging
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils.columnar import build_arrow_table, require_pyarrow, pa
+from utils.json_codec import loads, dumps
+
+PARALLEL_TRANSFORM_WORKERS = int(os.getenv("PARALLEL_TRANSFORM_WORKERS", "0"))  # 0 disables the pool
+PARALLEL_TRANSFORM_MIN_ROWS = int(os.getenv("PARALLEL_TRANSFORM_MIN_ROWS", "20000"))  # Smaller batches stay in-process
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    # Ctrl-C is handled by the pipeline process, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Not fork: the pipelines run threads (staged workers, metrics,
+            # the updates producer) whose locks a forked child would inherit
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker)
+            atexit.register(shutdown_pool)
+            logging.info(f"Started parallel transform pool with {workers} workers")
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            # Not shutdown(cancel_futures=True), which is Python 3.9+: shards
+            # still queued are cancelled by build_arrow_table_parallel
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def _build_shard(shm_name, offset, length, fields, required, constants):
+    """Worker side: one shard of JSON records in shared memory to an Arrow IPC buffer."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    # Decoding creates millions of containers but no cycles; without this the
+    # collector would rescan them repeatedly while the shard is decoded
+    gc.disable()
+    try:
+        view = shm.buf[offset:offset + length]
+        records = loads(view)
+        view.release()
+        table = build_arrow_table(records, fields, required=required, constants=constants)
+    finally:
+        gc.enable()
+        shm.close()
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def build_arrow_table_parallel(records, fields, required=None, constants=None,
+                               workers=None, min_rows=None):
+    """
+    build_arrow_table() for large batches: shards records across the process
+    pool and concatenates the shard tables in input order. Falls back to
+    in-process conversion for small batches, when the pool is disabled, and
+    if the pool breaks (the next large batch starts a fresh one).
+    """
+    require_pyarrow()
+    workers = PARALLEL_TRANSFORM_WORKERS if workers is None else workers
+    min_rows = PARALLEL_TRANSFORM_MIN_ROWS if min_rows is None else min_rows
+    if workers < 1 or len(records) < max(min_rows, 2):
+        return build_arrow_table(records, fields, required=required, constants=constants)
+
+    start = time.perf_counter()
+    shard_size = -(-len(records) // workers)
+    shards = [dumps(records[i:i + shard_size]) for i in range(0, len(records), shard_size)]
+    shm = shared_memory.SharedMemory(create=True, size=sum(len(shard) for shard in shards))
+    futures = []
+    try:
+        offsets = []
+        offset = 0
+        for shard in shards:
+            shm.buf[offset:offset + len(shard)] = shard
+            offsets.append((offset, len(shard)))
+            offset += len(shard)
+        del shards
+
+        pool = _get_pool(workers)
+        futures = [pool.submit(_build_shard, shm.name, offset, length, fields, required, constants)
+                   for offset, length in offsets]
+        buffers = [future.result() for future in futures]
+    except BrokenProcessPool as e:
+        logging.error(f"Parallel transform pool failed, converting in-process: {str(e)}")
+        shutdown_pool()
+        return build_arrow_table(records, fields, required=required, constants=constants)
+    finally:
+        # Only shards still queued are affected, i.e. when a shard failed or
+        # the wait was interrupted
+        for future in futures:
+            future.cancel()
+        shm.close()
+        shm.unlink()
+
+    table = pa.concat_tables(pa.ipc.open_stream(buffer).read_all() for buffer in buffers)
+    logging.info(f"Converted {len(records)} records in {len(buffers)} shards on {workers} workers "
+                 f"in {time.perf_counter() - start:.2f}s")
+    return table
@@ -0,0 +1,57 @@
+# utils/pg_copy.py
+# Payload rendering for COPY ... FROM STDIN WITH (FORMAT csv), shared by the loaders.
+import io
+import numpy as np
+import pandas as pd
+from utils.columnar import pa
+
+def csv_value(value):
+    """Renders one value for COPY ... (FORMAT csv): unquoted empty is NULL, strings are always quoted."""
+    if value is None or value is pd.NaT:
+        return ''
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    if isinstance(value, (bool, np.bool_)):
+        return 't' if value else 'f'
+    if isinstance(value, float) and value != value:
+        return ''
+    return str(value)
+
+class CsvRowStream:
+    """
+    Read-only file object that renders rows to CSV lazily, so COPY can stream
+    large batches without building the whole payload in memory.
+    """
+    def __init__(self, rows):
+        self._lines = (','.join(map(csv_value, row)) + '\n' for row in rows)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            chunk, self._buffer = self._buffer, ''
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+def copy_source(data, columns):
+    """File object with the CSV payload for a pyarrow Table, DataFrame or list of dicts."""
+    if pa is not None and isinstance(data, pa.Table):
+        import pyarrow.csv as pa_csv
+        sink = pa.BufferOutputStream()
+        pa_csv.write_csv(data.select(columns), sink, pa_csv.WriteOptions(include_header=False))
+        return io.BytesIO(sink.getvalue().to_pybytes())
+    if isinstance(data, pd.DataFrame):
+        return CsvRowStream(data[columns].itertuples(index=False, name=None))
+    return CsvRowStream(tuple(record.get(col) for col in columns) for record in data)
+
+def data_columns(data):
+    if pa is not None and isinstance(data, pa.Table):
+        return data.column_names
+    if isinstance(data, pd.DataFrame):
+        return list(data.columns)
+    return list(data[0].keys()) if data else []
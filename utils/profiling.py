@@ -0,0 +1,200 @@
+# utils/profiling.py
+# Opt-in CPU (cProfile) and allocation (tracemalloc) profiling of pipeline
+# cycles. With PROFILE_ENABLED unset, profiled() returns a shared no-op
+# context manager, so the hooks cost one function call per cycle.
+# When enabled, the stats of PROFILE_EVERY consecutive cycles of a name are
+# merged and written to PROFILE_DIR as <name>-<time>.txt (top PROFILE_TOP
+# functions and allocation sites) plus a .prof file for pstats/snakeviz.
+# Only the newest PROFILE_KEEP dumps per name are kept.
+import io
+import os
+import sys
+import glob
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_MEMORY = os.getenv("PROFILE_MEMORY", "true").lower() in ("1", "true", "yes")  # tracemalloc as well
+PROFILE_EVERY = int(os.getenv("PROFILE_EVERY", "10"))  # Cycles merged into one dump
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "30"))  # Functions / allocation sites per dump
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))  # Dumps kept per name
+TRACEMALLOC_FRAMES = 1  # Sites are reported by line, deeper tracebacks only add cost
+# tracemalloc.reset_peak() is Python 3.9+; on 3.8 the traced peak is process-wide,
+# so a cycle's peak is only known when the cycle raised it (see _record)
+_RESET_PEAK = hasattr(tracemalloc, 'reset_peak')
+
+_NO_PROFILE = nullcontext()
+# Allocations made by the profiler itself (stats tables, snapshots) are not reported
+_OWN_FILES = {module.__file__ for module in (pstats, cProfile, tracemalloc)} | {__file__}
+# One profiler at a time: nested or concurrent (staged worker) cycles run
+# unprofiled instead of fighting over the interpreter's profiling hook
+_ACTIVE = threading.Lock()
+
+
+class CycleProfiler:
+    """Accumulates cProfile stats and allocation growth for one named cycle."""
+
+    def __init__(self, name, every=PROFILE_EVERY, top=PROFILE_TOP, directory=PROFILE_DIR,
+                 keep=PROFILE_KEEP, memory=PROFILE_MEMORY):
+        self.name = name
+        self.every = every
+        self.top = top
+        self.directory = directory
+        self.keep = keep
+        self.memory = memory
+        self._stats = None
+        self._cycles = 0
+        self._cycle_seconds = 0.0
+        self._baseline = None
+        self._peak = 0
+        self._start_peak = 0
+        self._peak_exact = True
+
+    @contextmanager
+    def cycle(self):
+        if not _ACTIVE.acquire(blocking=False):
+            yield
+            return
+        try:
+            if self.memory and not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            if self.memory and self._baseline is None:
+                self._baseline = _allocation_sites()
+            if self.memory:
+                if _RESET_PEAK:
+                    tracemalloc.reset_peak()
+                self._start_peak = tracemalloc.get_traced_memory()[1]
+
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                self._record(profiler, time.perf_counter() - start)
+        finally:
+            _ACTIVE.release()
+
+    def _record(self, profiler, seconds):
+        self._cycles += 1
+        self._cycle_seconds += seconds
+        if self._stats is None:
+            self._stats = pstats.Stats(profiler)
+        else:
+            self._stats.add(profiler)
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if not _RESET_PEAK and peak <= self._start_peak:
+                # The process-wide peak predates this cycle; what the cycle
+                # still holds is a lower bound of its own peak
+                peak = current
+                self._peak_exact = False
+            self._peak = max(self._peak, peak)
+        if self._cycles >= self.every:
+            try:
+                self.dump()
+            except OSError as e:
+                logging.error(f"Failed to write profile for {self.name}: {str(e)}")
+
+    def dump(self):
+        """Writes the accumulated window and starts a new one."""
+        if self._stats is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{self.name}-{datetime.now().strftime('%Y%m%dT%H%M%S')}")
+        self._stats.dump_stats(f"{path}.prof")
+
+        report = io.StringIO()
+        report.write(f"{self.name}: {self._cycles} cycles, {self._cycle_seconds:.2f}s total, "
+                     f"{self._cycle_seconds / self._cycles:.3f}s per cycle\n\n")
+        stats = pstats.Stats(f"{path}.prof", stream=report)
+        for sort in ('cumulative', 'tottime'):
+            report.write(f"=== Top {self.top} functions by {sort} time ===\n")
+            stats.sort_stats(sort).print_stats(self.top)
+
+        if self.memory:
+            sites = _allocation_sites()
+            growth = sorted(
+                ((size - self._baseline.get(site, (0, 0))[0], count - self._baseline.get(site, (0, 0))[1],
+                  site, size, count) for site, (size, count) in sites.items()),
+                key=lambda item: abs(item[0]), reverse=True
+            )
+            report.write(f"=== Allocation sites: top {self.top} by growth over the window ===\n")
+            report.write(f"Peak traced memory in a cycle: {self._peak / 1024 / 1024:.1f} MB"
+                         f"{'' if self._peak_exact else ' (at least; Python < 3.9 cannot reset the peak)'}\n")
+            for size_diff, count_diff, (filename, lineno), size, count in growth[:self.top]:
+                report.write(f"{filename}:{lineno}: {size / 1024:.1f} KiB ({size_diff / 1024:+.1f} KiB), "
+                             f"{count} blocks ({count_diff:+d})\n")
+            self._baseline = sites
+
+        with open(f"{path}.txt", 'w') as f:
+            f.write(report.getvalue())
+        logging.info(f"Wrote profile of {self._cycles} {self.name} cycles to {path}.txt")
+
+        self._stats = None
+        self._cycles = 0
+        self._cycle_seconds = 0.0
+        self._peak = 0
+        self._peak_exact = True
+        self._rotate()
+
+    def _rotate(self):
+        dumps = sorted(glob.glob(os.path.join(glob.escape(self.directory), f"{glob.escape(self.name)}-*.txt")))
+        for old in dumps[:-self.keep] if self.keep else []:
+            for path in (old, old[:-len('.txt')] + '.prof'):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def _allocation_sites():
+    """{(filename, lineno): (bytes, blocks)} of the live traced allocations."""
+    sites = {}
+    for stat in tracemalloc.take_snapshot().statistics('lineno'):
+        frame = stat.traceback[0]
+        if frame.filename not in _OWN_FILES:
+            sites[(frame.filename, frame.lineno)] = (stat.size, stat.count)
+    return sites
+
+
+def rss_bytes():
+    """
+    Resident set size of this process. Falls back to the lifetime peak
+    (getrusage) where /proc is not available, and to 0 where neither is.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+_PROFILERS = {}
+
+
+def profiled(name):
+    """
+    Context manager around one cycle of name: profiles it when
+    PROFILE_ENABLED, otherwise does nothing.
+    """
+    if not PROFILE_ENABLED:
+        return _NO_PROFILE
+    profiler = _PROFILERS.get(name)
+    if profiler is None:
+        profiler = _PROFILERS.setdefault(name, CycleProfiler(name))
+    return profiler.cycle()
@@ -1,86 +1,116 @@
 # query_alive_tokens.py
-import os
-from sqlalchemy import create_engine, text
-from dotenv import load_dotenv
+from sqlalchemy import text
 import logging
-from typing import List
-import time
+from typing import Iterator, List
+from utils.database import get_db_engine
+from utils.token_index import token_index
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_conn():
-    """Create database engine with connection pooling"""
-    load_dotenv()
-    db_url = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-    return create_engine(db_url, pool_size=5, max_overflow=10)
+# Keyset pages, newest first. (creation_timestamp, address) is unique, so each
+# page resumes strictly after the last row of the previous one: no OFFSET scan,
+# and concurrent inserts cannot shift rows into or out of a page already read.
+FIRST_PAGE_QUERY = text("""
+    SELECT address, creation_timestamp
+    FROM tokens
+    WHERE status IN :statuses AND creation_timestamp IS NOT NULL
+    ORDER BY creation_timestamp DESC, address DESC
+    LIMIT :limit
+""")
+NEXT_PAGE_QUERY = text("""
+    SELECT address, creation_timestamp
+    FROM tokens
+    WHERE status IN :statuses AND (creation_timestamp, address) < (:last_timestamp, :last_address)
+    ORDER BY creation_timestamp DESC, address DESC
+    LIMIT :limit
+""")
+# Row comparisons never match NULL, so rows without a timestamp get their own pass
+UNDATED_PAGE_QUERY = text("""
+    SELECT address
+    FROM tokens
+    WHERE status IN :statuses AND creation_timestamp IS NULL AND address > :last_address
+    ORDER BY address
+    LIMIT :limit
+""")
 
-# Global variable to track the last time frozen tokens were fetched
-LAST_FROZEN_FETCH_TIME = None
 
-def get_alive_tokens(batch_size: int = 1000) -> List[str]:
+def _fetch_page(engine, query, params) -> list:
+    # Plain buffered fetch: pages are bounded by LIMIT, so a server-side
+    # cursor would only add round trips before the rows are all held anyway
+    with engine.connect() as conn:
+        return conn.execute(query, params).fetchall()
+
+
+def iter_alive_token_batches(batch_size: int = 1000, include_frozen: bool = False) -> Iterator[List[str]]:
     """
-    Query the database for tokens with status 'alive' or 'alive + frozen' based on timing.
-    
+    Yield token addresses with status 'alive' (or 'alive' + 'frozen') one page at a time.
+
+    Each page is a short query on the shared pool from utils.database, so
+    callers can start working on the first page while later ones are read.
+    When the in-process token index is running (utils/token_index.py), pages
+    come from it in the same order without touching the database.
+
     Args:
-        batch_size: Number of records to fetch at a time (for memory efficiency)
-        
-    Returns:
-        List of token addresses
+        batch_size: Number of records per page
+        include_frozen: Also yield 'frozen' tokens (the updates pipeline refreshes
+            those on their own schedule, see utils/update_scheduler.py)
     """
-    global LAST_FROZEN_FETCH_TIME
-    
-    # Determine whether to include frozen tokens (every 12 hours)
-    current_time = time.time()
-    if LAST_FROZEN_FETCH_TIME is None:
-        LAST_FROZEN_FETCH_TIME = current_time  # Initialize on first run
-    elapsed_time = current_time - LAST_FROZEN_FETCH_TIME
-    
-    include_frozen = False
-    if elapsed_time >= 12 * 60 * 60:  # 12 hours in seconds
-        include_frozen = True
-        LAST_FROZEN_FETCH_TIME = current_time  # Reset timer
-    
-    engine = create_conn()
-    addresses = []
-    
+    if token_index.ready:
+        yield from token_index.iter_batches(batch_size, include_frozen)
+        return
+
+    statuses = ('alive', 'frozen') if include_frozen else ('alive',)
+    engine = get_db_engine()
+    total = 0
+
     try:
-        with engine.connect() as conn:
-            offset = 0
-            while True:
-                # Modify query to include frozen tokens conditionally
-                query = text("""
-                    SELECT address 
-                    FROM tokens 
-                    WHERE status IN :statuses
-                    ORDER BY creation_timestamp DESC
-                    LIMIT :limit OFFSET :offset
-                """)
-                
-                statuses = ('alive', 'frozen') if include_frozen else ('alive',)
-                result = conn.execute(query, {'statuses': statuses, 'limit': batch_size, 'offset': offset})
-                batch = [row[0] for row in result]
-                
-                if not batch:
-                    break
-                    
-                addresses.extend(batch)
-                offset += batch_size
-                
-                logger.info(f"Fetched {len(batch)} addresses (total: {len(addresses)})")
-                
-        logger.info(f"Total {'alive + frozen' if include_frozen else 'alive'} tokens found: {len(addresses)}")
-        return addresses
-        
+        rows = _fetch_page(engine, FIRST_PAGE_QUERY, {'statuses': statuses, 'limit': batch_size})
+        while rows:
+            total += len(rows)
+            logger.info(f"Fetched {len(rows)} addresses (total: {total})")
+            yield [row[0] for row in rows]
+            last_address, last_timestamp = rows[-1]
+            rows = _fetch_page(engine, NEXT_PAGE_QUERY, {
+                'statuses': statuses, 'limit': batch_size,
+                'last_timestamp': last_timestamp, 'last_address': last_address
+            })
+
+        last_address = ''
+        while True:
+            rows = _fetch_page(engine, UNDATED_PAGE_QUERY, {
+                'statuses': statuses, 'limit': batch_size, 'last_address': last_address
+            })
+            if not rows:
+                break
+            total += len(rows)
+            logger.info(f"Fetched {len(rows)} addresses without creation_timestamp (total: {total})")
+            yield [row[0] for row in rows]
+            last_address = rows[-1][0]
+
+        logger.info(f"Total {'alive + frozen' if include_frozen else 'alive'} tokens found: {total}")
+
     except Exception as e:
         logger.error(f"Error querying tokens: {str(e)}")
         raise
-    finally:
-        engine.dispose()
+
+
+def get_alive_tokens(batch_size: int = 1000, include_frozen: bool = False) -> List[str]:
+    """
+    Query the database for tokens with status 'alive' (or 'alive' + 'frozen').
+
+    Args:
+        batch_size: Number of records to fetch at a time (for memory efficiency)
+        include_frozen: Also return 'frozen' tokens
+
+    Returns:
+        List of token addresses
+    """
+    return [address for batch in iter_alive_token_batches(batch_size, include_frozen) for address in batch]
 
 if __name__ == "__main__":
     # Example usage
     alive_tokens = get_alive_tokens()
     print(f"First 5 alive tokens: {alive_tokens[:5]}")
-    print(f"Total alive tokens: {len(alive_tokens)}")
\ No newline at end of file
+    print(f"Total alive tokens: {len(alive_tokens)}")
@@ -0,0 +1,179 @@
+# utils/raw_archive.py
+# Append-only archive of raw API responses, one directory per stream
+# ('new_pairs', 'token_info'). Each response is written as one gzip-compressed
+# JSONL line as soon as it arrives, so memory use does not grow with the sweep.
+# Segments rotate by size or age; each closed segment gets a line in the
+# stream's index.jsonl with its time range, which lets history be read back
+# (iter_responses) for reprocessing without scraping again.
+import os
+import gzip
+import time
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from utils.json_codec import dumps, loads
+
+RAW_ARCHIVE_ENABLED = os.getenv('RAW_ARCHIVE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+RAW_ARCHIVE_DIR = os.getenv('RAW_ARCHIVE_DIR', 'raw_archive')
+RAW_ARCHIVE_SEGMENT_MB = float(os.getenv('RAW_ARCHIVE_SEGMENT_MB', '64'))  # Compressed size
+RAW_ARCHIVE_SEGMENT_SECONDS = float(os.getenv('RAW_ARCHIVE_SEGMENT_SECONDS', '3600'))
+COMPRESS_LEVEL = 6
+
+INDEX_FILE = 'index.jsonl'
+SEGMENT_SUFFIX = '.jsonl.gz'
+
+
+class Segment:
+    """One open gzip JSONL file and the time range of what was written to it."""
+
+    def __init__(self, path):
+        self.path = path
+        self.opened = time.time()
+        self.start = None
+        self.end = None
+        self.records = 0
+        self._raw = open(path, 'wb')
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=COMPRESS_LEVEL)
+
+    @property
+    def size(self):
+        """Compressed bytes on disk so far (minus what zlib still buffers)."""
+        return self._raw.tell()
+
+    def write(self, ts, line):
+        self._gzip.write(line)
+        self.start = ts if self.start is None else self.start
+        self.end = ts
+        self.records += 1
+
+    def close(self):
+        self._gzip.close()
+        self._raw.close()
+
+
+class RawArchive:
+    """
+    Thread-safe writer for one archive directory. append() encodes outside
+    the lock; only the write to the open segment is serialized.
+    """
+
+    def __init__(self, root=RAW_ARCHIVE_DIR, segment_bytes=RAW_ARCHIVE_SEGMENT_MB * 1024 * 1024,
+                 segment_seconds=RAW_ARCHIVE_SEGMENT_SECONDS):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self._segments = {}
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _open_segment(self, stream):
+        directory = os.path.join(self.root, stream)
+        os.makedirs(directory, exist_ok=True)
+        # pid keeps two processes writing the same stream apart
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        return Segment(os.path.join(directory, f"{stream}-{stamp}-{os.getpid()}{SEGMENT_SUFFIX}"))
+
+    def _close_segment(self, stream):
+        segment = self._segments.pop(stream, None)
+        if segment is None:
+            return
+        segment.close()
+        if not segment.records:
+            os.remove(segment.path)
+            return
+        entry = {
+            'file': os.path.basename(segment.path), 'start': segment.start, 'end': segment.end,
+            'records': segment.records, 'bytes': os.path.getsize(segment.path),
+        }
+        with open(os.path.join(self.root, stream, INDEX_FILE), 'ab') as f:
+            f.write(dumps(entry) + b'\n')
+        logging.info(f"Closed raw archive segment {entry['file']} ({entry['records']} responses, {entry['bytes']} bytes)")
+
+    def append(self, stream, data, ts=None):
+        """Archives one decoded response body under stream."""
+        ts = time.time() if ts is None else ts
+        line = dumps({'ts': ts, 'data': data}) + b'\n'
+        with self._lock:
+            segment = self._segments.get(stream)
+            if segment is not None and (segment.size >= self.segment_bytes
+                                        or ts - segment.opened >= self.segment_seconds):
+                self._close_segment(stream)
+                segment = None
+            if segment is None:
+                segment = self._segments[stream] = self._open_segment(stream)
+            segment.write(ts, line)
+
+    def rotate(self, stream=None):
+        """Closes the open segment of stream (or of every stream) and indexes it."""
+        with self._lock:
+            for name in [stream] if stream else list(self._segments):
+                self._close_segment(name)
+
+    def close(self):
+        atexit.unregister(self.close)
+        self.rotate()
+
+
+raw_archive = RawArchive()
+
+
+def archive_response(stream, data):
+    """Archives data under stream when RAW_ARCHIVE_ENABLED; never raises."""
+    if not RAW_ARCHIVE_ENABLED:
+        return
+    try:
+        raw_archive.append(stream, data)
+    except Exception as e:
+        logging.error(f"Failed to archive {stream} response: {str(e)}")
+
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+def list_segments(stream, start=None, end=None, root=RAW_ARCHIVE_DIR):
+    """
+    Index entries of the segments of stream that overlap [start, end]
+    (epoch seconds or datetimes), oldest first. Segment files missing from
+    the index (still open, or left by a crash) are included with no range.
+    """
+    start, end = _timestamp(start), _timestamp(end)
+    directory = os.path.join(root, stream)
+    if not os.path.isdir(directory):
+        return []
+
+    entries = []
+    index_path = os.path.join(directory, INDEX_FILE)
+    if os.path.exists(index_path):
+        with open(index_path, 'rb') as f:
+            entries = [loads(line) for line in f if line.strip()]
+    indexed = {entry['file'] for entry in entries}
+    entries += [
+        {'file': name, 'start': None, 'end': None, 'records': None, 'bytes': None}
+        for name in sorted(os.listdir(directory))
+        if name.endswith(SEGMENT_SUFFIX) and name not in indexed
+    ]
+    return [
+        entry for entry in entries
+        if entry['start'] is None
+        or ((end is None or entry['start'] <= end) and (start is None or entry['end'] >= start))
+    ]
+
+
+def iter_responses(stream, start=None, end=None, root=RAW_ARCHIVE_DIR):
+    """Yields (ts, data) for every archived response of stream in [start, end], one at a time."""
+    start, end = _timestamp(start), _timestamp(end)
+    for entry in list_segments(stream, start, end, root):
+        path = os.path.join(root, stream, entry['file'])
+        try:
+            with gzip.open(path, 'rb') as f:
+                for line in f:
+                    record = loads(line)
+                    if (start is None or record['ts'] >= start) and (end is None or record['ts'] <= end):
+                        yield record['ts'], record['data']
+        except (EOFError, OSError, ValueError) as e:
+            # The tail of a segment that was never closed cleanly
+            logging.warning(f"Stopped reading truncated segment {entry['file']}: {str(e)}")
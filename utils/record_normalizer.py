@@ -0,0 +1,158 @@
+# utils/record_normalizer.py
+import logging
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+EPOCH = datetime(1970, 1, 1)
+
+# Values treated as missing rather than invalid (same rules as clean_numeric_columns)
+MISSING_VALUES = ('', 'None', 'nan')
+
+# Same mapping convert_boolean_columns is called with; anything else is missing
+BOOL_MAP = {
+    'true': True, 'false': False,
+    '1': True, '0': False,
+    'yes': True, 'no': False,
+    't': True, 'f': False
+}
+
+# target:  output column name
+# paths:   dotted source paths, tried in order; the first non-null value wins
+# type:      one of CONVERTERS
+# default:   value used when the converted result is None
+# precision: (precision, scale) of the NUMERIC column a 'numeric' field is
+#            loaded into, used by the columnar path's decimal type
+Field = namedtuple('Field', ['target', 'paths', 'type', 'default', 'precision'], defaults=(None, None))
+
+
+def to_raw(value, target):
+    return value
+
+
+def to_text(value, target):
+    if value is None:
+        return None
+    return str(value).strip()
+
+
+def to_numeric(value, target):
+    """Exact Decimal, or None for missing/invalid values."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if value in MISSING_VALUES:
+            return None
+    else:
+        value = str(value)
+    try:
+        return Decimal(value)
+    except (InvalidOperation, ValueError):
+        logging.warning(f"Invalid value '{value}' in column '{target}'")
+        return None
+
+
+def to_bool(value, target):
+    """True/False, or None for missing/unrecognised values (give the field a default to fill them)."""
+    if value is None:
+        return None
+    return BOOL_MAP.get(str(value).lower())
+
+
+def to_timestamp(value, target):
+    """UNIX seconds to a naive UTC datetime, or None."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return EPOCH + timedelta(seconds=float(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+CONVERTERS = {
+    'raw': to_raw,
+    'text': to_text,
+    'numeric': to_numeric,
+    'integer': to_numeric,
+    'bool': to_bool,
+    'timestamp': to_timestamp,
+}
+
+
+def _compile_paths(field):
+    return tuple(tuple(path.split('.')) for path in field.paths)
+
+
+def _lookup(record, paths):
+    """First non-null value found along paths, or None."""
+    value = None
+    for path in paths:
+        value = record
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is not None:
+            break
+    return value
+
+
+def compile_normalizer(fields):
+    """
+    Compiles a field schema into a function that maps one raw (nested) record
+    straight to one typed output row, without flattening or intermediate frames.
+    """
+    compiled = []
+    for field in fields:
+        if field.type not in CONVERTERS:
+            raise ValueError(f"Unknown field type '{field.type}' for column '{field.target}'")
+        compiled.append((field.target, _compile_paths(field), CONVERTERS[field.type], field.default))
+
+    def normalize(record):
+        row = {}
+        for target, paths, convert, default in compiled:
+            value = convert(_lookup(record, paths), target)
+            row[target] = default if value is None else value
+        return row
+
+    normalize.columns = [field.target for field in fields]
+    return normalize
+
+
+def compile_extractor(fields):
+    """
+    Compiles a field schema into a function that pulls the raw (unconverted)
+    values of a batch of records into one list per output column, for callers
+    that convert whole columns at once.
+    """
+    compiled = [(field.target, _compile_paths(field)) for field in fields]
+
+    def extract(records):
+        # Resolve each nested parent (e.g. base_token_info) once per batch
+        # instead of once per field; missing parents become empty dicts so the
+        # per-field loops below are plain .get() calls
+        empty = {}
+        parents = {(): [record if isinstance(record, dict) else empty for record in records]}
+
+        def parent_values(prefix):
+            if prefix not in parents:
+                parents[prefix] = [
+                    value if isinstance(value, dict) else empty
+                    for value in (parent.get(prefix[-1]) for parent in parent_values(prefix[:-1]))
+                ]
+            return parents[prefix]
+
+        columns = {}
+        for target, paths in compiled:
+            column = None
+            for path in paths:
+                key = path[-1]
+                values = [parent.get(key) for parent in parent_values(path[:-1])]
+                if column is None:
+                    column = values
+                else:
+                    column = [a if a is not None else b for a, b in zip(column, values)]
+            columns[target] = column if column is not None else [None] * len(records)
+        return columns
+
+    extract.columns = [field.target for field in fields]
+    return extract
@@ -0,0 +1,295 @@
+#seen_index.py
+# Dedup backends for TokenFilter. Every backend answers the same two questions
+# for a batch of normalized base addresses: which were seen before
+# (contains_many) and remember these (add_many).
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Set
+
+import numpy as np
+from utils.json_codec import JSONDecodeError, load_file, dump_file
+
+SEEN_TOKENS_FILE = "seen_base_addresses.json"  # Compacted snapshot, oldest first
+SEEN_TOKENS_LOG = "seen_base_addresses.log"  # Append-only, one address per line
+MAX_TRACKED_TOKENS = 2000
+COMPACT_LOG_LINES = 5000  # Rewrite the snapshot once the log holds this many lines
+
+SEEN_TOKENS_DB = "seen_base_addresses.sqlite3"
+BLOOM_CAPACITY = 10_000_000  # Expected addresses before the filter is resized
+BLOOM_ERROR_RATE = 0.01
+BLOOM_SAVE_EVERY = 10_000  # Persist the Bloom bits after this many new addresses
+SQLITE_IN_CHUNK = 500  # Max bound parameters per IN (...) lookup
+
+# 'recent' keeps the last MAX_TRACKED_TOKENS in memory; 'sqlite' keeps every
+# address ever seen on disk behind a Bloom filter
+SEEN_INDEX_BACKEND = os.getenv("SEEN_INDEX_BACKEND", "recent")
+
+
+class RecentSeenIndex:
+    """Bounded LRU of the most recently seen addresses, persisted as snapshot + append-only log."""
+
+    def __init__(self, snapshot_file=SEEN_TOKENS_FILE, log_file=SEEN_TOKENS_LOG,
+                 max_tracked=MAX_TRACKED_TOKENS):
+        self.snapshot_file = snapshot_file
+        self.log_file = log_file
+        self.max_tracked = max_tracked
+        # Insertion-ordered: oldest first, so eviction is popitem(last=False)
+        self.addresses = OrderedDict()
+        self._log_lines = 0
+        self._load()
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def __contains__(self, base_address):
+        return base_address in self.addresses
+
+    def contains_many(self, base_addresses: Iterable[str]) -> Set[str]:
+        return {base_address for base_address in base_addresses if base_address in self.addresses}
+
+    def add_many(self, base_addresses: List[str]):
+        for base_address in base_addresses:
+            self._remember(base_address)
+        self._save(base_addresses)
+
+    def _remember(self, base_address: str):
+        """Mark an address as most recently seen and evict the oldest beyond the limit."""
+        if base_address in self.addresses:
+            self.addresses.move_to_end(base_address)
+        else:
+            self.addresses[base_address] = None
+            if len(self.addresses) > self.max_tracked:
+                self.addresses.popitem(last=False)
+
+    def _load(self):
+        """Load the compacted snapshot, then replay the append-only log on top of it."""
+        if os.path.exists(self.snapshot_file):
+            try:
+                loaded_data = load_file(self.snapshot_file)
+                logging.debug("Loaded Data: %s", loaded_data)
+                for base_address in loaded_data:
+                    self._remember(base_address)
+            except (JSONDecodeError, FileNotFoundError):
+                logging.warning("Failed to load seen base addresses. Initializing an empty set.")
+                self.addresses = OrderedDict()
+        else:
+            logging.info("Seen base addresses file does not exist. Initializing an empty set.")
+
+        if os.path.exists(self.log_file):
+            try:
+                with open(self.log_file, 'r') as f:
+                    for line in f:
+                        base_address = line.strip()
+                        if base_address:  # A torn last line from a crash is just skipped
+                            self._remember(base_address)
+                            self._log_lines += 1
+            except OSError as e:
+                logging.warning(f"Failed to replay seen addresses log: {str(e)}")
+
+    def _save(self, base_addresses: List[str]):
+        """Append the addresses seen this cycle to the log, compacting it when it grows too long."""
+        try:
+            if base_addresses:
+                with open(self.log_file, 'a') as f:
+                    f.write(''.join(f"{base_address}\n" for base_address in base_addresses))
+                self._log_lines += len(base_addresses)
+            if self._log_lines >= COMPACT_LOG_LINES:
+                self._compact()
+        except Exception as e:
+            logging.error(f"Failed to save seen addresses: {str(e)}")
+
+    def _compact(self):
+        """Rewrite the snapshot (oldest first) atomically and start a fresh log."""
+        dump_file(list(self.addresses), self.snapshot_file, atomic=True)
+        open(self.log_file, 'w').close()
+        self._log_lines = 0
+        logging.info(f"Compacted seen addresses snapshot ({len(self.addresses)} tokens)")
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings. Positions come from one blake2b digest
+    per key (double hashing), so the bits are stable across processes and can
+    be saved to disk.
+    """
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * np.log(error_rate) / (np.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * np.log(2))))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, keys: List[str]) -> np.ndarray:
+        digests = b''.join(hashlib.blake2b(key.encode(), digest_size=16).digest() for key in keys)
+        halves = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        # uint64 arithmetic wraps on overflow, which is fine for hashing
+        return (halves[:, :1] + steps * halves[:, 1:]) % np.uint64(self.num_bits)
+
+    def add_many(self, keys: List[str]):
+        if not keys:
+            return
+        positions = self._positions(keys).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                         np.left_shift(np.uint64(1), positions & np.uint64(7)).astype(np.uint8))
+
+    def might_contain_many(self, keys: List[str]) -> np.ndarray:
+        """Boolean array: False means definitely not present."""
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(keys)
+        hits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return hits.all(axis=1)
+
+    def save(self, path):
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'wb') as f:
+            np.save(f, self.bits)
+        os.replace(tmp_file, path)
+
+    def load(self, path):
+        with open(path, 'rb') as f:
+            bits = np.load(f)
+        if bits.shape != self.bits.shape:
+            raise ValueError("Bloom filter file does not match the configured size")
+        self.bits = bits
+
+
+class SqliteSeenIndex:
+    """
+    Every address ever seen, in a SQLite key store, with an in-memory Bloom
+    filter in front. Most addresses in a cycle are new, and the filter answers
+    those without touching the database; only probable hits are checked on disk.
+    """
+
+    def __init__(self, db_file=SEEN_TOKENS_DB, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.db_file = db_file
+        self.bloom_file = f"{db_file}.bloom.npy"
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (address TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+        self.count = self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        saved = self._saved_bloom()
+        if saved and saved[1] >= max(capacity, self.count):
+            # Keep the size the saved filter was built with; it is only
+            # re-derived when there is none or the store has outgrown it
+            capacity = saved[1]
+        else:
+            capacity = max(capacity, self.count * 2)
+        self.bloom = BloomFilter(capacity, error_rate)
+        self._load_bloom(saved)
+        atexit.register(self.close)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, base_address):
+        return base_address in self.contains_many([base_address])
+
+    def _saved_bloom(self):
+        """[count, capacity] the saved filter was written for, or None."""
+        saved = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'bloom'"
+        ).fetchone()
+        return json.loads(saved[0]) if saved else None
+
+    def _load_bloom(self, saved):
+        """Use the saved filter if it was written for the current store, otherwise rebuild it."""
+        if saved == [self.count, self.bloom.capacity] and os.path.exists(self.bloom_file):
+            try:
+                self.bloom.load(self.bloom_file)
+                return
+            except (OSError, ValueError) as e:
+                logging.warning(f"Failed to load Bloom filter, rebuilding: {str(e)}")
+        self._rebuild_bloom(self.bloom.capacity)
+
+    def _rebuild_bloom(self, capacity):
+        logging.info(f"Building Bloom filter for {self.count} seen addresses (capacity {capacity})")
+        self.bloom = BloomFilter(capacity, self.error_rate)
+        cursor = self.conn.execute("SELECT address FROM seen")
+        while True:
+            rows = cursor.fetchmany(100_000)
+            if not rows:
+                break
+            self.bloom.add_many([row[0] for row in rows])
+        self.save()
+
+    def save(self):
+        """Persist the Bloom filter together with the store size it matches."""
+        with self._lock:
+            self.bloom.save(self.bloom_file)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('bloom', ?)",
+                (json.dumps([self.count, self.bloom.capacity]),)
+            )
+            self.conn.commit()
+            self._unsaved = 0
+
+    def close(self):
+        """Save the Bloom filter and release the database."""
+        atexit.unregister(self.close)
+        self.save()
+        self.conn.close()
+
+    def contains_many(self, base_addresses: Iterable[str]) -> Set[str]:
+        base_addresses = list(base_addresses)
+        maybe = [
+            base_address for base_address, hit
+            in zip(base_addresses, self.bloom.might_contain_many(base_addresses)) if hit
+        ]
+        found = set()
+        with self._lock:
+            for i in range(0, len(maybe), SQLITE_IN_CHUNK):
+                chunk = maybe[i:i + SQLITE_IN_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(
+                    row[0] for row in
+                    self.conn.execute(f"SELECT address FROM seen WHERE address IN ({placeholders})", chunk)
+                )
+        return found
+
+    def add_many(self, base_addresses: List[str]):
+        if not base_addresses:
+            return
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen (address) VALUES (?)",
+                ((base_address,) for base_address in base_addresses)
+            )
+            self.conn.commit()
+            added = self.conn.total_changes - before
+            self.count += added
+            self._unsaved += added
+        self.bloom.add_many(base_addresses)
+
+        if self.count > self.bloom.capacity:
+            # Past capacity the false positive rate climbs; double the filter
+            self._rebuild_bloom(max(self.bloom.capacity, self.count) * 2)
+        elif self._unsaved >= BLOOM_SAVE_EVERY:
+            self.save()
+
+
+def create_seen_index(backend=None):
+    """Build the dedup backend selected by SEEN_INDEX_BACKEND."""
+    backend = backend or SEEN_INDEX_BACKEND
+    if backend == 'recent':
+        return RecentSeenIndex()
+    if backend == 'sqlite':
+        return SqliteSeenIndex()
+    raise ValueError(f"Unknown seen index backend '{backend}', expected 'recent' or 'sqlite'")
@@ -0,0 +1,178 @@
+# utils/snapshot_store.py
+# Append-only metric history in token_snapshots (see queries.sql). The table is
+# range-partitioned on captured_at; every write lands in the newest partition,
+# so its cost does not depend on how much history is kept, and retention drops
+# or detaches whole partitions instead of deleting rows.
+import os
+import time
+import logging
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from utils.columnar import pa
+from utils.pg_copy import copy_source, data_columns
+
+SNAPSHOTS_ENABLED = os.getenv('SNAPSHOTS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+SNAPSHOT_PARTITION = os.getenv('SNAPSHOT_PARTITION', 'day')  # 'day' or 'hour'
+SNAPSHOT_RETENTION_DAYS = float(os.getenv('SNAPSHOT_RETENTION_DAYS', '30'))
+SNAPSHOT_RETIRE_MODE = os.getenv('SNAPSHOT_RETIRE_MODE', 'drop')  # 'drop' or 'detach'
+RETIRE_CHECK_INTERVAL = 3600  # Seconds between retention passes
+PARTITIONS_AHEAD = 1  # Also create the next partition so the boundary never blocks a write
+
+SNAPSHOT_TABLE = 'token_snapshots'
+# Metric columns copied from a loader batch; columns the batch lacks are NULL
+SNAPSHOT_COLUMNS = [
+    'price', 'market_cap', 'liquidity', 'quote_reserve', 'volume', 'swaps', 'buys', 'sells',
+    'holder_count', 'top_10_holder_rate', 'smart_degen_count', 'sniper_count',
+]
+
+PARTITION_STEPS = {
+    'day': (timedelta(days=1), '%Y%m%d'),
+    'hour': (timedelta(hours=1), '%Y%m%d%H'),
+}
+
+# Partitions known to exist in this process, and when retention last ran
+_KNOWN_PARTITIONS = set()
+_LAST_RETIRE = 0.0
+_LOCK = threading.Lock()
+
+
+def partition_bounds(moment, granularity=None):
+    """(name, start, end) of the partition holding moment."""
+    step, suffix = PARTITION_STEPS[granularity or SNAPSHOT_PARTITION]
+    if step == timedelta(days=1):
+        start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        start = moment.replace(minute=0, second=0, microsecond=0)
+    return f"{SNAPSHOT_TABLE}_p{start.strftime(suffix)}", start, start + step
+
+
+def ensure_partitions(engine, moment):
+    """Creates the partition for moment (and the next ones) if missing."""
+    wanted = []
+    name, start, end = partition_bounds(moment)
+    for _ in range(PARTITIONS_AHEAD + 1):
+        if name not in _KNOWN_PARTITIONS:
+            wanted.append((name, start, end))
+        name, start, end = partition_bounds(end)
+    if not wanted:
+        return
+
+    with engine.begin() as conn:
+        # Serializes creators across processes (both pipelines write snapshots)
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {'table': SNAPSHOT_TABLE})
+        for name, start, end in wanted:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {SNAPSHOT_TABLE} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+    _KNOWN_PARTITIONS.update(name for name, _, _ in wanted)
+
+
+def list_partitions(engine):
+    """[(name, upper bound)] of the attached partitions, oldest first."""
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:table)
+        """), {'table': SNAPSHOT_TABLE}).fetchall()
+    partitions = []
+    for name, bound in rows:
+        # bound: FOR VALUES FROM ('...') TO ('...')
+        upper = bound.rsplit("'", 2)[-2]
+        partitions.append((name, datetime.fromisoformat(upper)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def retire_partitions(engine, retention_days=None, mode=None, now=None):
+    """
+    Drops (or detaches, keeping the data as a standalone table) every partition
+    whose whole range is older than the retention window.
+    """
+    retention_days = SNAPSHOT_RETENTION_DAYS if retention_days is None else retention_days
+    mode = mode or SNAPSHOT_RETIRE_MODE
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+
+    retired = []
+    for name, upper in list_partitions(engine):
+        if upper > cutoff:
+            break
+        with engine.begin() as conn:
+            if mode == 'detach':
+                conn.execute(text(f"ALTER TABLE {SNAPSHOT_TABLE} DETACH PARTITION {name}"))
+            else:
+                conn.execute(text(f"DROP TABLE {name}"))
+        _KNOWN_PARTITIONS.discard(name)
+        retired.append(name)
+    if retired:
+        logging.info(f"Retired {len(retired)} snapshot partitions ({mode}): {', '.join(retired)}")
+    return retired
+
+
+def _snapshot_batch(data, source, captured_at):
+    """The batch reduced to address + snapshot metrics, plus the per-batch constants."""
+    present = set(data_columns(data))
+    columns = ['address'] + [col for col in SNAPSHOT_COLUMNS if col in present]
+    if pa is not None and isinstance(data, pa.Table):
+        batch = data.select(columns)
+        batch = batch.append_column('captured_at', pa.array([captured_at] * len(batch), pa.timestamp('us')))
+        batch = batch.append_column('source', pa.array([source] * len(batch), pa.string()))
+    else:
+        batch = data[columns].assign(captured_at=captured_at, source=source)
+    return batch, columns + ['captured_at', 'source']
+
+
+def write_snapshots(engine, data, source):
+    """
+    Appends one row per token in data (DataFrame or pyarrow Table from a
+    transform stage) to token_snapshots with a single COPY. Rows go through
+    the parent table, which routes them to the current partition.
+    """
+    global _LAST_RETIRE
+    if not SNAPSHOTS_ENABLED or not len(data):
+        return 0
+
+    captured_at = datetime.utcnow()
+    with _LOCK:
+        ensure_partitions(engine, captured_at)
+        if time.time() - _LAST_RETIRE >= RETIRE_CHECK_INTERVAL:
+            _LAST_RETIRE = time.time()
+            retire_partitions(engine, now=captured_at)
+
+    batch, columns = _snapshot_batch(data, source, captured_at)
+    quoted = ', '.join(f'"{col}"' for col in columns)
+    with engine.begin() as conn:
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {SNAPSHOT_TABLE} ({quoted}) FROM STDIN WITH (FORMAT csv)",
+                copy_source(batch, columns)
+            )
+        finally:
+            cursor.close()
+    logging.info(f"Wrote {len(batch)} {source} snapshots")
+    return len(batch)
+
+
+def record_snapshots(engine, data, source):
+    """write_snapshots for the loaders: history is best effort and never fails a load."""
+    try:
+        return write_snapshots(engine, data, source)
+    except Exception as e:
+        logging.warning(f"Failed to write {source} snapshots: {str(e)}")
+        _KNOWN_PARTITIONS.clear()
+        return 0
+
+
+def get_token_history(engine, address, since=None, until=None):
+    """Snapshots of one token in [since, until), oldest first; prunes to the matching partitions."""
+    until = until or datetime.utcnow()
+    since = since or until - timedelta(days=1)
+    with engine.connect() as conn:
+        return pd.read_sql(text(f"""
+            SELECT * FROM {SNAPSHOT_TABLE}
+            WHERE address = :address AND captured_at >= :since AND captured_at < :until
+            ORDER BY captured_at
+        """), conn, params={'address': address, 'since': since, 'until': until})
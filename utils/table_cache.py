@@ -0,0 +1,89 @@
+# utils/table_cache.py
+import os
+import time
+import logging
+import threading
+from sqlalchemy import Table, MetaData, text, or_
+from sqlalchemy.dialects.postgresql import insert
+
+# How often (seconds) a cached table is checked against the catalog fingerprint
+SCHEMA_CHECK_INTERVAL = float(os.getenv('SCHEMA_CHECK_INTERVAL', '300'))
+
+# Cheap catalog fingerprint: changes whenever a column is added, dropped,
+# renamed or re-typed
+SCHEMA_VERSION_QUERY = text("""
+    SELECT md5(string_agg(attname || ':' || atttypid::text || ':' || atttypmod::text, ',' ORDER BY attnum))
+    FROM pg_attribute
+    WHERE attrelid = to_regclass(:table_name) AND attnum > 0 AND NOT attisdropped
+""")
+
+# Process-wide cache, keyed by (engine url, table name)
+_TABLE_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
+class TableSchema:
+    """Reflected table plus everything the loaders derive from it."""
+
+    def __init__(self, table, version, conflict_column='address'):
+        self.table = table
+        self.version = version
+        self.checked_at = time.time()
+        self.columns = [c.name for c in table.columns]
+        self.column_set = frozenset(self.columns)
+        self.conflict_column = conflict_column
+
+        # Built once; executemany compiles it per distinct key set and
+        # SQLAlchemy caches the compiled form. The WHERE guard leaves rows
+        # whose values are all unchanged alone (no new tuple, no index writes).
+        stmt = insert(table)
+        value_columns = [name for name in self.columns if name != conflict_column]
+        self.upsert = stmt.on_conflict_do_update(
+            index_elements=[conflict_column],
+            set_={name: stmt.excluded[name] for name in value_columns},
+            where=or_(*[table.c[name].is_distinct_from(stmt.excluded[name]) for name in value_columns])
+        )
+
+    def project(self, records):
+        """Keeps only keys that are real columns (set lookup per key)."""
+        column_set = self.column_set
+        return [{k: v for k, v in record.items() if k in column_set} for record in records]
+
+
+def _schema_version(conn, table_name):
+    return conn.execute(SCHEMA_VERSION_QUERY, {'table_name': table_name}).scalar()
+
+
+def get_table_schema(engine, table_name='tokens'):
+    """
+    Returns the cached TableSchema for table_name, reflecting it on first use.
+    Every SCHEMA_CHECK_INTERVAL seconds the catalog fingerprint is compared and
+    the table is re-reflected if it changed.
+    """
+    key = (str(engine.url), table_name)
+    with _CACHE_LOCK:
+        schema = _TABLE_CACHE.get(key)
+        if schema is not None and time.time() - schema.checked_at < SCHEMA_CHECK_INTERVAL:
+            return schema
+
+        with engine.connect() as conn:
+            version = _schema_version(conn, table_name)
+            if schema is not None and schema.version == version:
+                schema.checked_at = time.time()
+                return schema
+
+            if schema is not None:
+                logging.info(f"Schema of '{table_name}' changed, reflecting it again")
+            table = Table(table_name, MetaData(), autoload_with=conn)
+
+        schema = TableSchema(table, version)
+        _TABLE_CACHE[key] = schema
+        return schema
+
+
+def invalidate_table_schema(table_name=None):
+    """Drops cached schemas (all of them, or only those for table_name)."""
+    with _CACHE_LOCK:
+        for key in list(_TABLE_CACHE):
+            if table_name is None or key[1] == table_name:
+                del _TABLE_CACHE[key]
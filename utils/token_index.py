@@ -0,0 +1,288 @@
+# utils/token_index.py
+# In-process index of the alive and frozen tokens and the attributes the
+# updates pipeline schedules by (creation time, price, volume, liquidity,
+# price at the previous update), so sweeps and the scheduler read them with a
+# dict lookup instead of a query.
+#   - built once from tokens (+ token_update_schedule) by start()
+#   - kept current by this process's loaders (record_loaded / record_rescheduled)
+#   - rows inserted, deleted or re-statused by anyone else (the new-pairs
+#     process, manual edits) arrive through the token_changes NOTIFY channel
+#     fed by the triggers in queries.sql; a listener thread applies them
+#   - if the listener connection drops, notifications may have been missed,
+#     so the index is rebuilt after reconnecting; it is also rebuilt every
+#     TOKEN_INDEX_REFRESH_SECONDS as a safety net for edits the triggers do
+#     not cover (e.g. attribute changes made by hand)
+# Disabled unless TOKEN_INDEX_ENABLED; until start() has run, ready is False
+# and callers keep querying the database.
+import os
+import time
+import select
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime
+from typing import Iterator, List, Optional
+from sqlalchemy import text
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from utils.columnar import pa
+from utils.database import create_db_engine
+from utils.json_codec import loads
+from utils.metrics import TOKEN_INDEX_TOKENS
+
+TOKEN_INDEX_ENABLED = os.getenv("TOKEN_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+TOKEN_INDEX_REFRESH_SECONDS = float(os.getenv("TOKEN_INDEX_REFRESH_SECONDS", "3600"))  # Full rebuild interval
+TOKEN_INDEX_CHANNEL = 'token_changes'  # See notify_token_change() in queries.sql
+INDEXED_STATUSES = ('alive', 'frozen')
+LISTEN_POLL_SECONDS = 5
+RECONNECT_DELAY = 10
+
+TokenEntry = namedtuple('TokenEntry', ['status', 'creation_timestamp', 'price', 'volume', 'liquidity',
+                                       'last_price', 'updated_at'])
+# Loaded columns mirrored into the index
+ATTRIBUTE_COLUMNS = ('status', 'creation_timestamp', 'price', 'volume', 'liquidity')
+
+BOOTSTRAP_QUERY = text("""
+    SELECT t.address, t.status, t.creation_timestamp, t.price, t.volume, t.liquidity,
+           s.last_price, s.last_updated_at
+    FROM tokens t LEFT JOIN token_update_schedule s ON s.address = t.address
+    WHERE t.status IN :statuses
+""")
+FETCH_QUERY = text("""
+    SELECT t.address, t.status, t.creation_timestamp, t.price, t.volume, t.liquidity,
+           s.last_price, s.last_updated_at
+    FROM tokens t LEFT JOIN token_update_schedule s ON s.address = t.address
+    WHERE t.address = ANY(:addresses) AND t.status IN :statuses
+""")
+
+
+def _is_missing(value):
+    # None, NaN and NaT (the latter two are not equal to themselves)
+    return value is None or value != value
+
+
+def _columns(data, columns):
+    """{column: [values]} of a DataFrame or Arrow table, missing values as None."""
+    if pa is not None and isinstance(data, pa.Table):
+        names = set(data.column_names)
+        return {col: data.column(col).to_pylist() for col in columns if col in names}
+    return {col: [None if _is_missing(value) else value for value in data[col].tolist()]
+            for col in columns if col in data.columns}
+
+
+def _entry(row):
+    address, status, creation_timestamp, price, volume, liquidity, last_price, updated_at = row
+    return address, TokenEntry(status, creation_timestamp, price, volume, liquidity, last_price, updated_at)
+
+
+class TokenIndex:
+    def __init__(self):
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self._journal = None  # Loader changes made while a rebuild is reading, replayed after it
+        self._stop = threading.Event()
+        self._listener = None
+        self.engine = None
+        self.ready = False
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def get(self, address) -> Optional[TokenEntry]:
+        return self._tokens.get(address)
+
+    def is_alive(self, address) -> bool:
+        entry = self._tokens.get(address)
+        return entry is not None and entry.status == 'alive'
+
+    def addresses(self, include_frozen: bool = False) -> List[str]:
+        """
+        Alive (or alive + frozen) addresses in the order of
+        iter_alive_token_batches: newest first, tokens without a creation
+        time last by address.
+        """
+        statuses = INDEXED_STATUSES if include_frozen else ('alive',)
+        items = [(address, entry.creation_timestamp) for address, entry in list(self._tokens.items())
+                 if entry.status in statuses]
+        dated = sorted(((ts, address) for address, ts in items if ts is not None), reverse=True)
+        undated = sorted(address for address, ts in items if ts is None)
+        return [address for _, address in dated] + undated
+
+    def iter_batches(self, batch_size: int = 1000, include_frozen: bool = False) -> Iterator[List[str]]:
+        addresses = self.addresses(include_frozen)
+        for start in range(0, len(addresses), batch_size):
+            yield addresses[start:start + batch_size]
+
+    # Writers
+
+    def record_loaded(self, data, upsert: bool):
+        """
+        Mirrors a batch the loaders just wrote. upsert=True follows the
+        new-pairs upsert (rows are created, every column is replaced);
+        upsert=False follows load_updates (existing tokens only, a missing
+        value keeps the stored one).
+        """
+        if not self.ready or not len(data):
+            return
+        columns = _columns(data, ('address',) + ATTRIBUTE_COLUMNS)
+        if 'address' not in columns:
+            return
+        addresses = columns.pop('address')
+        now = datetime.utcnow()
+        rows = [(address, {col: values[i] for col, values in columns.items()})
+                for i, address in enumerate(addresses)]
+        self._apply(self._apply_loaded, rows, upsert, now)
+
+    def record_rescheduled(self, prices):
+        """{address: price} just written to token_update_schedule.last_price."""
+        if self.ready and prices:
+            self._apply(self._apply_rescheduled, prices)
+
+    def _apply(self, change, *args):
+        with self._lock:
+            change(self._tokens, *args)
+            if self._journal is not None:
+                self._journal.append((change, args))
+
+    @staticmethod
+    def _apply_loaded(tokens, rows, upsert, now):
+        for address, values in rows:
+            entry = tokens.get(address)
+            if upsert:
+                status = values.get('status') or 'alive'
+                if status not in INDEXED_STATUSES:
+                    tokens.pop(address, None)
+                    continue
+                base = entry or TokenEntry(status, None, None, None, None, None, None)
+                tokens[address] = base._replace(**dict(values, status=status, updated_at=now))
+            elif entry is not None:
+                changes = {col: value for col, value in values.items() if value is not None}
+                if changes.get('status', entry.status) not in INDEXED_STATUSES:
+                    tokens.pop(address, None)
+                    continue
+                tokens[address] = entry._replace(**changes, updated_at=now)
+
+    @staticmethod
+    def _apply_rescheduled(tokens, prices):
+        for address, price in prices.items():
+            entry = tokens.get(address)
+            if entry is not None:
+                tokens[address] = entry._replace(last_price=price)
+
+    def _apply_notifications(self, payloads):
+        """Applies token_changes payloads; returns addresses that must be fetched."""
+        missing = set()
+        with self._lock:
+            for payload in payloads:
+                address, status = payload.get('address'), payload.get('status')
+                if payload.get('op') == 'DELETE' or status not in INDEXED_STATUSES:
+                    self._tokens.pop(address, None)
+                elif address in self._tokens:
+                    self._tokens[address] = self._tokens[address]._replace(status=status)
+                else:
+                    missing.add(address)
+        return missing
+
+    # Database side
+
+    def rebuild(self):
+        """Reloads every alive/frozen token; serves the previous contents meanwhile."""
+        start = time.perf_counter()
+        with self._lock:
+            self._journal = []
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execution_options(stream_results=True).execute(
+                    BOOTSTRAP_QUERY, {'statuses': INDEXED_STATUSES})
+                tokens = dict(_entry(row) for row in result)
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            for change, args in self._journal:
+                change(tokens, *args)
+            self._journal = None
+            self._tokens = tokens
+        self.ready = True
+        self._set_gauges()
+        logging.info(f"Token index loaded {len(tokens)} tokens in {time.perf_counter() - start:.2f}s")
+
+    def _fetch(self, addresses):
+        with self.engine.connect() as conn:
+            rows = conn.execute(FETCH_QUERY, {'addresses': list(addresses), 'statuses': INDEXED_STATUSES}).fetchall()
+        with self._lock:
+            for row in rows:
+                address, entry = _entry(row)
+                self._tokens[address] = entry
+
+    def _set_gauges(self):
+        counts = dict.fromkeys(INDEXED_STATUSES, 0)
+        for entry in list(self._tokens.values()):
+            counts[entry.status] = counts.get(entry.status, 0) + 1
+        for status, count in counts.items():
+            TOKEN_INDEX_TOKENS.set(count, status=status)
+
+    def _connect(self):
+        """A LISTENing connection, then a rebuild: nothing committed after the rebuild's snapshot is missed."""
+        raw = self.engine.raw_connection()
+        try:
+            raw.connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            cursor = raw.cursor()
+            cursor.execute(f"LISTEN {TOKEN_INDEX_CHANNEL}")
+            cursor.close()
+            self.rebuild()
+        except Exception:
+            raw.invalidate()
+            raw.close()
+            raise
+        return raw
+
+    def start(self):
+        """Builds the index and starts the listener thread (no-op unless TOKEN_INDEX_ENABLED)."""
+        if not TOKEN_INDEX_ENABLED or self._listener is not None:
+            return
+        # Own connections: one held by LISTEN, one for rebuilds and fetches
+        self.engine = create_db_engine(pool_size=2, max_overflow=0, pool_pre_ping=True)
+        raw = self._connect()
+        self._listener = threading.Thread(target=self._listen, args=(raw,), name="token-index", daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join()
+            self._listener = None
+        self.ready = False
+
+    def _listen(self, raw):
+        last_rebuild = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                if raw is None:
+                    raw = self._connect()
+                    last_rebuild = time.monotonic()
+                connection = raw.connection
+                if select.select([connection], [], [], LISTEN_POLL_SECONDS) != ([], [], []):
+                    connection.poll()
+                    payloads = [loads(notify.payload) for notify in connection.notifies]
+                    connection.notifies.clear()
+                    missing = self._apply_notifications(payloads)
+                    if missing:
+                        self._fetch(missing)
+                    self._set_gauges()
+                if time.monotonic() - last_rebuild >= TOKEN_INDEX_REFRESH_SECONDS:
+                    self.rebuild()
+                    last_rebuild = time.monotonic()
+            except Exception as e:
+                logging.error(f"Token index listener failed, reconnecting in {RECONNECT_DELAY}s: {str(e)}")
+                if raw is not None:
+                    raw.invalidate()
+                    raw.close()
+                    raw = None
+                self._stop.wait(RECONNECT_DELAY)
+        if raw is not None:
+            raw.close()
+
+
+# Shared by the loaders, the scheduler and query_alive_tokens in this process
+token_index = TokenIndex()
@@ -1,3 +1,4 @@
+import os
 import time
 import logging
 from stem import Signal
@@ -7,6 +8,8 @@ import logging
 logging.getLogger('stem').setLevel(logging.WARNING)
 
 # Configuration
+# Off by default when running against the local stub server (GMGN_STUB_URL)
+USE_TOR = os.getenv("USE_TOR", "false" if os.getenv("GMGN_STUB_URL") else "true").lower() in ("1", "true", "yes")
 TOR_PROXY = {
     "http": "socks5://127.0.0.1:9050",
     "https": "socks5://127.0.0.1:9050"
@@ -18,6 +21,8 @@ class TorController:
         self.current_ip = None
 
     def renew_connection(self):
+        if not USE_TOR:
+            return True
         try:
             with Controller.from_port(port=9051) as controller:
                 # Use cookie authentication
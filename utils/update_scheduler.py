@@ -0,0 +1,226 @@
+# utils/update_scheduler.py
+# Per-token refresh schedule for the updates pipeline, kept in
+# token_update_schedule (see queries.sql) so it survives restarts. Each run
+# claims only the tokens that are due, and after loading gives every token a
+# new due time from its age, volatility, volume and liquidity.
+import os
+import logging
+from datetime import datetime
+from typing import Iterable, Iterator, List
+from sqlalchemy import text
+from psycopg2.extras import execute_values
+from utils.token_index import token_index
+
+SCHEDULE_TABLE = 'token_update_schedule'
+SCHEDULED_STATUSES = ('alive', 'frozen')
+
+# Refresh interval (seconds) per tier, hottest first
+TIER_INTERVALS = {
+    'hot': 10,
+    'active': 60,
+    'warm': 300,
+    'cool': 1800,
+    'cold': 3600,
+    'frozen': 6 * 3600,
+}
+HOT_AGE = 15 * 60  # Tokens younger than this are hot
+ACTIVE_AGE = 2 * 3600
+WARM_AGE = 24 * 3600
+HOT_VOLATILITY = 0.05  # Relative price move since the previous update
+ACTIVE_VOLATILITY = 0.01
+ACTIVE_VOLUME = 100_000
+WARM_VOLUME = 10_000
+COOL_LIQUIDITY = 1_000
+
+CLAIM_LEASE = int(os.getenv('SCHEDULE_CLAIM_LEASE', '300'))  # Seconds a claimed token is held by one run
+FAILED_RETRY_INTERVAL = 60  # Seconds before a token with no API result is tried again
+
+NOW = "(now() AT TIME ZONE 'utc')"
+
+# Claims tokens due by :cutoff: pushes them out by the lease so a concurrent
+# or overlapping run skips them, and drops schedule rows whose token is gone
+# or no longer alive/frozen
+CLAIM_QUERY = text(f"""
+    WITH due AS (
+        SELECT address FROM {SCHEDULE_TABLE}
+        WHERE next_due_at <= :cutoff
+        ORDER BY next_due_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    ), gone AS (
+        DELETE FROM {SCHEDULE_TABLE} s USING due
+        WHERE s.address = due.address
+          AND NOT EXISTS (SELECT 1 FROM tokens t WHERE t.address = due.address AND t.status IN :statuses)
+    )
+    UPDATE {SCHEDULE_TABLE} s
+    SET next_due_at = {NOW} + make_interval(secs => :lease)
+    FROM due
+    WHERE s.address = due.address
+      AND EXISTS (SELECT 1 FROM tokens t WHERE t.address = due.address AND t.status IN :statuses)
+    RETURNING s.address
+""")
+
+SCHEDULE_INPUTS_QUERY = text(f"""
+    SELECT t.address, t.status, t.price, t.volume, t.liquidity,
+           EXTRACT(EPOCH FROM {NOW} - t.creation_timestamp) AS age, s.last_price
+    FROM tokens t LEFT JOIN {SCHEDULE_TABLE} s ON s.address = t.address
+    WHERE t.address = ANY(:addresses)
+""")
+
+UPSERT_SCHEDULE_SQL = f"""
+    INSERT INTO {SCHEDULE_TABLE} (address, next_due_at, interval_seconds, last_price, last_updated_at)
+    SELECT v.address, {NOW} + make_interval(secs => v.interval_seconds), v.interval_seconds, v.last_price, {NOW}
+    FROM (VALUES %s) AS v (address, interval_seconds, last_price)
+    ON CONFLICT (address) DO UPDATE SET
+        next_due_at = EXCLUDED.next_due_at,
+        interval_seconds = EXCLUDED.interval_seconds,
+        last_price = EXCLUDED.last_price,
+        last_updated_at = EXCLUDED.last_updated_at
+"""
+
+
+def update_interval(status, age=None, volatility=None, volume=None, liquidity=None) -> int:
+    """Seconds until a token should be refreshed again. Missing inputs count as quiet."""
+    if status == 'frozen':
+        return TIER_INTERVALS['frozen']
+    age = float('inf') if age is None else age
+    volatility = volatility or 0
+    volume = volume or 0
+    liquidity = liquidity or 0
+
+    if age < HOT_AGE or volatility >= HOT_VOLATILITY:
+        return TIER_INTERVALS['hot']
+    if age < ACTIVE_AGE or volatility >= ACTIVE_VOLATILITY or volume >= ACTIVE_VOLUME:
+        return TIER_INTERVALS['active']
+    if age < WARM_AGE or volume >= WARM_VOLUME:
+        return TIER_INTERVALS['warm']
+    if liquidity >= COOL_LIQUIDITY:
+        return TIER_INTERVALS['cool']
+    return TIER_INTERVALS['cold']
+
+
+def seed_schedule(engine):
+    """Adds every alive/frozen token missing from the schedule, due now (run on startup)."""
+    with engine.begin() as conn:
+        added = conn.execute(text(f"""
+            INSERT INTO {SCHEDULE_TABLE} (address, next_due_at)
+            SELECT address, {NOW} FROM tokens WHERE status IN :statuses
+            ON CONFLICT (address) DO NOTHING
+        """), {'statuses': SCHEDULED_STATUSES}).rowcount
+    logging.info(f"Seeded update schedule with {added} tokens")
+    return added
+
+
+def schedule_new_tokens(engine, addresses: List[str]):
+    """New tokens were just loaded with fresh data: first refresh after the hot interval."""
+    if not addresses:
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            INSERT INTO {SCHEDULE_TABLE} (address, next_due_at, interval_seconds, last_updated_at)
+            SELECT address, {NOW} + make_interval(secs => :interval), :interval, {NOW}
+            FROM unnest(CAST(:addresses AS VARCHAR[])) AS address
+            ON CONFLICT (address) DO NOTHING
+        """), {'addresses': list(addresses), 'interval': TIER_INTERVALS['hot']})
+
+
+def iter_due_token_batches(engine, batch_size: int = 1000) -> Iterator[List[str]]:
+    """
+    Claims and yields due token addresses one batch at a time, most overdue
+    first. Only tokens due when the run started are claimed: the caller
+    reschedules and defers tokens while the run goes on (hot ones 10s ahead),
+    and on a long run those would otherwise come due and be claimed again.
+    """
+    with engine.connect() as conn:
+        cutoff = conn.execute(text(f"SELECT {NOW}")).scalar()
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(CLAIM_QUERY, {
+                'limit': batch_size, 'lease': CLAIM_LEASE, 'statuses': SCHEDULED_STATUSES, 'cutoff': cutoff
+            }).fetchall()
+        if not rows:
+            break
+        total += len(rows)
+        # No short-page exit: rows dropped as gone make a page short without
+        # meaning the queue is drained. Every claimed row leaves the run's
+        # snapshot (its next due time moves past the cutoff), so this ends.
+        yield [row[0] for row in rows]
+    logging.info(f"Claimed {total} due tokens")
+
+
+def schedule_inputs(engine, addresses: List[str]) -> list:
+    """
+    (address, status, price, volume, liquidity, age, last_price) per token.
+    Read from the token index when it runs; only tokens it does not hold
+    (e.g. no longer alive or frozen) are queried.
+    """
+    if not token_index.ready:
+        with engine.connect() as conn:
+            return conn.execute(SCHEDULE_INPUTS_QUERY, {'addresses': addresses}).fetchall()
+
+    now = datetime.utcnow()
+    rows, missing = [], []
+    for address in addresses:
+        entry = token_index.get(address)
+        if entry is None:
+            missing.append(address)
+            continue
+        age = None if entry.creation_timestamp is None else (now - entry.creation_timestamp).total_seconds()
+        rows.append((address, entry.status, entry.price, entry.volume, entry.liquidity, age, entry.last_price))
+    if missing:
+        with engine.connect() as conn:
+            rows += conn.execute(SCHEDULE_INPUTS_QUERY, {'addresses': missing}).fetchall()
+    return rows
+
+
+def reschedule(engine, addresses: Iterable[str]):
+    """
+    Sets the next due time of freshly updated tokens from the values now in
+    tokens. Volatility is the relative price move since the previous update.
+    """
+    addresses = list(addresses)
+    if not addresses:
+        return 0
+    rows = schedule_inputs(engine, addresses)
+
+    values = []
+    for address, status, price, volume, liquidity, age, last_price in rows:
+        volatility = None
+        if price is not None and last_price:
+            volatility = abs(float(price) / float(last_price) - 1)
+        interval = update_interval(
+            status,
+            age=None if age is None else float(age),
+            volatility=volatility,
+            volume=None if volume is None else float(volume),
+            liquidity=None if liquidity is None else float(liquidity),
+        )
+        values.append((address, interval, price))
+
+    with engine.begin() as conn:
+        cursor = conn.connection.cursor()
+        try:
+            execute_values(cursor, UPSERT_SCHEDULE_SQL, values, page_size=1000)
+        finally:
+            cursor.close()
+    token_index.record_rescheduled({address: price for address, _, price in values})
+
+    tiers = {}
+    for _, interval, _ in values:
+        tiers[interval] = tiers.get(interval, 0) + 1
+    logging.info(f"Rescheduled {len(values)} tokens, by interval (s): {dict(sorted(tiers.items()))}")
+    return len(values)
+
+
+def defer(engine, addresses: Iterable[str], seconds: int = FAILED_RETRY_INTERVAL):
+    """Pushes tokens that got no API result back by a short retry interval."""
+    addresses = list(addresses)
+    if not addresses:
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            UPDATE {SCHEDULE_TABLE} SET next_due_at = {NOW} + make_interval(secs => :seconds)
+            WHERE address = ANY(:addresses)
+        """), {'addresses': addresses, 'seconds': seconds})
+    logging.info(f"Deferred {len(addresses)} tokens without results by {seconds}s")